@@ -3,40 +3,416 @@ Arbitrage Engine Module.
 Implements the DFS algorithm to find profitable paths.
 """
 
+import heapq
+import math
+import time
+import logging
 from typing import List, Dict, Set
+import numpy as np
 import config
 from simulator import Simulator
-from graph import MarketGraph
+from graph import MarketGraph, CompactGraph
+from cycle_index import CycleIndex
+from cycle_evaluator import CycleEvaluator, IncrementalScorer
+from negative_cycles import NegativeCycleFinder
+from meet_in_middle import MeetInMiddle
+from filters import OpportunityCollector
+
+logger = logging.getLogger(__name__)
 
 class ArbitrageEngine:
-    def __init__(self, graph: MarketGraph):
+    def __init__(self, graph: MarketGraph, mode: str = None, first_hops: Dict[str, List[int]] = None):
         self.graph = graph
+        self.mode = (mode or config.SEARCH_MODE).upper()
+        # DFS shard: {start_coin: [indices into graph.get_neighbors(start_coin)]}.
+        # None searches every first hop of every stablecoin.
+        self.first_hops = first_hops
         self.opportunities = []
+        self.collector = OpportunityCollector()
+        # False when a time-budgeted search stopped before exploring everything
+        self.search_complete = True
+
+        # Branch-and-bound state (DFS mode)
+        self.prune = False
+        self._best_return = None
 
     def find_arbitrage(self) -> List[Dict]:
         """
-        Run DFS from each stablecoin to find opportunities.
+        Find opportunities using the configured search mode.
+
+        Searches only offer (end_amount, start_coin, edges) candidates to a
+        bounded collector; leg details and strings are built for survivors only.
         """
         self.opportunities = []
-        
+        self.collector = OpportunityCollector()
+        self.search_complete = True
+        # True when candidates carry CompactGraph edge slots instead of edge dicts
+        self._slot_payloads = False
+
+        if self.mode == 'INDEX':
+            self._find_indexed()
+        elif self.mode == 'INCREMENTAL':
+            self._find_incremental()
+        elif self.mode == 'NEGATIVE_CYCLE':
+            self._find_negative_cycles()
+        elif self.mode == 'BEST_FIRST':
+            self._find_best_first()
+        elif self.mode == 'MEET_IN_MIDDLE':
+            self._find_meet_in_middle()
+        else:
+            self._find_dfs()
+
+        for end_amount, (start_coin, edges) in self.collector.survivors():
+            if self._slot_payloads:
+                edges = [self.graph.edge_view(slot) for slot in edges]
+            self._record_opportunity(start_coin, end_amount, self._build_path(edges))
+
+        return self.opportunities
+
+    def _find_dfs(self):
+        """
+        Run DFS from each stablecoin to find opportunities.
+        """
+        self.prune = config.DFS_PRUNING
+        if isinstance(self.graph, CompactGraph):
+            self._find_dfs_compact()
+            return
+
         for start_coin in config.STABLECOINS:
+            if self.first_hops is not None and start_coin not in self.first_hops:
+                continue
             # Only start if the coin exists in the graph
             if start_coin in self.graph.adj:
+                if self.prune:
+                    self._best_return = self._best_return_table(start_coin)
                 self._dfs(
                     start_coin=start_coin,
                     current_coin=start_coin,
                     current_amount=config.START_AMOUNT,
-                    path=[],
+                    edges=[],
                     visited={start_coin}
                 )
-        
-        return self.opportunities
 
-    def _dfs(self, start_coin: str, current_coin: str, current_amount: float, path: List[Dict], visited: Set[str]):
+    def _find_dfs_compact(self):
+        """
+        Same search as _dfs, as index loops over the CompactGraph arrays.
+        Candidates carry edge slots; edge dicts are only built for survivors.
+        """
+        graph = self.graph
+        self._slot_payloads = True
+
+        # Plain lists: indexing numpy arrays element by element is slower
+        offsets = graph.offsets.tolist()
+        targets = graph.targets.tolist()
+        price = graph.price.tolist()
+        keep = (1.0 - graph.fee).tolist()
+        is_buy = graph.is_buy.tolist()
+        max_depth = config.MAX_DEPTH
+        min_trades = config.MIN_TRADES
+        collector = self.collector
+
+        slots = []
+        visited = [False] * len(graph.coins)
+
+        for start_coin in config.STABLECOINS:
+            if self.first_hops is not None and start_coin not in self.first_hops:
+                continue
+            start = graph.coin_id.get(start_coin)
+            if start is None:
+                continue
+            best_return = self._best_return_compact(start) if self.prune else None
+            first_hops = None
+            if self.first_hops is not None:
+                first_hops = [offsets[start] + i for i in self.first_hops.get(start_coin, [])]
+
+            def walk(coin: int, amount: float):
+                depth = len(slots)
+                if depth > max_depth:
+                    return
+                if coin == start and depth >= min_trades:
+                    collector.offer(amount, (start_coin, tuple(slots)))
+                    return
+
+                if depth == 0 and first_hops is not None:
+                    candidates = first_hops
+                else:
+                    candidates = range(offsets[coin], offsets[coin + 1])
+
+                for slot in candidates:
+                    next_coin = targets[slot]
+                    if visited[next_coin] and next_coin != start:
+                        continue
+                    if amount < 0.00000001:
+                        continue
+
+                    # Same arithmetic as Simulator.simulate_trade
+                    next_amount = (amount / price[slot] if is_buy[slot] else amount * price[slot]) * keep[slot]
+
+                    if best_return is not None:
+                        remaining = max_depth - depth - 1
+                        if remaining < 0:
+                            continue
+                        best_back = best_return[remaining][next_coin]
+                        if best_back == 0.0 or next_amount * best_back < self._prune_cutoff():
+                            continue
+
+                    slots.append(slot)
+                    is_new = not visited[next_coin]
+                    if is_new:
+                        visited[next_coin] = True
+                    walk(next_coin, next_amount)
+                    slots.pop()
+                    if is_new:
+                        visited[next_coin] = False
+
+            visited[start] = True
+            walk(start, config.START_AMOUNT)
+            visited[start] = False
+
+    def _best_return_compact(self, start: int) -> List[List[float]]:
+        """
+        _best_return_table over CompactGraph arrays (0.0 = no way back).
+        """
+        graph = self.graph
+        rates = graph.rates()
+        best = np.zeros(len(graph.coins))
+        best[start] = 1.0
+        table = [best.tolist()]
+        for _ in range(config.MAX_DEPTH):
+            cur = best.copy()
+            np.maximum.at(cur, graph.sources, rates * best[graph.targets])
+            best = cur
+            table.append(best.tolist())
+        return table
+
+    def _find_indexed(self):
+        """
+        Re-price the precomputed cycles of this symbol universe.
+        The index is only rebuilt when the graph topology changes, and all
+        cycles are scored in one vectorized pass before legs are expanded.
+        """
+        index = CycleIndex.for_graph(self.graph)
+        evaluator = CycleEvaluator.for_index(index)
+        # Local arrays: the evaluator is shared by every scan of this topology
+        price, fee = evaluator.read_prices(self.graph)
+        end_amounts = evaluator.evaluate(config.START_AMOUNT, price=price, fee=fee)
+
+        for i in CycleEvaluator.rank(end_amounts):
+            start_coin, legs = index.cycles[i]
+            self.collector.offer(float(end_amounts[i]), (start_coin, self._legs_to_edges(legs)))
+
+    def _find_incremental(self):
+        """
+        Re-score only the indexed cycles whose prices moved since the last scan
+        of the same symbol universe, and report the live set above MIN_PROFIT_PERCENT
+        plus the TOP_K best cycles overall (like every other mode).
+        """
+        index = CycleIndex.for_graph(self.graph)
+        scorer = IncrementalScorer.for_evaluator(CycleEvaluator.for_index(index))
+        with scorer.lock:
+            rescored = scorer.update(self.graph)
+            ranked = scorer.ranked() + scorer.top(config.TOP_K)
+        logger.debug(f"Incremental scan: {rescored}/{len(index)} cycles re-scored.")
+
+        offered = set()
+        for i, end_amount in ranked:
+            if i in offered:
+                continue
+            offered.add(i)
+            start_coin, legs = index.cycles[i]
+            self.collector.offer(end_amount, (start_coin, self._legs_to_edges(legs)))
+
+    def _find_negative_cycles(self):
+        """
+        Detect profitable loops of any length with -log(rate) edge weights.
+        Ignores MAX_DEPTH; only cycles with a net gain are reported.
+        """
+        finder = NegativeCycleFinder(self.graph)
+        for start_coin, cycle in finder.find_cycles():
+            if len(cycle) < config.MIN_TRADES:
+                continue
+            path = self._build_path(cycle)
+            self.collector.offer(path[-1]['output'], (start_coin, tuple(cycle)))
+
+    def _find_best_first(self, time_budget: float = None):
+        """
+        Anytime search: expand the most promising partial paths first and stop
+        at the deadline with whatever was found (search_complete tells which).
+
+        A path's priority is its cumulative log-return plus the optimistic log-return
+        back home (see _best_return_table), so closed cycles come out best first
+        and the search can also end early once nothing left can reach the cutoff.
+        """
+        if time_budget is None:
+            time_budget = config.SEARCH_TIME_BUDGET
+        deadline = time.monotonic() + time_budget if time_budget else None
+
+        best_return = {}
+        heap = []
+        seq = 0
+        for start_coin in config.STABLECOINS:
+            if start_coin in self.graph.adj:
+                best_return[start_coin] = self._best_return_table(start_coin)
+                bound = best_return[start_coin][config.MAX_DEPTH].get(start_coin)
+                # (priority, seq, closed, start_coin, coin, amount, edges, visited)
+                heap.append((-math.log(config.START_AMOUNT * bound), seq, False,
+                             start_coin, start_coin, config.START_AMOUNT, (), frozenset([start_coin])))
+                seq += 1
+        heapq.heapify(heap)
+
+        pops = 0
+        while heap:
+            pops += 1
+            if deadline is not None and pops % 256 == 0 and time.monotonic() > deadline:
+                self.search_complete = False
+                logger.warning(f"Best-first search hit its {time_budget}s budget; returning partial results.")
+                break
+
+            priority, _, closed, start_coin, coin, amount, edges, visited = heapq.heappop(heap)
+
+            # Every remaining entry is bounded by this one
+            if math.exp(-priority) < self._prune_cutoff():
+                break
+
+            if closed:
+                self.collector.offer(amount, (start_coin, edges))
+                continue
+
+            if amount < 0.00000001:
+                continue
+
+            depth = len(edges)
+            remaining = config.MAX_DEPTH - depth - 1
+            if remaining < 0:
+                continue
+            best_back = best_return[start_coin][remaining]
+
+            for edge in self.graph.get_neighbors(coin):
+                next_coin = edge['to']
+                if next_coin in visited and next_coin != start_coin:
+                    continue
+
+                next_amount = Simulator.simulate_trade(
+                    amount_in=amount,
+                    price=edge['price'],
+                    fee_rate=edge['fee'],
+                    is_buy=(edge['action'] == 'BUY')
+                )
+
+                if next_coin == start_coin and depth + 1 >= config.MIN_TRADES:
+                    # Closed cycle: its priority is its exact end amount
+                    heapq.heappush(heap, (-math.log(next_amount), seq, True,
+                                          start_coin, next_coin, next_amount, edges + (edge,), visited))
+                else:
+                    bound = best_back.get(next_coin)
+                    if not bound:
+                        continue
+                    heapq.heappush(heap, (-math.log(next_amount * bound), seq, False,
+                                          start_coin, next_coin, next_amount, edges + (edge,), visited | {next_coin}))
+                seq += 1
+
+    def _find_meet_in_middle(self):
+        """
+        Join forward and backward half-paths on their middle coin, for every
+        cycle length from MIN_TRADES to MAX_DEPTH. Suited to depths of 4-6.
+        """
+        search = MeetInMiddle(self.graph)
+        for start_coin in config.STABLECOINS:
+            if start_coin not in self.graph.adj:
+                continue
+            for length in range(max(config.MIN_TRADES, 2), config.MAX_DEPTH + 1):
+                for edges in search.cycles(start_coin, length, self._log_cutoff):
+                    end_amount = config.START_AMOUNT
+                    for edge in edges:
+                        end_amount = Simulator.simulate_trade(end_amount, edge['price'], edge['fee'], edge['action'] == 'BUY')
+                    self.collector.offer(end_amount, (start_coin, edges))
+
+    def _log_cutoff(self) -> float:
+        """
+        _prune_cutoff() as a log-return relative to START_AMOUNT.
+        """
+        cutoff = self._prune_cutoff()
+        if cutoff <= 0:
+            return -math.inf
+        # Margin for float error between summed logs and the replayed trades
+        return math.log(cutoff / config.START_AMOUNT) - 1e-9
+
+    def _best_return_table(self, start_coin: str) -> List[Dict[str, float]]:
+        """
+        best[h][coin] = best rate achievable from coin back to start_coin in at most h trades.
+        Ignores the no-repeat rule, so it is an optimistic (upper) bound for the DFS.
+        """
+        best = [{start_coin: 1.0}]
+        for _ in range(config.MAX_DEPTH):
+            prev = best[-1]
+            cur = dict(prev)
+            for coin, edges in self.graph.adj.items():
+                for edge in edges:
+                    back = prev.get(edge['to'])
+                    if back is None:
+                        continue
+                    rate = Simulator.simulate_trade(1.0, edge['price'], edge['fee'], edge['action'] == 'BUY')
+                    if rate * back > cur.get(coin, 0.0):
+                        cur[coin] = rate * back
+            best.append(cur)
+        return best
+
+    def _prune_cutoff(self) -> float:
+        """
+        End amount a branch must still be able to reach to matter: it is kept
+        if it can pass MIN_PROFIT_PERCENT or beat the current K-th best result.
+        """
+        kth_best = self.collector.kth_best()
+        if kth_best is None:
+            # Top K not filled yet, any closed cycle would still make it
+            return 0.0
+        # Small margin so rounding in the filters never turns a pruned cycle into a visible one
+        threshold = config.START_AMOUNT * (1 + config.MIN_PROFIT_PERCENT / 100) * (1 - 1e-6)
+        return min(threshold, kth_best)
+
+    def _legs_to_edges(self, legs) -> tuple:
+        """
+        Current graph edges for a list of (symbol, action) legs.
+        """
+        return tuple(self.graph.get_edge(symbol, action) for symbol, action in legs)
+
+    def _build_path(self, edges) -> List[Dict]:
+        """
+        Build the detailed leg dicts for a cycle, replaying the trades from START_AMOUNT.
+        """
+        current_amount = config.START_AMOUNT
+        path = []
+        for edge in edges:
+            next_amount = Simulator.simulate_trade(
+                amount_in=current_amount,
+                price=edge['price'],
+                fee_rate=edge['fee'],
+                is_buy=(edge['action'] == 'BUY')
+            )
+            path.append({
+                'symbol': edge['symbol'],
+                'fee': edge['fee'],
+                'action': edge['action'],
+                'from': edge['from'],
+                'to': edge['to'],
+                'price': edge['price'],
+                'input': current_amount,
+                'output': next_amount
+            })
+            current_amount = next_amount
+        return path
+
+    def _dfs(self, start_coin: str, current_coin: str, current_amount: float,
+             edges: List[Dict], visited: Set[str]):
         """
         Depth First Search to explore trading paths.
+
+        Backtracking: edges (graph edges taken so far) and visited are shared
+        mutable stacks. A step pushes before recursing and pops afterwards, so
+        branches that never close a cycle allocate nothing; leg dicts are only
+        built for cycles that survive collection.
         """
-        depth = len(path)
+        depth = len(edges)
 
         # Stop conditions
         if depth > config.MAX_DEPTH:
@@ -45,7 +421,7 @@ class ArbitrageEngine:
         # Check for cycle completion (Arbitrage found)
         # We must have at least MIN_TRADES and returned to start_coin
         if current_coin == start_coin and depth >= config.MIN_TRADES:
-            self._record_opportunity(start_coin, current_amount, path)
+            self.collector.offer(current_amount, (start_coin, tuple(edges)))
             return
 
         # If we are at a stablecoin but it's NOT the start_coin, and we are deep enough, 
@@ -64,6 +440,9 @@ class ArbitrageEngine:
 
         # Iterate neighbors
         neighbors = self.graph.get_neighbors(current_coin)
+        if depth == 0 and self.first_hops is not None:
+            # Sharded search: only this shard's first hops
+            neighbors = [neighbors[i] for i in self.first_hops.get(start_coin, [])]
         for edge in neighbors:
             next_coin = edge['to']
 
@@ -86,28 +465,35 @@ class ArbitrageEngine:
                 is_buy=(edge['action'] == 'BUY')
             )
 
+            # Branch-and-bound: skip if even the best way home cannot reach the cutoff
+            if self.prune:
+                remaining = config.MAX_DEPTH - depth - 1
+                if remaining < 0:
+                    continue
+                best_back = self._best_return[remaining].get(next_coin)
+                if best_back is None or next_amount * best_back < self._prune_cutoff():
+                    continue
+
             # Recurse
-            # Add next_coin to visited for the next step
-            # Note: We create new sets/lists to avoid mutation issues in recursion
-            new_path = path + [{
-                'symbol': edge['symbol'],
-                'fee': edge['fee'],
-                'action': edge['action'],
-                'from': current_coin,
-                'to': next_coin,
-                'price': edge['price'],
-                'input': current_amount,
-                'output': next_amount
-            }]
-            
+            # Push this step, explore, then undo it (next_coin may be start_coin,
+            # which is already in visited and must stay there)
+            edges.append(edge)
+            is_new = next_coin not in visited
+            if is_new:
+                visited.add(next_coin)
+
             self._dfs(
                 start_coin=start_coin,
                 current_coin=next_coin,
                 current_amount=next_amount,
-                path=new_path,
-                visited=visited | {next_coin}
+                edges=edges,
+                visited=visited
             )
 
+            edges.pop()
+            if is_new:
+                visited.discard(next_coin)
+
     def _record_opportunity(self, start_coin: str, end_amount: float, path: List[Dict]):
         """
         Format and store the found opportunity.
@@ -63,7 +63,10 @@ class AutoTrader:
             try:
                 # self.log("Scanning market...")
                 # 1. Scan
-                results = run_analysis(config.ENABLED_EXCHANGES)
+                # Incremental mode in-process: only cycles touched by price moves are re-scored.
+                # The exchanges then share this process's GIL, which INCREMENTAL (mostly
+                # vectorized re-scoring) tolerates; the shared indices and scorers are locked.
+                results = run_analysis(config.ENABLED_EXCHANGES, mode='INCREMENTAL', in_process=True)
                 opportunities = results.get('profitable', [])
                 
                 # 2. Filter & execute Best Opportunity
@@ -0,0 +1,264 @@
+"""
+Book Stream Module.
+Live best bid/ask per exchange from the venues' book-ticker WebSocket feeds.
+
+Each streamed exchange keeps a BookStore: columnar best bid/ask/sizes,
+seeded from one REST all-tickers dump and then updated by every stream
+message. fetch_tickers returns a copy of it (a TickerBook) instantly
+instead of downloading the full dump. A stream that is not fully
+connected and seeded is not used, so callers fall back to REST.
+
+Streams run as tasks on the shared asyncio loop (exchanges/aio.py) and
+reconnect with backoff; the venue protocols live in the adapters
+(Exchange.stream_* / _stream_*).
+"""
+
+import gzip
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional
+import aiohttp
+import numpy as np
+import config
+from exchanges import get_exchange
+from exchanges.base import Exchange
+from exchanges.aio import AsyncExchange, async_client
+from symbol_store import symbol_store
+from ticker_book import TickerBook
+
+logger = logging.getLogger(__name__)
+
+class BookStore:
+    """
+    Thread-safe best bid/ask columns of one exchange (rows in first-seen order).
+    """
+    def __init__(self, capacity: int = 1024):
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        # bid, ask, bidQty, askQty (ticker_book.COLUMNS order) x rows
+        self.columns = np.zeros((4, capacity))
+        # Update sequence number, and the one of each row's last stream update
+        self.seq = 0
+        self.row_seq = np.zeros(capacity, dtype=np.int64)
+        self.updated_at = 0.0
+        self._lock = threading.Lock()
+
+    def _row(self, symbol: str) -> int:
+        row = self.index.get(symbol)
+        if row is None:
+            row = self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            if row >= self.columns.shape[1]:
+                self.columns = np.concatenate([self.columns, np.zeros_like(self.columns)], axis=1)
+                self.row_seq = np.concatenate([self.row_seq, np.zeros_like(self.row_seq)])
+        return row
+
+    def apply(self, updates):
+        """
+        Apply (symbol, bid, bidQty, ask, askQty) updates; None leaves a value unchanged.
+        """
+        with self._lock:
+            for symbol, bid, bid_qty, ask, ask_qty in updates:
+                row = self._row(symbol)
+                self.seq += 1
+                self.row_seq[row] = self.seq
+                for column, value in ((0, bid), (1, ask), (2, bid_qty), (3, ask_qty)):
+                    if value is not None:
+                        self.columns[column, row] = value
+            self.updated_at = time.time()
+
+    def seed(self, book: TickerBook, since: int = None):
+        """
+        Load a REST snapshot, skipping rows the stream updated after sequence
+        number `since` (their stream values are newer than the snapshot).
+        """
+        with self._lock:
+            rows = np.fromiter((self._row(symbol) for symbol in book.symbols), dtype=np.int64, count=len(book))
+            keep = self.row_seq[rows] <= since if since is not None else np.ones(len(rows), dtype=bool)
+            values = np.vstack([book.bid, book.ask, book.bid_qty, book.ask_qty])
+            self.columns[:, rows[keep]] = values[:, keep]
+            self.updated_at = time.time()
+
+    def snapshot(self) -> TickerBook:
+        with self._lock:
+            n = len(self.symbols)
+            columns = self.columns[:, :n].copy()
+            symbols = list(self.symbols)
+        book = TickerBook(symbols, *columns)
+        book.decoder = 'stream'
+        return book
+
+    def __len__(self):
+        return len(self.symbols)
+
+class BookStream:
+    """
+    Keeps one exchange's BookStore current from its book-ticker feed.
+    """
+    def __init__(self, exchange: Exchange):
+        self.exchange = exchange
+        self.name = exchange.name
+        self.store = BookStore()
+        self.connections = 0
+        self.connected = 0
+        self.seeded = False
+        self.messages = 0
+        self.reconnects = 0
+        self.last_error = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Every connection is up and the store has been seeded since they connected.
+        """
+        return self.seeded and self.connections > 0 and self.connected == self.connections
+
+    async def run(self):
+        """
+        Stream until cancelled, reconnecting with jittered exponential backoff.
+        """
+        failures = 0
+        while True:
+            started = time.time()
+            try:
+                await self._stream(await async_client.session())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = repr(e)
+                logger.warning(f"[{self.name}] Book stream interrupted: {e!r}")
+            self.seeded = False
+            self.reconnects += 1
+            # A connection that lasted a while starts the backoff over
+            failures = 1 if time.time() - started > 60 else failures + 1
+            await asyncio.sleep(min(config.STREAM_RECONNECT_MAX, 2 ** failures) * random.uniform(0.5, 1.0))
+
+    async def _stream(self, session: aiohttp.ClientSession):
+        loop = asyncio.get_running_loop()
+        url = await loop.run_in_executor(None, self.exchange._stream_endpoint)
+        if not url:
+            raise ConnectionError("no stream endpoint")
+        universe = await loop.run_in_executor(None, lambda: symbol_store.get(self.exchange, block=False))
+
+        # Subscribe first, then seed from REST without overwriting newer stream updates
+        since = self.store.seq
+        tasks = self._connect(session, url, universe.symbols) if universe else []
+        try:
+            book = await AsyncExchange(self.exchange, session).fetch_rest_tickers()
+            if not book:
+                raise ConnectionError("REST seed failed")
+            if not isinstance(book, TickerBook):
+                book = TickerBook.from_dict(book)
+            self.store.seed(book, since)
+            if not tasks:
+                tasks = self._connect(session, url, list(book.symbols))
+            self.seeded = True
+            logger.info(f"[{self.name}] Book stream seeded with {len(book)} tickers over {len(tasks)} connection(s).")
+
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+            raise ConnectionError("stream closed")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _connect(self, session: aiohttp.ClientSession, url: str, symbols: List[str]) -> List[asyncio.Task]:
+        batch = self.exchange.stream_batch or max(len(symbols), 1)
+        batches = [symbols[i:i + batch] for i in range(0, len(symbols), batch)] or [[]]
+        self.connections = len(batches)
+        return [asyncio.ensure_future(self._connection(session, url, chunk)) for chunk in batches]
+
+    async def _connection(self, session: aiohttp.ClientSession, url: str, symbols: List[str]):
+        async with session.ws_connect(url, heartbeat=config.STREAM_HEARTBEAT, max_msg_size=0) as ws:
+            for message in self.exchange._stream_subscribe(symbols):
+                await ws.send_json(message)
+            self.connected += 1
+            pinger = asyncio.ensure_future(self._ping(ws)) if self.exchange.stream_ping else None
+            try:
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        message = json.loads(msg.data)
+                    elif msg.type == aiohttp.WSMsgType.BINARY:
+                        message = json.loads(gzip.decompress(msg.data))
+                    else:
+                        break
+                    if not isinstance(message, dict):
+                        continue
+                    reply = self.exchange._stream_reply(message)
+                    if reply is not None:
+                        await ws.send_json(reply)
+                    updates = list(self.exchange._parse_stream(message))
+                    if updates:
+                        self.store.apply(updates)
+                        self.messages += 1
+            finally:
+                self.connected -= 1
+                if pinger is not None:
+                    pinger.cancel()
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.exchange.stream_ping_interval)
+            await ws.send_json(self.exchange.stream_ping)
+
+    def status(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'connections': self.connections,
+            'connected': self.connected,
+            'symbols': len(self.store),
+            'messages': self.messages,
+            'reconnects': self.reconnects,
+            'age': time.time() - self.store.updated_at if self.store.updated_at else None,
+            'last_error': self.last_error
+        }
+
+class StreamManager:
+    def __init__(self):
+        # name -> (BookStream, its task's future)
+        self._streams: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def start(self, names: List[str], exchanges: Dict[str, Exchange] = None):
+        """
+        Start streaming the given exchanges (no-op for running or stream-less ones).
+        exchanges optionally maps names to the adapter instances to use.
+        """
+        with self._lock:
+            for name in names:
+                if name in self._streams:
+                    continue
+                exchange = (exchanges or {}).get(name) or get_exchange(name)
+                if exchange is None or (exchange.stream_url is None and exchange.stream_token_endpoint is None):
+                    continue
+                stream = BookStream(exchange)
+                self._streams[name] = (stream, async_client.spawn(stream.run()))
+                logger.info(f"[{name}] Book stream started.")
+
+    def stop(self, names: List[str] = None):
+        with self._lock:
+            for name in list(self._streams if names is None else names):
+                entry = self._streams.pop(name, None)
+                if entry is not None:
+                    entry[1].cancel()
+
+    def snapshot(self, name: str) -> Optional[TickerBook]:
+        """
+        Current book of a streamed exchange, or None if it is not streamed or not ready.
+        """
+        entry = self._streams.get(name)
+        if entry is None or not entry[0].ready:
+            return None
+        return entry[0].store.snapshot()
+
+    def status(self) -> Dict[str, Dict]:
+        return {name: stream.status() for name, (stream, _) in list(self._streams.items())}
+
+# Shared by every scan in this process
+book_streams = StreamManager()
@@ -15,6 +15,52 @@ MIN_PROFIT_PERCENT = -0.5 # Slight loss allowed for visibility
 MAX_DEPTH = 2
 MIN_TRADES = 2
 
+# Search Mode
+# 'DFS'   - walk the market graph on every scan
+# 'INDEX' - enumerate cycles once per symbol universe, then only re-price them
+# 'INCREMENTAL' - like INDEX, but only cycles touched by changed prices are re-scored
+#                 (INDEX and INCREMENTAL state is kept per process, so these modes
+#                 scan in-process, see IN_PROCESS_MODES)
+# 'NEGATIVE_CYCLE' - log-weight Bellman-Ford/SPFA, finds profitable loops of any length
+# 'BEST_FIRST' - most promising paths first, stops at SEARCH_TIME_BUDGET with partial results
+# 'MEET_IN_MIDDLE' - joins half-paths on the middle coin, for MAX_DEPTH of 4-6
+SEARCH_MODE = 'DFS'
+
+# Seconds a BEST_FIRST search may run per exchange (0 or None = no limit)
+SEARCH_TIME_BUDGET = 60.0
+
+# Modes whose scans run on threads of the calling process rather than a fresh
+# process pool (main.run_analysis), so their cycle index and scorer survive
+# between scans; in a new worker per scan they would be rebuilt every time
+IN_PROCESS_MODES = ['INDEX', 'INCREMENTAL']
+
+# DFS branch-and-bound: cut branches that cannot pass MIN_PROFIT_PERCENT
+# nor beat the TOP_K-th best result found so far (results are unchanged)
+DFS_PRUNING = True
+
+# Processes a single exchange's DFS is split across, by first hop (1 = no sharding)
+SEARCH_SHARDS = 1
+
+# Build the array-backed (CSR) CompactGraph instead of the dict-based MarketGraph
+COMPACT_GRAPH = False
+
+# Strip coins/edges that cannot be on any stablecoin cycle before searching (results unchanged)
+PRUNE_GRAPH = True
+
+# Drop edges whose top-of-book size is zero or worth less than this many stablecoins
+# (None = keep every quote; venues that report no sizes are never filtered)
+MIN_EDGE_NOTIONAL = None
+
+# Number of best paths kept per exchange regardless of the profit threshold
+TOP_K = 50
+
+# Max cycles extracted per stablecoin in NEGATIVE_CYCLE mode
+NEGATIVE_CYCLE_ROUNDS = 20
+
+# Max cycles per stablecoin that NEGATIVE_CYCLE mode breaks without reporting them
+# (already found, or through no stablecoin); these do not count against the rounds
+NEGATIVE_CYCLE_MAX_REJECTS = 50
+
 # Supported Stablecoins
 STABLECOINS = [
     "USDT",
@@ -23,6 +69,66 @@ STABLECOINS = [
 
 REQUEST_TIMEOUT = 10
 
+# Pooled keep-alive connections per exchange (exchanges/base.py Transport)
+HTTP_POOL_SIZE = 10
+
+# Retries of a failed request (connection errors, timeouts, 429/418/5xx), with
+# full-jitter exponential backoff starting at HTTP_BACKOFF seconds, capped at HTTP_BACKOFF_MAX
+HTTP_RETRIES = 2
+HTTP_BACKOFF = 0.25
+HTTP_BACKOFF_MAX = 4.0
+
+# Meter requests against each venue's request-weight budget, shared by all processes
+# on the host (exchanges/rate_limit.py), using RATE_LIMIT_SAFETY of the published limit
+RATE_LIMIT = True
+RATE_LIMIT_SAFETY = 0.8
+
+# Max seconds a request waits for budget before it is given up
+RATE_LIMIT_MAX_WAIT = 5.0
+
+# Seconds an identical GET's result is reused by concurrent callers in one process
+RATE_LIMIT_COALESCE_WINDOW = 0.5
+
+# Circuit breaker per exchange (exchanges/health.py): after HEALTH_FAILURE_THRESHOLD consecutive
+# failed requests (or ones slower than HEALTH_SLOW_SECONDS) scans skip the venue until a
+# background probe succeeds
+CIRCUIT_BREAKER = True
+HEALTH_FAILURE_THRESHOLD = 3
+HEALTH_SLOW_SECONDS = 8.0
+
+# Seconds between probes of an open breaker's venue, doubling after each failed probe up to the max
+HEALTH_PROBE_INTERVAL = 15.0
+HEALTH_PROBE_INTERVAL_MAX = 300.0
+
+# Download all venues' tickers concurrently in the parent process (exchanges/aio.py);
+# worker processes then only join, build and search
+ASYNC_FETCH = True
+
+# Max open connections of the shared asyncio connection pool
+ASYNC_POOL_SIZE = 20
+
+# Keep a live best bid/ask book per exchange from its WebSocket book-ticker feed
+# (book_stream.py); scans read it instead of downloading the REST ticker dump
+STREAM_TICKERS = False
+
+# Seconds between WebSocket protocol pings, and max seconds between reconnect attempts
+STREAM_HEARTBEAT = 20.0
+STREAM_RECONNECT_MAX = 60.0
+
+# Seconds before a cached symbol universe is refreshed (in the background, see symbol_store.py)
+SYMBOL_CACHE_TTL = 3600
+
+# Seconds a process waits for another one's symbol refresh before using the previous cache
+SYMBOL_REFRESH_LOCK_WAIT = 5.0
+
+# Symbol universe changes kept per exchange for /api/symbols/diff
+UNIVERSE_DIFF_HISTORY = 20
+
+# Live graphs and cycle indices are patched in place when at most this share of
+# their pairs/edges changed; larger changes rebuild them from scratch. Both only
+# live on between in-process scans (IN_PROCESS_MODES, run_analysis in_process)
+INCREMENTAL_REBUILD_LIMIT = 0.2
+
 # Trading Execution Config
 TRADE_MODE = 'PAPER' # 'PAPER' or 'LIVE_TESTNET'
 BYBIT_API_KEY = ''
@@ -0,0 +1,225 @@
+"""
+Shared fixtures of the offline tests: a synthetic market, its snapshots
+and graphs, and the search settings the equivalence tests run with.
+
+Every test runs in its own temp directory, since the instrument registry,
+symbol caches and rate limit state are written to the working directory.
+"""
+
+import gzip
+import json
+import random
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from graph import MarketGraph
+from market_data import MarketSnapshot
+from symbol_cache import SymbolTable
+from ticker_book import TickerBook
+from arbitrage import ArbitrageEngine
+
+ALTS = [f"A{i:02d}" for i in range(40)]
+
+class SyntheticMarket:
+    """
+    Builders and comparisons over a synthetic venue (no network).
+    """
+    exchange = 'Synthetic'
+
+    @staticmethod
+    def pairs(seed: int = 7) -> list:
+        """
+        ~140 pairs: every alt against USDT, BTC and ETH, a few against USDC, and
+        the majors against each other, priced from one hidden value per coin
+        plus noise (so some cycles pass the threshold and a few are profitable).
+        A fresh list on every call.
+        """
+        rnd = random.Random(seed)
+        value = {'USDT': 1.0, 'USDC': 1.0, 'BTC': 60000.0, 'ETH': 3000.0}
+        for alt in ALTS:
+            value[alt] = 10 ** rnd.uniform(-2, 2)
+
+        markets = [('BTC', 'USDT'), ('ETH', 'USDT'), ('ETH', 'BTC'), ('USDC', 'USDT'), ('BTC', 'USDC'), ('ETH', 'USDC')]
+        for alt in ALTS:
+            markets += [(alt, 'USDT'), (alt, 'BTC'), (alt, 'ETH')]
+        markets += [(alt, 'USDC') for alt in ALTS[:12]]
+
+        pairs = []
+        for base, quote in markets:
+            mid = value[base] / value[quote] * rnd.uniform(0.996, 1.004)
+            spread = rnd.uniform(0.0001, 0.0008)
+            pairs.append({
+                'symbol': f"{base}{quote}", 'base': base, 'quote': quote, 'fee_taker': 0.001,
+                'bid': mid * (1 - spread), 'ask': mid * (1 + spread), 'bidQty': 10.0, 'askQty': 10.0
+            })
+        # One clearly mispriced book, so there are net-gain cycles to find
+        pairs[-1]['bid'] *= 1.02
+        pairs[-1]['ask'] *= 1.02
+        return pairs
+
+    @staticmethod
+    def refreshed(pairs: list) -> list:
+        """
+        The universe after a refresh: two delistings, a listing, a fee change and a re-based pair.
+        """
+        pairs = [dict(p) for p in pairs if p['symbol'] not in ('A03ETH', 'A05BTC')]
+        # Priced like A20USDT (USDC trades at par)
+        listed = dict(next(p for p in pairs if p['symbol'] == 'A20USDT'), symbol='A20USDC', quote='USDC')
+        pairs.append(listed)
+        eth_btc = next(p for p in pairs if p['symbol'] == 'ETHBTC')
+        for p in pairs:
+            if p['symbol'] == 'A01BTC':
+                p['fee_taker'] = 0.002
+            if p['symbol'] == 'A02ETH':
+                # Same ticker, now quoted in BTC (a venue re-listing); priced via ETHBTC
+                p['quote'] = 'BTC'
+                p['bid'] *= eth_btc['bid']
+                p['ask'] *= eth_btc['ask']
+        return pairs
+
+    @staticmethod
+    def tickers(pairs: list) -> dict:
+        return {p['symbol']: {'bid': p['bid'], 'ask': p['ask'], 'bidQty': p['bidQty'], 'askQty': p['askQty']}
+                for p in pairs}
+
+    def snapshot(self, pairs: list) -> MarketSnapshot:
+        """
+        Join of the pairs' symbol universe with their quotes (pairs quoted 0 drop out, as in MarketData).
+        """
+        return MarketSnapshot.join(self.exchange, SymbolTable.from_records(pairs),
+                                   TickerBook.from_dict(self.tickers(pairs)))
+
+    @staticmethod
+    def graph(graph_cls, snapshot: MarketSnapshot):
+        graph = graph_cls()
+        graph.build_snapshot(snapshot)
+        return graph
+
+    @staticmethod
+    def edge_set(graph) -> dict:
+        """
+        (symbol, action) -> (from, to, price, fee) of every edge, plus each coin's neighbours.
+        """
+        edges = {key: (e['from'], e['to'], e['price'], e['fee']) for key, e in graph.edges.items()}
+        neighbours = {coin: sorted((e['symbol'], e['action']) for e in graph.get_neighbors(coin))
+                      for coin in graph.adj if graph.get_neighbors(coin)}
+        return {'edges': edges, 'neighbours': neighbours}
+
+    @staticmethod
+    def search(graph, mode: str) -> list:
+        engine = ArbitrageEngine(graph, mode=mode)
+        opportunities = engine.find_arbitrage()
+        assert engine.search_complete
+        return opportunities
+
+    @staticmethod
+    def cycle_key(op: dict) -> tuple:
+        legs = tuple((leg['symbol'], leg['action']) for leg in op['raw_path'])
+        return (op['start_coin'], legs, round(op['end_amount'], 4))
+
+    @staticmethod
+    def passing(opportunities: list) -> set:
+        return {SyntheticMarket.cycle_key(op) for op in opportunities
+                if op['profit_percent'] >= config.MIN_PROFIT_PERCENT}
+
+    @staticmethod
+    def top_amounts(opportunities: list) -> list:
+        return sorted((op['end_amount'] for op in opportunities), reverse=True)[:config.TOP_K]
+
+class LocalServer:
+    """
+    HTTP server on 127.0.0.1 (in a background thread) standing in for a venue's REST API.
+
+    route(path, *responses) scripts a path: each request takes the next
+    (status, headers, body) response and the last one repeats. Bodies that
+    are not bytes or str are sent as JSON; a Content-Encoding: gzip header
+    compresses the body. Requested paths are kept in `hits`.
+    """
+    def __init__(self):
+        self.routes = {}
+        self.hits = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._answer(self)
+
+            def do_POST(self):
+                server._answer(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def route(self, path: str, *responses):
+        self.routes[path] = list(responses)
+
+    def _answer(self, handler: BaseHTTPRequestHandler):
+        path = handler.path.split('?')[0]
+        self.hits.append(path)
+        responses = self.routes.get(path) or [(404, {}, b'')]
+        status, headers, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode()
+        if headers.get('Content-Encoding') == 'gzip':
+            body = gzip.compress(body)
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def market() -> SyntheticMarket:
+    return SyntheticMarket()
+
+@pytest.fixture
+def search_settings(monkeypatch):
+    """
+    Depth-3 searches from USDT/USDC, with a threshold and TOP_K such that the
+    top K holds near misses as well as passing cycles.
+    """
+    monkeypatch.setattr(config, 'MAX_DEPTH', 3)
+    monkeypatch.setattr(config, 'MIN_TRADES', 2)
+    monkeypatch.setattr(config, 'MIN_PROFIT_PERCENT', -0.2)
+    monkeypatch.setattr(config, 'TOP_K', 100)
+    monkeypatch.setattr(config, 'STABLECOINS', ['USDT', 'USDC'])
+    monkeypatch.setattr(config, 'SEARCH_TIME_BUDGET', 60.0)
+    monkeypatch.setattr(config, 'DFS_PRUNING', True)
+    monkeypatch.setattr(config, 'MIN_EDGE_NOTIONAL', None)
+
+@pytest.fixture
+def reference(market, search_settings, monkeypatch) -> list:
+    """
+    Plain exhaustive DFS (no branch-and-bound) on the synthetic graph.
+    """
+    monkeypatch.setattr(config, 'DFS_PRUNING', False)
+    graph = MarketGraph()
+    graph.build(market.pairs())
+    opportunities = market.search(graph, 'DFS')
+    # The searches under test (DFS included) run with branch-and-bound
+    monkeypatch.setattr(config, 'DFS_PRUNING', True)
+    return opportunities
+
+@pytest.fixture
+def local_server():
+    server = LocalServer()
+    yield server
+    server.close()
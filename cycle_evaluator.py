@@ -0,0 +1,228 @@
+"""
+Cycle Evaluator Module.
+Scores a fixed set of cycles in one vectorized NumPy pass.
+"""
+
+import weakref
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+import config
+from graph import MarketGraph
+from cycle_index import CycleIndex
+from filters import OpportunityCollector
+
+class CycleEvaluator:
+    def __init__(self, index: CycleIndex):
+        self.index = index
+
+        # Every distinct (symbol, action) leg gets one slot in the per-leg arrays.
+        self.legs: List[Tuple[str, str]] = []
+        self.slot_of = {}
+        for _, legs in index.cycles:
+            for leg in legs:
+                if leg not in self.slot_of:
+                    self.slot_of[leg] = len(self.legs)
+                    self.legs.append(leg)
+
+        # The extra last slot is padding for cycles shorter than the longest one.
+        # Its rate is always 1.0 so it does not change the product.
+        self.pad_slot = len(self.legs)
+        width = max((len(legs) for _, legs in index.cycles), default=0)
+        self.cycle_slots = np.full((len(index.cycles), width), self.pad_slot, dtype=np.int32)
+        for row, (_, legs) in enumerate(index.cycles):
+            self.cycle_slots[row, :len(legs)] = [self.slot_of[leg] for leg in legs]
+
+        self.price = np.ones(self.pad_slot + 1)
+        self.fee = np.zeros(self.pad_slot + 1)
+        self.is_buy = np.zeros(self.pad_slot + 1, dtype=bool)
+        self.is_buy[:self.pad_slot] = [action == 'BUY' for _, action in self.legs]
+
+    @classmethod
+    def for_index(cls, index: CycleIndex) -> 'CycleEvaluator':
+        """
+        Return the evaluator attached to an index, creating it on first use.
+        """
+        evaluator = getattr(index, 'evaluator', None)
+        if evaluator is None:
+            evaluator = cls(index)
+            index.evaluator = evaluator
+        return evaluator
+
+    def read_prices(self, graph: MarketGraph) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Current price and fee of every leg as fresh arrays (padding slot included).
+        """
+        price = np.ones(self.pad_slot + 1)
+        fee = np.zeros(self.pad_slot + 1)
+        for slot, (symbol, action) in enumerate(self.legs):
+            edge = graph.get_edge(symbol, action)
+            price[slot] = edge['price']
+            fee[slot] = edge['fee']
+        return price, fee
+
+    def load_prices(self, graph: MarketGraph):
+        """
+        Copy current price and fee of every leg from the graph into the arrays.
+        Evaluators are shared per index, so concurrent scans should pass
+        read_prices() arrays to evaluate() instead.
+        """
+        self.price, self.fee = self.read_prices(graph)
+
+    def leg_rates(self, price: np.ndarray = None, fee: np.ndarray = None) -> np.ndarray:
+        """
+        Conversion rate per leg after fees:
+          BUY  -> (1 / ask) * (1 - fee)
+          SELL -> bid * (1 - fee)
+        Uses the loaded prices unless other price/fee arrays are given.
+        """
+        if price is None: price = self.price
+        if fee is None: fee = self.fee
+        rates = np.where(self.is_buy, 1.0 / price, price) * (1.0 - fee)
+        rates[self.pad_slot] = 1.0
+        return rates
+
+    def evaluate(self, start_amount: float = None, rows: np.ndarray = None,
+                 price: np.ndarray = None, fee: np.ndarray = None) -> np.ndarray:
+        """
+        End amount of every cycle, in index order (or only of the given rows).
+        """
+        if start_amount is None:
+            start_amount = config.START_AMOUNT
+        rates = self.leg_rates(price, fee)
+        slots = self.cycle_slots if rows is None else self.cycle_slots[rows]
+        return start_amount * np.prod(rates[slots], axis=1)
+
+    def cycles_using(self, slots: np.ndarray) -> np.ndarray:
+        """
+        Rows of every cycle that contains at least one of the given leg slots.
+        """
+        if not hasattr(self, '_rows_by_slot'):
+            # Inverted index: rows sorted by slot, plus per-slot bounds
+            width = self.cycle_slots.shape[1]
+            flat = self.cycle_slots.ravel()
+            rows = np.repeat(np.arange(len(self.cycle_slots), dtype=np.int32), width)
+            used = flat != self.pad_slot
+            order = np.argsort(flat[used], kind='stable')
+            self._rows_by_slot = rows[used][order]
+            self._slot_bounds = np.searchsorted(flat[used][order], np.arange(self.pad_slot + 2))
+
+        if len(slots) == 0:
+            return np.zeros(0, dtype=np.int32)
+        parts = [self._rows_by_slot[self._slot_bounds[s]:self._slot_bounds[s + 1]] for s in slots]
+        return np.unique(np.concatenate(parts))
+
+    @staticmethod
+    def rank(end_amounts: np.ndarray) -> np.ndarray:
+        """
+        Cycle indices sorted by end amount, best first.
+        """
+        return np.argsort(-end_amounts, kind='stable')
+
+
+class IncrementalScorer:
+    """
+    Live ranked opportunity set for one cycle index.
+
+    Keeps the previous price snapshot, diffs each new one against it and
+    re-scores only the cycles that contain a changed symbol.
+    """
+    def __init__(self, evaluator: CycleEvaluator):
+        self.evaluator = evaluator
+        # Previous snapshot (per-leg price and fee) and the scores derived from it
+        self.price = None
+        self.fee = None
+        self.end_amounts = None
+        # Cycle row -> end amount, for cycles at or above the profit threshold
+        self.live = {}
+        self.lock = threading.Lock()
+        self._params = None
+        # Graph (weak reference), its version and its MarketSnapshot at the previous update
+        self._graph = None
+        self._version = None
+        self._snapshot = None
+
+    @classmethod
+    def for_evaluator(cls, evaluator: CycleEvaluator) -> 'IncrementalScorer':
+        scorer = getattr(evaluator, 'scorer', None)
+        if scorer is None:
+            scorer = cls(evaluator)
+            evaluator.scorer = scorer
+        return scorer
+
+    def update(self, graph: MarketGraph) -> int:
+        """
+        Bring the live set up to date with the graph's prices.
+        Returns the number of cycles re-scored.
+
+        If the graph is the one of the previous update, with the same version,
+        and was re-priced from a snapshot of the same rows (graph.snapshot),
+        only the legs of the rows whose quotes moved are read from it.
+        Otherwise every leg is read and diffed.
+        """
+        evaluator = self.evaluator
+        params = (config.START_AMOUNT, config.MIN_PROFIT_PERCENT)
+
+        if self.end_amounts is None or params != self._params:
+            # First snapshot (or settings changed): score everything
+            self.price, self.fee = evaluator.read_prices(graph)
+            self._params = params
+            self.end_amounts = evaluator.evaluate(config.START_AMOUNT, price=self.price, fee=self.fee)
+            rows = np.arange(len(self.end_amounts))
+            self.live = {}
+        else:
+            changed = self._moved_slots(graph)
+            if changed is None:
+                price, fee = evaluator.read_prices(graph)
+                changed = np.nonzero((price != self.price) | (fee != self.fee))[0]
+                self.price[changed] = price[changed]
+                self.fee[changed] = fee[changed]
+            else:
+                for slot in changed.tolist():
+                    edge = graph.get_edge(*evaluator.legs[slot])
+                    self.price[slot] = edge['price']
+                    self.fee[slot] = edge['fee']
+            rows = evaluator.cycles_using(changed)
+            self.end_amounts[rows] = evaluator.evaluate(config.START_AMOUNT, rows, self.price, self.fee)
+
+        self._graph, self._version = weakref.ref(graph), graph.version
+        self._snapshot = getattr(graph, 'snapshot', None)
+        for row, amount in zip(rows.tolist(), self.end_amounts[rows].tolist()):
+            if OpportunityCollector.passes_threshold(amount):
+                self.live[row] = amount
+            else:
+                self.live.pop(row, None)
+        return len(rows)
+
+    def _moved_slots(self, graph: MarketGraph) -> Optional[np.ndarray]:
+        """
+        Leg slots of the snapshot rows whose bid or ask changed since the
+        previous update, or None if the snapshots cannot be compared row by row.
+        """
+        snapshot, previous = getattr(graph, 'snapshot', None), self._snapshot
+        if (snapshot is None or previous is None or self._graph() is not graph
+                or graph.version != self._version or snapshot.symbols != previous.symbols):
+            return None
+        moved = np.nonzero((snapshot.bid != previous.bid) | (snapshot.ask != previous.ask))[0]
+        slot_of = self.evaluator.slot_of
+        slots = [slot_of[leg] for i in moved.tolist() for leg in
+                 ((snapshot.symbols[i], 'BUY'), (snapshot.symbols[i], 'SELL')) if leg in slot_of]
+        return np.array(slots, dtype=np.int64)
+
+    def ranked(self) -> List[Tuple[int, float]]:
+        """
+        (cycle row, end amount) of the live set, best first.
+        """
+        return sorted(self.live.items(), key=lambda item: item[1], reverse=True)
+
+    def top(self, k: int) -> List[Tuple[int, float]]:
+        """
+        (cycle row, end amount) of the k best cycles overall, best first
+        (near misses below the profit threshold included).
+        """
+        if self.end_amounts is None or k <= 0 or len(self.end_amounts) == 0:
+            return []
+        k = min(k, len(self.end_amounts))
+        rows = np.argpartition(-self.end_amounts, k - 1)[:k]
+        rows = rows[np.argsort(-self.end_amounts[rows], kind='stable')]
+        return list(zip(rows.tolist(), self.end_amounts[rows].tolist()))
@@ -0,0 +1,214 @@
+"""
+Cycle Index Module.
+Precomputes every closed trading path for a fixed symbol universe so that
+scans only have to re-price known cycles instead of walking the graph.
+"""
+
+import heapq
+import logging
+import threading
+from collections import deque
+from typing import List, Dict, Tuple
+import config
+from graph import MarketGraph
+
+logger = logging.getLogger(__name__)
+
+# A leg is (symbol, action) where action is 'BUY' or 'SELL'.
+Leg = Tuple[str, str]
+
+# Indices kept alive per process, keyed by graph topology + search settings.
+# The symbol universe only changes when the symbol cache refreshes (hourly),
+# so a handful of entries covers every exchange. A new topology close to a
+# cached one (a few listings/delistings) is derived from it by CycleIndex.patch.
+# Only scans that run in one long-lived process hit it, which is why
+# run_analysis keeps INDEX/INCREMENTAL scans in-process (config.IN_PROCESS_MODES).
+_INDEX_CACHE = {}
+_INDEX_CACHE_SIZE = 8
+# In-process scans look up, patch and insert from several threads
+_INDEX_CACHE_LOCK = threading.Lock()
+
+
+class CycleIndex:
+    def __init__(self):
+        # List of (start_coin, (leg, leg, ...)) in DFS discovery order
+        self.cycles: List[Tuple[str, Tuple[Leg, ...]]] = []
+
+    @staticmethod
+    def cache_key(graph: MarketGraph) -> tuple:
+        return (
+            graph.topology_key(),
+            config.MAX_DEPTH,
+            config.MIN_TRADES,
+            tuple(config.STABLECOINS)
+        )
+
+    @classmethod
+    def for_graph(cls, graph: MarketGraph) -> 'CycleIndex':
+        """
+        Return the index matching this graph's topology, building it on first use
+        (or patching a cached index of a nearly identical topology).
+        """
+        key = cls.cache_key(graph)
+        # Held while building too, so concurrent scans of one topology build it once
+        with _INDEX_CACHE_LOCK:
+            index = _INDEX_CACHE.get(key)
+            if index is None:
+                index = cls._patch_closest(graph, key)
+                if index is None:
+                    index = cls()
+                    index.build(graph)
+                if len(_INDEX_CACHE) >= _INDEX_CACHE_SIZE:
+                    # Drop the oldest entry (dicts keep insertion order)
+                    del _INDEX_CACHE[next(iter(_INDEX_CACHE))]
+                _INDEX_CACHE[key] = index
+        return index
+
+    @classmethod
+    def _patch_closest(cls, graph: MarketGraph, key: tuple) -> 'CycleIndex':
+        """
+        Patch the cached index (same search settings) whose topology differs
+        least from this graph's, if at most INCREMENTAL_REBUILD_LIMIT of the
+        edges differ. Returns None when a full build is the better deal.
+        Called with _INDEX_CACHE_LOCK held.
+        """
+        topology = key[0]
+        best = None
+        for cached_key, cached in list(_INDEX_CACHE.items()):
+            if cached_key[1:] != key[1:]:
+                continue
+            changed = len(topology ^ cached_key[0])
+            if best is None or changed < best[0]:
+                best = (changed, cached_key[0], cached)
+        if best is None or best[0] > config.INCREMENTAL_REBUILD_LIMIT * max(len(topology), 1):
+            return None
+
+        _, previous_topology, previous = best
+        return previous.patch(graph, topology - previous_topology, previous_topology - topology)
+
+    def patch(self, graph: MarketGraph, added: frozenset, removed: frozenset) -> 'CycleIndex':
+        """
+        New index for `graph`, whose topology is this index's minus the `removed`
+        and plus the `added` edges ((symbol, action, from, to) tuples, as in
+        topology_key). Cycles over removed edges are dropped, and only cycles
+        through at least one added edge are enumerated; the rest are reused.
+        """
+        removed_legs = {(symbol, action) for symbol, action, _, _ in removed}
+        index = CycleIndex()
+        index.cycles = [cycle for cycle in self.cycles if not any(leg in removed_legs for leg in cycle[1])]
+        kept = len(index.cycles)
+
+        if added:
+            added_legs = {(symbol, action) for symbol, action, _, _ in added}
+            for start_coin in config.STABLECOINS:
+                if start_coin in graph.adj:
+                    home, through = self._distances(graph, start_coin, added)
+                    index._walk_through(graph, start_coin, start_coin, [], {start_coin},
+                                        False, added_legs, home, through)
+
+        logger.info(f"Cycle index patched: {len(self.cycles) - kept} cycles dropped, "
+                    f"{len(index.cycles) - kept} added ({len(removed)} edges removed, {len(added)} added).")
+        return index
+
+    @staticmethod
+    def _distances(graph: MarketGraph, start_coin: str, added: frozenset) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Lower bounds for pruning the patch walk, in legs:
+          home[u]    - shortest path from u back to start_coin
+          through[u] - shortest path from u back to start_coin over an added edge
+        """
+        reverse = {}
+        for coin in graph.adj:
+            for edge in graph.get_neighbors(coin):
+                reverse.setdefault(edge['to'], []).append(coin)
+
+        home = {start_coin: 0}
+        queue = deque([start_coin])
+        while queue:
+            coin = queue.popleft()
+            for prev in reverse.get(coin, []):
+                if prev not in home:
+                    home[prev] = home[coin] + 1
+                    queue.append(prev)
+
+        # Multi-source search backwards from the added edges' sources
+        through = {}
+        heap = [(1 + home[to], frm) for _, _, frm, to in added if to in home]
+        heapq.heapify(heap)
+        while heap:
+            dist, coin = heapq.heappop(heap)
+            if coin in through:
+                continue
+            through[coin] = dist
+            for prev in reverse.get(coin, []):
+                if prev not in through:
+                    heapq.heappush(heap, (dist + 1, prev))
+        return home, through
+
+    def _walk_through(self, graph: MarketGraph, start_coin: str, current_coin: str, legs: List[Leg],
+                      visited: set, touched: bool, added_legs: set, home: Dict[str, int], through: Dict[str, int]):
+        """
+        _walk restricted to cycles using at least one added leg (`touched` once one is on the path).
+        """
+        depth = len(legs)
+        if depth > config.MAX_DEPTH:
+            return
+
+        if current_coin == start_coin and depth >= config.MIN_TRADES:
+            if touched:
+                self.cycles.append((start_coin, tuple(legs)))
+            return
+
+        bound = (home if touched else through).get(current_coin)
+        if bound is None or depth + bound > config.MAX_DEPTH:
+            return
+
+        for edge in graph.get_neighbors(current_coin):
+            next_coin = edge['to']
+            if next_coin in visited and next_coin != start_coin:
+                continue
+
+            leg = (edge['symbol'], edge['action'])
+            legs.append(leg)
+            visited.add(next_coin)
+            self._walk_through(graph, start_coin, next_coin, legs, visited,
+                               touched or leg in added_legs, added_legs, home, through)
+            legs.pop()
+            if next_coin != start_coin:
+                visited.discard(next_coin)
+
+    def build(self, graph: MarketGraph):
+        """
+        Enumerate every closed path up to MAX_DEPTH that starts and ends at a stablecoin.
+        Follows the same rules as ArbitrageEngine._dfs (no repeated coins, at least MIN_TRADES legs).
+        """
+        self.cycles = []
+        for start_coin in config.STABLECOINS:
+            if start_coin in graph.adj:
+                self._walk(graph, start_coin, start_coin, [], {start_coin})
+
+        logger.info(f"Cycle index built: {len(self.cycles)} cycles (depth <= {config.MAX_DEPTH}).")
+
+    def _walk(self, graph: MarketGraph, start_coin: str, current_coin: str, legs: List[Leg], visited: set):
+        depth = len(legs)
+        if depth > config.MAX_DEPTH:
+            return
+
+        if current_coin == start_coin and depth >= config.MIN_TRADES:
+            self.cycles.append((start_coin, tuple(legs)))
+            return
+
+        for edge in graph.get_neighbors(current_coin):
+            next_coin = edge['to']
+            if next_coin in visited and next_coin != start_coin:
+                continue
+
+            legs.append((edge['symbol'], edge['action']))
+            visited.add(next_coin)
+            self._walk(graph, start_coin, next_coin, legs, visited)
+            legs.pop()
+            if next_coin != start_coin:
+                visited.discard(next_coin)
+
+    def __len__(self):
+        return len(self.cycles)
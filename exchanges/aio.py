@@ -0,0 +1,224 @@
+"""
+Async Exchange Client.
+Fetches every venue's symbols or tickers concurrently on one event loop,
+over one long-lived aiohttp connection pool.
+
+Adapters only declare endpoints and parse responses (see Exchange), so
+AsyncExchange drives all of them without per-venue code. The loop runs in
+a daemon thread, so blocking callers (run_analysis, Flask handlers) submit
+to it from any thread and keep-alive connections survive between scans.
+"""
+
+import json
+import time
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Dict, List
+import aiohttp
+import config
+from .base import Exchange, Transport, transport, RETRY_STATUSES
+from .rate_limit import rate_limiter, RateLimitExceeded
+from .health import health
+from . import get_exchange
+
+logger = logging.getLogger(__name__)
+
+class AsyncExchange:
+    """
+    Async variant of an Exchange adapter; returns what its blocking fetch_* methods return.
+    """
+    def __init__(self, exchange: Exchange, session: aiohttp.ClientSession):
+        self.exchange = exchange
+        self.name = exchange.name
+        self.session = session
+
+    async def _get(self, endpoint: str, params: Dict = None, raw: bool = False):
+        """
+        Async Exchange._get, with the blocking Transport's retry policy, rate
+        limiting, accounting and circuit breaker.
+        """
+        if not health.allow(self.name):
+            return None
+        # As in Exchange._request, the breaker sees the last round trip only
+        rounds = []
+        try:
+            result = await self._request(endpoint, params, raw, rounds)
+        except RateLimitExceeded as e:
+            logger.error(f"{self.name} API Error: {e}")
+            return None
+        except Exception as e:
+            health.record(self.name, False, rounds[-1] if rounds else 0.0, repr(e), probe=self.exchange.probe)
+            logger.error(f"{self.name} API Error: {e!r}")
+            return None
+        health.record(self.name, True, rounds[-1], probe=self.exchange.probe)
+        return result
+
+    async def _request(self, endpoint: str, params: Dict = None, raw: bool = False, rounds: List[float] = None):
+        """
+        Raises the last error once retries are exhausted. Each attempt's round
+        trip is appended to `rounds`, if given (see Transport.request).
+        """
+        url = f"{self.exchange.base_url}{endpoint}"
+        weight = self.exchange.endpoint_weights.get(endpoint, 1)
+        limit = self.exchange.rate_limit if config.RATE_LIMIT else None
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            # The bucket is file-locked and may wait, so keep it off the loop
+            if limit is not None and not await loop.run_in_executor(
+                    None, rate_limiter.acquire, self.name, weight, limit):
+                raise RateLimitExceeded(f"no rate limit budget for {url} within {config.RATE_LIMIT_MAX_WAIT}s")
+            started = time.perf_counter()
+            status = retry_after = None
+            try:
+                async with self.session.get(url, params=params) as resp:
+                    body = await resp.read()
+                    status = resp.status
+                    seconds = time.perf_counter() - started
+                    if rounds is not None:
+                        rounds.append(seconds)
+                    transport.record(self.name, seconds, resp.content_length or len(body),
+                                     len(body), ok=status < 400, status=status)
+                    retry_after = Transport.retry_after(resp.headers.get('Retry-After'))
+                    if limit is not None:
+                        remaining = self.exchange._remaining_weight(resp.headers)
+                        blocked = (retry_after or config.HTTP_BACKOFF_MAX) if status in (418, 429) else None
+                        if remaining is not None or blocked is not None:
+                            await loop.run_in_executor(None, rate_limiter.observe, self.name, limit, remaining, blocked)
+                    if status not in RETRY_STATUSES or attempt >= config.HTTP_RETRIES:
+                        resp.raise_for_status()
+                        text = body.decode(resp.charset or 'utf-8')
+                        return text if raw else json.loads(text)
+                    error = f"{status} for {url}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                seconds = time.perf_counter() - started
+                if rounds is not None:
+                    rounds.append(seconds)
+                transport.record(self.name, seconds, 0, 0, ok=False)
+                if attempt >= config.HTTP_RETRIES:
+                    raise
+                error = repr(e)
+
+            attempt += 1
+            # With a limit, the 418/429 block is waited out in acquire()
+            delay = 0.0 if limit is not None and status in (418, 429) else Transport.backoff(attempt, retry_after)
+            transport.record_retry(self.name)
+            logger.warning(f"[{self.name}] Request failed ({error}), retry {attempt}/{config.HTTP_RETRIES} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def fetch_symbols(self) -> List[Dict]:
+        endpoint, params = self.exchange.symbols_endpoint
+        return self.exchange._parse_symbols(await self._get(endpoint, params=params))
+
+    async def fetch_tickers(self) -> Dict[str, Dict]:
+        from book_stream import book_streams
+        book = book_streams.snapshot(self.name)
+        if book is not None:
+            return book
+        return await self.fetch_rest_tickers()
+
+    async def fetch_rest_tickers(self) -> Dict[str, Dict]:
+        endpoint, params = self.exchange.tickers_endpoint
+        text = await self._get(endpoint, params=params, raw=True)
+        if not text: return {}
+        return self.exchange._decode_tickers(text)
+
+class AsyncClient:
+    def __init__(self):
+        self._loop = None
+        self._session = None
+        # name -> Exchange adapter (only used for its endpoints and parsers)
+        self._exchanges: Dict[str, Exchange] = {}
+        # (name, method) -> in-flight fetch task, shared by concurrent callers
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="exchange-io", daemon=True).start()
+            self._loop = loop
+
+    async def session(self) -> aiohttp.ClientSession:
+        # Created on the loop thread, which is the only one touching it
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=config.ASYNC_POOL_SIZE, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=config.REQUEST_TIMEOUT)
+            )
+        return self._session
+
+    def _exchange(self, name: str) -> Exchange:
+        if name not in self._exchanges:
+            self._exchanges[name] = get_exchange(name)
+        return self._exchanges[name]
+
+    async def _fetch_all(self, names: List[str], method: str) -> Dict:
+        session = await self.session()
+        clients = [AsyncExchange(self._exchange(name), session) for name in names if self._exchange(name)]
+        results = await asyncio.gather(*(self._fetch(client, method) for client in clients), return_exceptions=True)
+
+        fetched = {}
+        for client, result in zip(clients, results):
+            if isinstance(result, Exception):
+                logger.error(f"[{client.name}] Async {method} failed: {result!r}")
+            elif result:
+                fetched[client.name] = result
+        return fetched
+
+    def _fetch(self, client: AsyncExchange, method: str) -> asyncio.Future:
+        """
+        One fetch per exchange and method at a time: concurrent scans await the same task.
+        """
+        key = (client.name, method)
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = self._inflight[key] = asyncio.ensure_future(getattr(client, method)())
+            task.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+        # Shielded, so one caller's timeout does not cancel the others' fetch
+        return asyncio.shield(task)
+
+    def run(self, coro, timeout: float = None):
+        """
+        Run a coroutine on the client's loop and wait for its result (from any thread but the loop's).
+        """
+        self._start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def spawn(self, coro) -> 'concurrent.futures.Future':
+        """
+        Schedule a long-running coroutine on the client's loop without waiting for it.
+        """
+        self._start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def fetch_tickers(self, names: List[str]) -> Dict[str, Dict]:
+        """
+        All-tickers snapshots of the given exchanges, downloaded concurrently.
+        Exchanges whose fetch failed are left out.
+        """
+        return self.run(self._fetch_all(names, 'fetch_tickers'))
+
+    def fetch_symbols(self, names: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Symbol universes of the given exchanges, downloaded concurrently.
+        Exchanges whose fetch failed are left out.
+        """
+        return self.run(self._fetch_all(names, 'fetch_symbols'))
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._session is not None:
+            self.run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self._session = None
+
+# Shared by every scan in this process
+async_client = AsyncClient()
@@ -1,15 +1,293 @@
 """
 Base Exchange Interface.
+
+Adapters declare their public REST endpoints and parse the responses;
+the fetch itself is shared, so the same adapter serves the blocking
+fetch_symbols/fetch_tickers below and the asyncio client (exchanges/aio.py).
+Adapters with a book-ticker WebSocket feed also describe its protocol
+(stream_* / _stream_* below), which book_stream.py drives.
+
+All blocking HTTP goes through the process-wide Transport: one pooled
+keep-alive session per exchange (shared by every adapter instance, so
+get_exchange per scan costs no new TLS handshakes), compressed
+responses, bounded retries with jittered backoff, and per-exchange
+request timing and byte counts. Requests are also metered against the
+venue's published request-weight budget (see rate_limit.py), and a
+venue that keeps failing is skipped by its circuit breaker (see health.py).
 """
+import os
+import time
+import random
+import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Iterable, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+import config
+from ticker_book import TickerBook
+from .rate_limit import rate_limiter, RateLimitExceeded
+from .health import health
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying (rate limited / transient server errors)
+RETRY_STATUSES = (418, 429, 500, 502, 503, 504)
+
+class Transport:
+    def __init__(self):
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def session(self, exchange: str) -> requests.Session:
+        """
+        Long-lived pooled session of an exchange.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: never share the parent's sockets
+                self._sessions = {}
+                self._stats = {}
+                self._pid = os.getpid()
+            session = self._sessions.get(exchange)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.HTTP_POOL_SIZE, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['Accept-Encoding'] = 'gzip, deflate'
+                self._sessions[exchange] = session
+            return session
+
+    @staticmethod
+    def backoff(attempt: int, retry_after: float = None) -> float:
+        """
+        Seconds to wait before retry `attempt` (1-based): full-jitter exponential
+        backoff, or the server's Retry-After when it sent one (both capped).
+        """
+        if retry_after is not None:
+            return min(retry_after, config.HTTP_BACKOFF_MAX)
+        return random.uniform(0, min(config.HTTP_BACKOFF_MAX, config.HTTP_BACKOFF * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(value) -> Optional[float]:
+        """
+        Seconds of a Retry-After header (None if absent or not a number).
+        """
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def get(self, exchange: str, url: str, params: Dict = None, weight: float = 1,
+            limit: Tuple[float, float] = None, remaining: Callable[[Dict], Optional[float]] = None) -> requests.Response:
+        """
+        GET a URL (see request).
+        """
+        return self.request('GET', exchange, url, params, weight, limit, remaining)
+
+    def request(self, method: str, exchange: str, url: str, params: Dict = None, weight: float = 1,
+                limit: Tuple[float, float] = None, remaining: Callable[[Dict], Optional[float]] = None,
+                rounds: List[float] = None) -> requests.Response:
+        """
+        HTTP request with up to HTTP_RETRIES retries on connection errors, timeouts
+        and retryable statuses. Raises the last error once retries are exhausted.
+
+        With a limit ((capacity, window), see rate_limit.py) every attempt first
+        takes `weight` from the exchange's token bucket (RateLimitExceeded if
+        it cannot), and every response corrects the bucket: remaining(headers)
+        is the venue's own count, and 418/429 block it for their Retry-After.
+
+        Each attempt's round trip in seconds (without rate limit waits and
+        backoff sleeps) is appended to `rounds`, if given.
+        """
+        session = self.session(exchange)
+        attempt = 0
+        while True:
+            if limit is not None and not rate_limiter.acquire(exchange, weight, limit):
+                raise RateLimitExceeded(f"no rate limit budget for {url} within {config.RATE_LIMIT_MAX_WAIT}s")
+            started = time.perf_counter()
+            status = retry_after = None
+            try:
+                resp = session.request(method, url, params=params, timeout=config.REQUEST_TIMEOUT)
+                # Wire bytes (compressed) are read by the time .content returns
+                body = resp.content
+                status = resp.status_code
+                seconds = time.perf_counter() - started
+                if rounds is not None:
+                    rounds.append(seconds)
+                self.record(exchange, seconds, resp.raw.tell() or len(body), len(body), ok=resp.ok, status=status)
+                retry_after = self.retry_after(resp.headers.get('Retry-After'))
+                if limit is not None:
+                    rate_limiter.observe(exchange, limit, remaining(resp.headers) if remaining else None,
+                                         (retry_after or config.HTTP_BACKOFF_MAX) if status in (418, 429) else None)
+                if status not in RETRY_STATUSES or attempt >= config.HTTP_RETRIES:
+                    resp.raise_for_status()
+                    return resp
+                error = requests.HTTPError(f"{status} for {resp.url}", response=resp)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                seconds = time.perf_counter() - started
+                if rounds is not None:
+                    rounds.append(seconds)
+                self.record(exchange, seconds, 0, 0, ok=False)
+                if attempt >= config.HTTP_RETRIES:
+                    raise
+                error = e
+
+            attempt += 1
+            # With a limit, the 418/429 block is waited out in acquire()
+            delay = 0.0 if limit is not None and status in (418, 429) else self.backoff(attempt, retry_after)
+            self.record_retry(exchange)
+            logger.warning(f"[{exchange}] Request failed ({error}), retry {attempt}/{config.HTTP_RETRIES} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def record(self, exchange: str, seconds: float, wire_bytes: int, body_bytes: int, ok: bool = True, status: int = None):
+        """
+        Account one request (also used by the asyncio client).
+        """
+        with self._lock:
+            stats = self._entry(exchange)
+            stats['requests'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['seconds'] += seconds
+            stats['wire_bytes'] += wire_bytes
+            stats['body_bytes'] += body_bytes
+            stats['last_seconds'] = seconds
+            stats['last_status'] = status
+
+    def record_decode(self, exchange: str, seconds: float, decoder: str):
+        """
+        Account one all-tickers decode (see TickerBook.decode).
+        """
+        with self._lock:
+            stats = self._entry(exchange)
+            stats['decodes'] += 1
+            stats['decode_seconds'] += seconds
+            stats['last_decode_seconds'] = seconds
+            stats['last_decoder'] = decoder
+
+    def _entry(self, exchange: str) -> Dict:
+        """
+        Stats of an exchange, created on first use (caller holds the lock).
+        """
+        return self._stats.setdefault(exchange, {
+            'requests': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0,
+            'wire_bytes': 0, 'body_bytes': 0, 'last_seconds': None, 'last_status': None,
+            'decodes': 0, 'decode_seconds': 0.0, 'last_decode_seconds': None, 'last_decoder': None
+        })
+
+    def record_retry(self, exchange: str):
+        with self._lock:
+            if exchange in self._stats:
+                self._stats[exchange]['retries'] += 1
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Per-exchange request counts, errors, retries, time and bytes (wire vs decoded),
+        and the time spent decoding ticker responses (projected or JSON).
+        """
+        with self._lock:
+            return {
+                name: dict(stats, avg_seconds=stats['seconds'] / stats['requests'] if stats['requests'] else None)
+                for name, stats in self._stats.items()
+            }
+
+# Shared by every adapter in this process
+transport = Transport()
 
 class Exchange(ABC):
+    # Public REST endpoints as (path, query params or None)
+    symbols_endpoint = None
+    tickers_endpoint = None
+    # TickerBook projection of the tickers response: (column, venue key) pairs in wire order
+    ticker_symbol_key = 'symbol'
+    ticker_fields = ()
+
+    # Request-weight budget per IP as (weight, window seconds), and the weight of
+    # each endpoint (default 1), as published by the venue
+    rate_limit = (1200, 60.0)
+    endpoint_weights: Dict[str, float] = {}
+    # Cheap endpoint the circuit breaker probes while the venue is failing
+    # (None = the tickers endpoint)
+    probe_endpoint = None
+
+    # Book-ticker WebSocket feed (None = no streaming for this venue, unless it
+    # hands out the URL from stream_token_endpoint)
+    stream_url = None
+    # REST endpoint POSTed for a per-connection stream URL and token (see _stream_endpoint)
+    stream_token_endpoint = None
+    # Symbols per connection (None = one connection for everything)
+    stream_batch = None
+    # Application-level keepalive message and its interval in seconds (None = none needed)
+    stream_ping = None
+    stream_ping_interval = 20.0
+
     def __init__(self, name: str, base_url: str):
         self.name = name
         self.base_url = base_url
 
-    @abstractmethod
+    @property
+    def session(self) -> requests.Session:
+        """
+        This exchange's pooled session (see Transport).
+        """
+        return transport.session(self.name)
+
+    def _get(self, endpoint: str, params: Dict = None, raw: bool = False):
+        """
+        GET a public endpoint: decoded JSON, or the response text with raw=True.
+        Returns None on any error, or at once while the exchange's circuit breaker is open.
+        """
+        if not health.allow(self.name):
+            return None
+        key = (self.name, self.base_url, endpoint, tuple(sorted((params or {}).items())), raw)
+        return rate_limiter.coalesce(key, lambda: self._request(endpoint, params, raw))
+
+    def _request(self, endpoint: str, params: Dict = None, raw: bool = False, method: str = 'GET'):
+        # The breaker judges the venue by its last round trip, not by our rate limit waits or backoff
+        rounds = []
+        try:
+            resp = transport.request(method, self.name, f"{self.base_url}{endpoint}", params=params,
+                                     weight=self.endpoint_weights.get(endpoint, 1),
+                                     limit=self.rate_limit if config.RATE_LIMIT else None,
+                                     remaining=self._remaining_weight, rounds=rounds)
+            result = resp.text if raw else resp.json()
+        except RateLimitExceeded as e:
+            # Our own budget, not the venue's health
+            logger.error(f"{self.name} API Error: {e}")
+            return None
+        except Exception as e:
+            health.record(self.name, False, rounds[-1] if rounds else 0.0, repr(e), probe=self.probe)
+            logger.error(f"{self.name} API Error: {e}")
+            return None
+        health.record(self.name, True, rounds[-1], probe=self.probe)
+        return result
+
+    def probe(self) -> bool:
+        """
+        One request to probe_endpoint (or the tickers endpoint), bypassing the
+        circuit breaker. Returns whether the venue answered.
+        """
+        endpoint, params = self.probe_endpoint or self.tickers_endpoint
+        try:
+            transport.get(self.name, f"{self.base_url}{endpoint}", params=params,
+                          weight=self.endpoint_weights.get(endpoint, 1),
+                          limit=self.rate_limit if config.RATE_LIMIT else None,
+                          remaining=self._remaining_weight)
+            return True
+        except Exception as e:
+            logger.info(f"[{self.name}] Probe failed: {e}")
+            return False
+
+    def _remaining_weight(self, headers: Dict) -> Optional[float]:
+        """
+        The venue's own count of the weight left in the current window, from
+        response headers (None if it does not report one).
+        """
+        return None
+
     def fetch_symbols(self) -> List[Dict]:
         """
         Fetch active spot trading pairs.
@@ -25,19 +303,79 @@ class Exchange(ABC):
             'filters': dict
         }
         """
-        pass
+        endpoint, params = self.symbols_endpoint
+        return self._parse_symbols(self._get(endpoint, params=params))
 
-    @abstractmethod
     def fetch_tickers(self) -> Dict[str, Dict]:
         """
         Fetch current bid/ask prices.
-        Returns dict:
+        Returns dict (or a TickerBook, which reads the same):
         {
             'SYMBOL': {'bid': float, 'ask': float, 'bidQty': float, 'askQty': float}
         }
+        Served from the live WebSocket book when this process streams the venue.
+        """
+        from book_stream import book_streams
+        book = book_streams.snapshot(self.name)
+        if book is not None:
+            return book
+        return self.fetch_rest_tickers()
+
+    def fetch_rest_tickers(self) -> Dict[str, Dict]:
+        """
+        fetch_tickers from the REST all-tickers endpoint.
+        """
+        endpoint, params = self.tickers_endpoint
+        text = self._get(endpoint, params=params, raw=True)
+        if not text: return {}
+        return self._decode_tickers(text)
+
+    def _decode_tickers(self, text: str) -> TickerBook:
+        """
+        Projected TickerBook decode of a tickers response (see ticker_book.py).
+        """
+        book = TickerBook.decode(self.name, text, self.ticker_symbol_key, self.ticker_fields, self._parse_tickers)
+        transport.record_decode(self.name, book.decode_seconds, book.decoder)
+        return book
+
+    @abstractmethod
+    def _parse_symbols(self, data) -> List[Dict]:
+        """
+        Symbol list (see fetch_symbols) from the decoded symbols response.
         """
         pass
 
+    @abstractmethod
+    def _parse_tickers(self, data) -> Dict[str, Dict]:
+        """
+        Ticker dict (see fetch_tickers) from the decoded tickers response.
+        """
+        pass
+
+    def _stream_endpoint(self) -> str:
+        """
+        URL to connect a stream to (venues handing out per-connection tokens override this).
+        """
+        return self.stream_url
+
+    def _stream_subscribe(self, symbols: List[str]) -> List[Dict]:
+        """
+        Messages subscribing one connection to the book tickers of `symbols`.
+        """
+        raise NotImplementedError(f"{self.name} has no book-ticker stream")
+
+    def _parse_stream(self, message: Dict) -> Iterable[Tuple[str, Optional[float], Optional[float], Optional[float], Optional[float]]]:
+        """
+        (symbol, bid, bidQty, ask, askQty) updates in a stream message (None = unchanged).
+        """
+        return ()
+
+    def _stream_reply(self, message: Dict) -> Optional[Dict]:
+        """
+        Reply the venue expects to a stream message (e.g. an application-level pong), or None.
+        """
+        return None
+
     def safe_float(self, value, default=0.0):
         if value is None: return default
         try:
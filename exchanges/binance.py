@@ -1,30 +1,30 @@
 """
 Binance Exchange Implementation.
 """
-import requests
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from .base import Exchange
 
 logger = logging.getLogger(__name__)
 
 class BinanceExchange(Exchange):
+    symbols_endpoint = ("/api/v3/exchangeInfo", None)
+    tickers_endpoint = ("/api/v3/ticker/bookTicker", None)
+    probe_endpoint = ("/api/v3/ping", None)
+    rate_limit = (6000, 60.0)
+    endpoint_weights = {"/api/v3/exchangeInfo": 20, "/api/v3/ticker/bookTicker": 4}
+    ticker_fields = (('bid', 'bidPrice'), ('bidQty', 'bidQty'), ('ask', 'askPrice'), ('askQty', 'askQty'))
+    stream_url = "wss://stream.binance.com:9443/ws"
+    stream_batch = 200 # Binance allows up to 1024 streams per connection
+
     def __init__(self):
         super().__init__('Binance', 'https://api.binance.com')
-        self.session = requests.Session()
 
-    def _get(self, endpoint: str):
-        try:
-            url = f"{self.base_url}{endpoint}"
-            resp = self.session.get(url, timeout=10)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            logger.error(f"Binance API Error: {e}")
-            return None
+    def _remaining_weight(self, headers) -> Optional[float]:
+        used = headers.get('X-MBX-USED-WEIGHT-1M')
+        return self.rate_limit[0] - float(used) if used is not None else None
 
-    def fetch_symbols(self) -> List[Dict]:
-        data = self._get("/api/v3/exchangeInfo")
+    def _parse_symbols(self, data) -> List[Dict]:
         if not data: return []
         
         symbols = []
@@ -62,8 +62,10 @@ class BinanceExchange(Exchange):
                 })
         return symbols
 
-    def fetch_tickers(self) -> Dict[str, Dict]:
-        data = self._get("/api/v3/ticker/bookTicker")
+    def _parse_tickers(self, data) -> Dict[str, Dict]:
+        """
+        JSON fallback of fetch_tickers.
+        """
         if not data: return {}
         
         tickers = {}
@@ -75,3 +77,12 @@ class BinanceExchange(Exchange):
                 'askQty': self.safe_float(t.get('askQty'), 0.0)
             }
         return tickers
+
+    def _stream_subscribe(self, symbols: List[str]) -> List[Dict]:
+        return [{"method": "SUBSCRIBE", "params": [f"{s.lower()}@bookTicker" for s in symbols], "id": 1}]
+
+    def _parse_stream(self, message: Dict):
+        # {"u": 400900217, "s": "BNBUSDT", "b": "25.35", "B": "31.21", "a": "25.36", "A": "40.66"}
+        if 's' in message and 'b' in message:
+            yield (message['s'], self.safe_float(message['b']), self.safe_float(message.get('B')),
+                   self.safe_float(message.get('a')), self.safe_float(message.get('A')))
@@ -1,7 +1,6 @@
 """
 Bybit Exchange Implementation.
 """
-import requests
 import logging
 from typing import List, Dict
 from .base import Exchange
@@ -9,9 +8,17 @@ from .base import Exchange
 logger = logging.getLogger(__name__)
 
 class BybitExchange(Exchange):
+    symbols_endpoint = ("/v5/market/instruments-info", {'category': 'spot'})
+    tickers_endpoint = ("/v5/market/tickers", {'category': 'spot'})
+    probe_endpoint = ("/v5/market/time", None)
+    rate_limit = (600, 5.0) # Requests per IP
+    ticker_fields = (('bid', 'bid1Price'), ('bidQty', 'bid1Size'), ('ask', 'ask1Price'), ('askQty', 'ask1Size'))
+    stream_url = "wss://stream-testnet.bybit.com/v5/public/spot" # Same network as base_url
+    stream_batch = 100
+    stream_ping = {"op": "ping"}
+
     def __init__(self, api_key=None, api_secret=None):
         super().__init__('Bybit', 'https://api-testnet.bybit.com') # Default to Testnet for safety as per request
-        self.session = requests.Session()
         self.api_key = api_key
         self.api_secret = api_secret
         
@@ -83,26 +90,8 @@ class BybitExchange(Exchange):
             logger.error(f"Bybit Order Error: {e}")
             return False
 
-    def _get(self, endpoint: str, params: Dict = None):
-        try:
-             # Hack: Switch base URL to mainnet for data fetching if needed, 
-             # but user asked for Testnet trading. 
-             # Ideally validation scans mainnet and trades testnet? 
-             # Actually, if price data is from mainnet but you trade on testnet, 
-             # arbitrage will likely fail (different prices).
-             # We should probably use Testnet for EVERYTHING if mode is Testnet.
-             # I'll stick to the base_url set in __init__.
-            url = f"{self.base_url}{endpoint}"
-            resp = self.session.get(url, params=params, timeout=10)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            logger.error(f"Bybit API Error: {e}")
-            return None
-
-    def fetch_symbols(self) -> List[Dict]:
+    def _parse_symbols(self, data) -> List[Dict]:
         # Bybit V5
-        data = self._get("/v5/market/instruments-info", params={'category': 'spot'})
         if not data or data.get('retCode') != 0: return []
         
         symbols = []
@@ -126,8 +115,10 @@ class BybitExchange(Exchange):
                 })
         return symbols
 
-    def fetch_tickers(self) -> Dict[str, Dict]:
-        data = self._get("/v5/market/tickers", params={'category': 'spot'})
+    def _parse_tickers(self, data) -> Dict[str, Dict]:
+        """
+        JSON fallback of fetch_tickers.
+        """
         if not data or data.get('retCode') != 0: return {}
         
         tickers = {}
@@ -139,3 +130,22 @@ class BybitExchange(Exchange):
                 'askQty': float(t.get('ask1Size', 0))
             }
         return tickers
+
+    def _stream_subscribe(self, symbols: List[str]) -> List[Dict]:
+        # Spot accepts at most 10 topics per subscribe request
+        topics = [f"orderbook.1.{s}" for s in symbols]
+        return [{"op": "subscribe", "args": topics[i:i + 10]} for i in range(0, len(topics), 10)]
+
+    def _parse_stream(self, message: Dict):
+        # {"topic": "orderbook.1.BTCUSDT", "type": "snapshot", "data": {"s": "BTCUSDT", "b": [["price", "size"]], "a": [...]}}
+        data = message.get('data')
+        if not data or not str(message.get('topic', '')).startswith('orderbook.1.'):
+            return
+        bid = data.get('b') or [[None, None]]
+        ask = data.get('a') or [[None, None]]
+        # An empty side in a delta means that side did not change
+        yield (data['s'],
+               None if bid[0][0] is None else self.safe_float(bid[0][0]),
+               None if bid[0][1] is None else self.safe_float(bid[0][1]),
+               None if ask[0][0] is None else self.safe_float(ask[0][0]),
+               None if ask[0][1] is None else self.safe_float(ask[0][1]))
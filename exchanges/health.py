@@ -0,0 +1,198 @@
+"""
+Exchange Health Module.
+Per-exchange request health and a circuit breaker for failing venues.
+
+Every logical request (after the transport's retries) is recorded with its
+outcome and latency. After HEALTH_FAILURE_THRESHOLD consecutive failures
+(a success slower than HEALTH_SLOW_SECONDS counts as one) the exchange's
+breaker opens: its requests return None at once and scans skip it, instead
+of waiting out REQUEST_TIMEOUT every time. A background thread then probes
+the venue (half-open) every HEALTH_PROBE_INTERVAL seconds, doubling up to
+HEALTH_PROBE_INTERVAL_MAX; the first successful probe closes the breaker.
+The probe is the only way back to closed: while half-open, regular
+requests are still refused, so a struggling venue sees one probe at a time
+rather than a burst of scan traffic.
+
+State is per process. Worker processes hand their outcomes back to the
+parent with their results (drain / replay).
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class _Breaker:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0 # consecutive
+        self.requests = 0
+        self.errors = 0
+        self.latency = None # exponential moving average, seconds
+        self.last_error = None
+        self.opened_at = None
+        self.probe_interval = 0.0
+        self.next_probe = 0.0
+        self.probe: Optional[Callable[[], bool]] = None
+        # (pid, ok, seconds, error) not yet handed to the parent process; the pid
+        # tells a worker's own outcomes from those it inherited when forked
+        self.outcomes = deque(maxlen=100)
+
+class HealthTracker:
+    def __init__(self):
+        self._breakers: Dict[str, _Breaker] = {}
+        self._lock = threading.Lock()
+        self._prober = None
+
+    def _breaker(self, exchange: str) -> _Breaker:
+        breaker = self._breakers.get(exchange)
+        if breaker is None:
+            breaker = self._breakers[exchange] = _Breaker()
+        return breaker
+
+    def allow(self, exchange: str) -> bool:
+        """
+        Whether requests to the exchange should be made (its breaker is closed;
+        half-open only lets the background probe through).
+        """
+        if not config.CIRCUIT_BREAKER:
+            return True
+        breaker = self._breakers.get(exchange)
+        return breaker is None or breaker.state == CLOSED
+
+    def record(self, exchange: str, ok: bool, seconds: float, error: str = None,
+               probe: Callable[[], bool] = None, buffer: bool = True):
+        """
+        Record one request's outcome. probe is a cheap blocking health check of
+        the venue, used to test it in the background while the breaker is open.
+        """
+        if ok and seconds > config.HEALTH_SLOW_SECONDS:
+            ok, error = False, f"slow response ({seconds:.1f}s)"
+        with self._lock:
+            breaker = self._breaker(exchange)
+            if probe is not None:
+                breaker.probe = probe
+            if buffer:
+                breaker.outcomes.append((os.getpid(), ok, seconds, error))
+            breaker.requests += 1
+            breaker.latency = seconds if breaker.latency is None else 0.8 * breaker.latency + 0.2 * seconds
+            if ok:
+                breaker.failures = 0
+                return
+            breaker.errors += 1
+            breaker.failures += 1
+            breaker.last_error = error
+            if breaker.state != CLOSED or breaker.failures < config.HEALTH_FAILURE_THRESHOLD:
+                return
+            self._open(exchange, breaker, config.HEALTH_PROBE_INTERVAL)
+        self._start_prober()
+
+    def _open(self, exchange: str, breaker: _Breaker, interval: float):
+        """
+        Open the breaker until the next probe in `interval` seconds (caller holds the lock).
+        """
+        if breaker.state == CLOSED:
+            breaker.opened_at = time.time()
+        breaker.state = OPEN
+        breaker.probe_interval = min(interval, config.HEALTH_PROBE_INTERVAL_MAX)
+        breaker.next_probe = time.time() + breaker.probe_interval
+        logger.warning(f"[{exchange}] Circuit breaker open after {breaker.failures} failures "
+                       f"({breaker.last_error}), probing in {breaker.probe_interval:.0f}s.")
+
+    def _start_prober(self):
+        with self._lock:
+            if self._prober is not None and self._prober.is_alive():
+                return
+            self._prober = threading.Thread(target=self._probe_loop, name="exchange-health", daemon=True)
+            self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(1.0)
+            now = time.time()
+            with self._lock:
+                due = [(name, breaker) for name, breaker in self._breakers.items()
+                       if breaker.state == OPEN and breaker.next_probe <= now]
+                for name, breaker in due:
+                    breaker.state = HALF_OPEN
+            # Each on its own thread, so one hanging venue does not delay the others' probes
+            for name, breaker in due:
+                threading.Thread(target=self._probe, args=(name, breaker), daemon=True).start()
+
+    def _probe(self, exchange: str, breaker: _Breaker):
+        started = time.perf_counter()
+        error = None
+        try:
+            ok = breaker.probe is not None and bool(breaker.probe())
+        except Exception as e:
+            error = repr(e)
+            ok = False
+        seconds = time.perf_counter() - started
+        ok = ok and seconds <= config.HEALTH_SLOW_SECONDS
+
+        with self._lock:
+            if error is not None:
+                breaker.last_error = error
+            if ok:
+                breaker.state = CLOSED
+                breaker.failures = 0
+                breaker.opened_at = None
+                logger.info(f"[{exchange}] Probe succeeded in {seconds:.2f}s, circuit breaker closed.")
+            else:
+                breaker.failures += 1
+                self._open(exchange, breaker, breaker.probe_interval * 2)
+
+    def drain(self, exchange: str) -> List[tuple]:
+        """
+        Outcomes recorded for the exchange since the last drain (for the parent process).
+        """
+        with self._lock:
+            breaker = self._breakers.get(exchange)
+            if breaker is None:
+                return []
+            pid = os.getpid()
+            outcomes = [outcome[1:] for outcome in breaker.outcomes if outcome[0] == pid]
+            breaker.outcomes.clear()
+        return outcomes
+
+    def replay(self, exchange: str, outcomes: List[tuple], probe: Callable[[], bool] = None):
+        """
+        Record outcomes drained in another process.
+        """
+        for ok, seconds, error in outcomes:
+            self.record(exchange, ok, seconds, error, probe=probe, buffer=False)
+
+    def status(self, exchanges: List[str] = None) -> Dict[str, Dict]:
+        """
+        Breaker state, consecutive failures, latency and error counts per exchange
+        (only those with recorded requests, or the given ones).
+        """
+        now = time.time()
+        with self._lock:
+            names = list(self._breakers) if exchanges is None else exchanges
+            result = {}
+            for name in names:
+                breaker = self._breakers.get(name) or _Breaker()
+                result[name] = {
+                    'state': breaker.state,
+                    'failures': breaker.failures,
+                    'requests': breaker.requests,
+                    'errors': breaker.errors,
+                    'latency': breaker.latency,
+                    'last_error': breaker.last_error,
+                    'open_for': now - breaker.opened_at if breaker.opened_at else None,
+                    'next_probe_in': max(0.0, breaker.next_probe - now) if breaker.state == OPEN else None
+                }
+        return result
+
+# Shared by every adapter in this process
+health = HealthTracker()
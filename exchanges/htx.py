@@ -1,7 +1,6 @@
 """
 HTX (Huobi) Exchange Implementation.
 """
-import requests
 import logging
 from typing import List, Dict
 from .base import Exchange
@@ -9,22 +8,18 @@ from .base import Exchange
 logger = logging.getLogger(__name__)
 
 class HTXExchange(Exchange):
+    symbols_endpoint = ("/v1/common/symbols", None)
+    tickers_endpoint = ("/market/tickers", None)
+    probe_endpoint = ("/v1/common/timestamp", None)
+    rate_limit = (100, 10.0) # Public market data requests per IP
+    ticker_fields = (('bid', 'bid'), ('bidQty', 'bidSize'), ('ask', 'ask'), ('askQty', 'askSize'))
+    stream_url = "wss://api.htx.com/ws" # Messages are gzip-compressed
+    stream_batch = 100
+
     def __init__(self):
         super().__init__('HTX', 'https://api.htx.com')
-        self.session = requests.Session()
-
-    def _get(self, endpoint: str):
-        try:
-            url = f"{self.base_url}{endpoint}"
-            resp = self.session.get(url, timeout=10)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            logger.error(f"HTX API Error: {e}")
-            return None
-
-    def fetch_symbols(self) -> List[Dict]:
-        data = self._get("/v1/common/symbols")
+
+    def _parse_symbols(self, data) -> List[Dict]:
         if not data or data.get('status') != 'ok': return []
         
         symbols = []
@@ -44,8 +39,10 @@ class HTXExchange(Exchange):
                 })
         return symbols
 
-    def fetch_tickers(self) -> Dict[str, Dict]:
-        data = self._get("/market/tickers")
+    def _parse_tickers(self, data) -> Dict[str, Dict]:
+        """
+        JSON fallback of fetch_tickers.
+        """
         if not data or data.get('status') != 'ok': return {}
         
         tickers = {}
@@ -59,3 +56,19 @@ class HTXExchange(Exchange):
                 'askQty': float(t.get('askSize', 0))
             }
         return tickers
+
+    def _stream_subscribe(self, symbols: List[str]) -> List[Dict]:
+        return [{"sub": f"market.{s.lower()}.bbo", "id": s} for s in symbols]
+
+    def _parse_stream(self, message: Dict):
+        # {"ch": "market.btcusdt.bbo", "tick": {"symbol": "btcusdt", "bid": .., "bidSize": .., "ask": .., "askSize": ..}}
+        tick = message.get('tick')
+        if tick and str(message.get('ch', '')).endswith('.bbo'):
+            yield (tick['symbol'], self.safe_float(tick.get('bid')), self.safe_float(tick.get('bidSize')),
+                   self.safe_float(tick.get('ask')), self.safe_float(tick.get('askSize')))
+
+    def _stream_reply(self, message: Dict):
+        # Server heartbeat {"ping": ts} must be answered with {"pong": ts}
+        if 'ping' in message:
+            return {"pong": message['ping']}
+        return None
@@ -1,31 +1,35 @@
 """
 KuCoin Exchange Implementation.
 """
-import requests
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from .base import Exchange
+from .health import health
 
 logger = logging.getLogger(__name__)
 
 class KuCoinExchange(Exchange):
+    symbols_endpoint = ("/api/v1/symbols", None)
+    tickers_endpoint = ("/api/v1/market/allTickers", None)
+    probe_endpoint = ("/api/v1/timestamp", None)
+    # Public pool per IP; the endpoint weights are KuCoin's own
+    rate_limit = (2000, 30.0)
+    endpoint_weights = {"/api/v1/symbols": 4, "/api/v1/market/allTickers": 15, "/api/v1/bullet-public": 10}
+    ticker_fields = (('bid', 'buy'), ('ask', 'sell'))
+    # One topic streams every symbol's best bid/ask. The WebSocket URL comes with a token
+    # from this REST endpoint (see _stream_endpoint)
+    stream_token_endpoint = "/api/v1/bullet-public"
+    stream_ping = {"id": "ping", "type": "ping"}
+    stream_ping_interval = 18.0
+
     def __init__(self):
         super().__init__('KuCoin', 'https://api.kucoin.com')
-        self.session = requests.Session()
 
-    def _get(self, endpoint: str):
-        try:
-            url = f"{self.base_url}{endpoint}"
-            # KuCoin sometimes needs headers
-            resp = self.session.get(url, timeout=10)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            logger.error(f"KuCoin API Error: {e}")
-            return None
+    def _remaining_weight(self, headers) -> Optional[float]:
+        remaining = headers.get('gw-ratelimit-remaining')
+        return float(remaining) if remaining is not None else None
 
-    def fetch_symbols(self) -> List[Dict]:
-        data = self._get("/api/v1/symbols")
+    def _parse_symbols(self, data) -> List[Dict]:
         if not data or data.get('code') != '200000': return []
         
         symbols = []
@@ -51,8 +55,10 @@ class KuCoinExchange(Exchange):
                 })
         return symbols
 
-    def fetch_tickers(self) -> Dict[str, Dict]:
-        data = self._get("/api/v1/market/allTickers")
+    def _parse_tickers(self, data) -> Dict[str, Dict]:
+        """
+        JSON fallback of fetch_tickers.
+        """
         if not data or data.get('code') != '200000': return {}
         
         tickers = {}
@@ -66,3 +72,27 @@ class KuCoinExchange(Exchange):
                 'askQty': 0
              }
         return tickers
+
+    def _stream_endpoint(self) -> str:
+        # Through the shared transport (retries, rate limit, accounting, circuit breaker);
+        # never coalesced, every connection needs its own token
+        if not health.allow(self.name):
+            return None
+        data = self._request(self.stream_token_endpoint, method='POST')
+        try:
+            data = data['data']
+            return f"{data['instanceServers'][0]['endpoint']}?token={data['token']}"
+        except (KeyError, IndexError, TypeError) as e:
+            if data is not None:
+                logger.error(f"KuCoin API Error: unexpected stream token response ({e!r})")
+            return None
+
+    def _stream_subscribe(self, symbols: List[str]) -> List[Dict]:
+        return [{"id": 1, "type": "subscribe", "topic": "/market/ticker:all", "response": True}]
+
+    def _parse_stream(self, message: Dict):
+        # {"type": "message", "topic": "/market/ticker:all", "subject": "BTC-USDT", "data": {"bestBid": .., "bestBidSize": .., ...}}
+        data = message.get('data')
+        if data and message.get('topic') == '/market/ticker:all':
+            yield (message['subject'], self.safe_float(data.get('bestBid')), self.safe_float(data.get('bestBidSize')),
+                   self.safe_float(data.get('bestAsk')), self.safe_float(data.get('bestAskSize')))
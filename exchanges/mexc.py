@@ -1,7 +1,6 @@
 """
 MEXC Exchange Implementation.
 """
-import requests
 import logging
 from typing import List, Dict
 from .base import Exchange
@@ -9,22 +8,20 @@ from .base import Exchange
 logger = logging.getLogger(__name__)
 
 class MexcExchange(Exchange):
+    symbols_endpoint = ("/api/v3/exchangeInfo", None)
+    tickers_endpoint = ("/api/v3/ticker/bookTicker", None)
+    probe_endpoint = ("/api/v3/ping", None)
+    rate_limit = (500, 10.0)
+    endpoint_weights = {"/api/v3/exchangeInfo": 10, "/api/v3/ticker/bookTicker": 1}
+    ticker_fields = (('bid', 'bidPrice'), ('bidQty', 'bidQty'), ('ask', 'askPrice'), ('askQty', 'askQty'))
+    stream_url = "wss://wbs.mexc.com/ws"
+    stream_batch = 30 # MEXC allows 30 subscriptions per connection
+    stream_ping = {"method": "PING"}
+
     def __init__(self):
         super().__init__('MEXC', 'https://api.mexc.com')
-        self.session = requests.Session()
-
-    def _get(self, endpoint: str):
-        try:
-            url = f"{self.base_url}{endpoint}"
-            resp = self.session.get(url, timeout=10)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            logger.error(f"MEXC API Error: {e}")
-            return None
 
-    def fetch_symbols(self) -> List[Dict]:
-        data = self._get("/api/v3/exchangeInfo")
+    def _parse_symbols(self, data) -> List[Dict]:
         if not data: return []
         
         symbols = []
@@ -58,8 +55,10 @@ class MexcExchange(Exchange):
                 })
         return symbols
 
-    def fetch_tickers(self) -> Dict[str, Dict]:
-        data = self._get("/api/v3/ticker/bookTicker")
+    def _parse_tickers(self, data) -> Dict[str, Dict]:
+        """
+        JSON fallback of fetch_tickers.
+        """
         if not data: return {}
         
         tickers = {}
@@ -71,3 +70,13 @@ class MexcExchange(Exchange):
                 'askQty': self.safe_float(t.get('askQty'), 0.0)
             }
         return tickers
+
+    def _stream_subscribe(self, symbols: List[str]) -> List[Dict]:
+        return [{"method": "SUBSCRIPTION", "params": [f"spot@public.bookTicker.v3.api@{s}" for s in symbols]}]
+
+    def _parse_stream(self, message: Dict):
+        # {"c": "spot@public.bookTicker.v3.api@BTCUSDT", "d": {"A": "..", "B": "..", "a": "..", "b": ".."}, "s": "BTCUSDT", "t": ...}
+        data = message.get('d')
+        if data and str(message.get('c', '')).startswith('spot@public.bookTicker'):
+            yield (message['s'], self.safe_float(data.get('b')), self.safe_float(data.get('B')),
+                   self.safe_float(data.get('a')), self.safe_float(data.get('A')))
@@ -0,0 +1,188 @@
+"""
+Rate Limit Module.
+Weight-aware token buckets per exchange, shared by every process on the host.
+
+Each exchange has a budget of `capacity` request weight per `window`
+seconds (its adapter's rate_limit, scaled by RATE_LIMIT_SAFETY) and each
+endpoint a weight (adapter endpoint_weights, default 1). The bucket lives
+in ratelimit_<exchange>.state under a FileLock, so the Flask workers, the
+AutoTrader and scan processes all draw from the same budget the venue
+counts per IP. Requests wait for tokens (queue) up to RATE_LIMIT_MAX_WAIT;
+responses that report the venue's own count (e.g. X-MBX-USED-WEIGHT-1M)
+correct the bucket, and a 429/418 blocks it for its Retry-After.
+
+Identical concurrent GETs in one process are coalesced into one request.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Tuple
+import config
+from file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+class RateLimitExceeded(Exception):
+    pass
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.finished = None
+
+class RateLimiter:
+    def __init__(self, directory: str = '.'):
+        self.directory = directory
+        # exchange -> (capacity, window) as last used, for headroom()
+        self._limits: Dict[str, Tuple[float, float]] = {}
+        # coalescing key -> _Flight (in flight, or finished within the reuse window)
+        self._flights: Dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def path(self, exchange: str) -> str:
+        return os.path.join(self.directory, f"ratelimit_{exchange}.state")
+
+    @staticmethod
+    def _budget(limit: Tuple[float, float]) -> Tuple[float, float]:
+        """
+        (capacity, refill per second) of a (capacity, window) limit after the safety margin.
+        """
+        capacity = limit[0] * config.RATE_LIMIT_SAFETY
+        return capacity, capacity / limit[1]
+
+    def _read(self, exchange: str, limit: Tuple[float, float], now: float) -> list:
+        """
+        [tokens, blocked_until] refilled up to now (caller holds the lock).
+        """
+        capacity, rate = self._budget(limit)
+        try:
+            with open(self.path(exchange), 'r') as f:
+                tokens, updated, blocked_until = (float(v) for v in f.read().split())
+        except (OSError, ValueError):
+            return [capacity, 0.0]
+        return [min(capacity, tokens + max(0.0, now - updated) * rate), blocked_until]
+
+    def _write(self, exchange: str, state: list, now: float):
+        with open(self.path(exchange), 'w') as f:
+            f.write(f"{state[0]} {now} {state[1]}")
+
+    def acquire(self, exchange: str, weight: float, limit: Tuple[float, float], max_wait: float = None) -> bool:
+        """
+        Take `weight` tokens, waiting for the bucket to refill (or a block to
+        expire) for up to max_wait seconds (default RATE_LIMIT_MAX_WAIT).
+        Returns False if the budget is not there in time.
+        """
+        if max_wait is None:
+            max_wait = config.RATE_LIMIT_MAX_WAIT
+        with self._lock:
+            self._limits[exchange] = limit
+        capacity, rate = self._budget(limit)
+        weight = min(weight, capacity)
+        deadline = time.time() + max_wait
+
+        while True:
+            with FileLock(self.path(exchange) + '.lock', timeout=max(0.0, deadline - time.time())) as locked:
+                if not locked:
+                    return False
+                now = time.time()
+                state = self._read(exchange, limit, now)
+                if state[1] > now:
+                    wait = state[1] - now
+                elif state[0] >= weight:
+                    state[0] -= weight
+                    self._write(exchange, state, now)
+                    return True
+                else:
+                    wait = (weight - state[0]) / rate
+
+            if time.time() + wait > deadline:
+                return False
+            logger.info(f"[{exchange}] Rate limit: waiting {wait:.2f}s for {weight:g} weight.")
+            time.sleep(wait)
+
+    def observe(self, exchange: str, limit: Tuple[float, float], remaining: float = None, retry_after: float = None):
+        """
+        Correct the bucket from a response: the venue's remaining budget for
+        this window (when it reports one) and/or a Retry-After block.
+        """
+        if remaining is None and retry_after is None:
+            return
+        with FileLock(self.path(exchange) + '.lock', timeout=1.0) as locked:
+            if not locked:
+                return
+            now = time.time()
+            state = self._read(exchange, limit, now)
+            if remaining is not None:
+                # Our safety margin applies to the venue's count as well
+                state[0] = min(state[0], max(0.0, remaining - limit[0] * (1 - config.RATE_LIMIT_SAFETY)))
+            if retry_after is not None:
+                state[1] = max(state[1], now + retry_after)
+                logger.warning(f"[{exchange}] Rate limited by the venue, blocking requests for {retry_after:.1f}s.")
+            self._write(exchange, state, now)
+
+    def headroom(self, exchange: str = None) -> Dict[str, Dict]:
+        """
+        Current budget of each exchange this process has used (or just one):
+        tokens left, capacity, share free and seconds still blocked.
+        """
+        now = time.time()
+        result = {}
+        with self._lock:
+            limits = list(self._limits.items())
+        for name, limit in limits:
+            if exchange is not None and name != exchange:
+                continue
+            with FileLock(self.path(name) + '.lock', timeout=1.0) as locked:
+                if not locked:
+                    continue
+                tokens, blocked_until = self._read(name, limit, now)
+            capacity, rate = self._budget(limit)
+            result[name] = {
+                'tokens': tokens,
+                'capacity': capacity,
+                'free': tokens / capacity if capacity else 0.0,
+                'refill_per_second': rate,
+                'blocked_for': max(0.0, blocked_until - now)
+            }
+        return result
+
+    def coalesce(self, key: tuple, fetch: Callable[[], object]):
+        """
+        Run fetch() once for concurrent callers with the same key; a successful
+        result is also reused for RATE_LIMIT_COALESCE_WINDOW seconds.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.finished is not None and (
+                    flight.result is None or time.monotonic() - flight.finished > config.RATE_LIMIT_COALESCE_WINDOW):
+                flight = None
+            owner = flight is None
+            if owner:
+                self._evict(time.monotonic())
+                flight = self._flights[key] = _Flight()
+
+        if not owner:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = fetch()
+        finally:
+            flight.finished = time.monotonic()
+            flight.done.set()
+        return flight.result
+
+    def _evict(self, now: float):
+        """
+        Drop finished flights past the reuse window (caller holds the lock).
+        """
+        expired = [key for key, flight in self._flights.items() if flight.finished is not None and (
+            flight.result is None or now - flight.finished > config.RATE_LIMIT_COALESCE_WINDOW)]
+        for key in expired:
+            del self._flights[key]
+
+# Shared by every adapter in this process
+rate_limiter = RateLimiter()
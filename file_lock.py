@@ -0,0 +1,83 @@
+"""
+File Lock Module.
+Advisory cross-process lock on a lock file.
+
+Uses fcntl.flock where available. Elsewhere (Windows) it falls back to an
+exclusively created lock file, which is broken once it is older than
+stale_after seconds so a crashed holder cannot block everyone forever.
+"""
+
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class FileLock:
+    def __init__(self, path: str, timeout: float = 10.0, poll: float = 0.05, stale_after: float = 120.0):
+        self.path = path
+        self.timeout = timeout
+        self.poll = poll
+        self.stale_after = stale_after
+        self._fd = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """
+        Try to take the lock for up to `timeout` seconds (0 = a single attempt).
+        Returns whether it was acquired.
+        """
+        deadline = time.time() + self.timeout
+        while True:
+            if self._try_acquire():
+                return True
+            if time.time() >= deadline:
+                return False
+            time.sleep(self.poll)
+
+    def _try_acquire(self) -> bool:
+        if fcntl is not None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            self._fd = fd
+            return True
+
+        try:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                    os.remove(self.path)
+            except OSError:
+                pass
+            return False
+
+    def release(self):
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        else:
+            os.close(fd)
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -3,9 +3,68 @@ Filters Module.
 Selects the best arbitrage opportunities based on profitability and other criteria.
 """
 
-from typing import List, Dict
+import heapq
+import datetime
+from typing import List, Dict, Tuple, Any, Optional
 import config
 
+class OpportunityCollector:
+    """
+    Bounded collection of raw search results.
+
+    Keeps every candidate that passes MIN_PROFIT_PERCENT plus the TOP_K best
+    overall, which is all that OpportunityFilter.filter and
+    get_top_opportunities can return. Candidates are stored unformatted
+    (end amount + caller payload) so the search never builds strings or
+    leg dicts for cycles that get discarded.
+    """
+    def __init__(self, limit: int = None):
+        self.limit = config.TOP_K if limit is None else limit
+        self._seq = 0
+        # Candidates passing the threshold: (seq, end_amount, payload)
+        self._passing = []
+        # Min-heap of the `limit` best candidates: (end_amount, -seq, payload).
+        # On equal amounts the later candidate is evicted first, like a stable sort.
+        self._top = []
+
+    @staticmethod
+    def passes_threshold(end_amount: float) -> bool:
+        # Same rounding as _record_opportunity, so the decision matches filter()
+        profit_percent = round((end_amount - config.START_AMOUNT) / config.START_AMOUNT * 100, 4)
+        return profit_percent >= config.MIN_PROFIT_PERCENT
+
+    def offer(self, end_amount: float, payload: Any):
+        seq = self._seq
+        self._seq += 1
+
+        if self.passes_threshold(end_amount):
+            self._passing.append((seq, end_amount, payload))
+
+        if len(self._top) < self.limit:
+            heapq.heappush(self._top, (end_amount, -seq, payload))
+        elif end_amount > self._top[0][0]:
+            heapq.heapreplace(self._top, (end_amount, -seq, payload))
+
+    def kth_best(self) -> Optional[float]:
+        """
+        End amount of the current K-th best candidate, or None while fewer than K were offered.
+        """
+        if self.limit <= 0 or len(self._top) < self.limit:
+            return None
+        return self._top[0][0]
+
+    def survivors(self) -> List[Tuple[float, Any]]:
+        """
+        (end_amount, payload) of every kept candidate, in the order they were offered.
+        """
+        kept = {seq: (end_amount, payload) for seq, end_amount, payload in self._passing}
+        for end_amount, neg_seq, payload in self._top:
+            kept[-neg_seq] = (end_amount, payload)
+        return [kept[seq] for seq in sorted(kept)]
+
+    def __len__(self):
+        return self._seq
+
 class OpportunityFilter:
     @staticmethod
     def filter(opportunities: List[Dict]) -> List[Dict]:
@@ -13,12 +72,12 @@ class OpportunityFilter:
         Filter and sort opportunities.
         """
         valid_ops = []
+        timestamp = datetime.datetime.now().isoformat()
         for op in opportunities:
             # 1. Profit Threshold
             if op['profit_percent'] >= config.MIN_PROFIT_PERCENT:
                 # 2. Add timestamp (ISO-8601) - usually done at creation but can be here
-                import datetime
-                op['timestamp'] = datetime.datetime.now().isoformat()
+                op['timestamp'] = timestamp
                 
                 # Remove internal raw data if present, to match strict output
                 if 'raw_path' in op:
@@ -43,15 +102,14 @@ class OpportunityFilter:
         """
         Return top N opportunities by profit, regardless of threshold.
         """
-        # Sort all by profit desc
-        sorted_ops = sorted(opportunities, key=lambda x: x['profit'], reverse=True)
+        # Top N by profit desc (same order as a full stable sort, without sorting everything)
+        top_ops = heapq.nlargest(limit, opportunities, key=lambda x: x['profit'])
         
         # Add metadata if missing (like timestamp)
-        import datetime
         timestamp = datetime.datetime.now().isoformat()
         
         results = []
-        for op in sorted_ops[:limit]:
+        for op in top_ops:
             # Clean up
             if 'raw_path' in op:
                 del op['raw_path'] # We verified we didn't lose fees_str as it is top level
@@ -3,11 +3,21 @@ Graph Module.
 Builds the market graph from validated market data.
 """
 
+from collections.abc import Mapping
 from typing import List, Dict
+import numpy as np
 
 class MarketGraph:
     def __init__(self):
         self.adj = {}
+        self.edges = {}
+        # symbol -> (base, quote, fee) of every pair the graph knows,
+        # including pairs currently without edges (no valid quote)
+        self.pairs = {}
+        # Bumped whenever edges are added or removed or fees change
+        self.version = 0
+        # MarketSnapshot the prices were last set from (None after build() from records)
+        self.snapshot = None
 
     def build(self, valid_pairs: List[Dict]):
         """
@@ -15,7 +25,11 @@ class MarketGraph:
         
         Uses 'fee_taker' from the pair data for edges.
         """
+        self.version += 1
+        self.snapshot = None
         self.adj = {}
+        self.edges = {}
+        self.pairs = {}
 
         for p in valid_pairs:
             try:
@@ -36,30 +50,493 @@ class MarketGraph:
             base = base.upper()
             quote = quote.upper()
 
-            if base not in self.adj: self.adj[base] = []
-            if quote not in self.adj: self.adj[quote] = []
+            self.pairs[symbol] = (base, quote, fee)
+            self._add_edges(symbol, base, quote, fee, bid, ask)
 
-            # Edge 1: Quote -> Base (BUY at ASK)
-            # You have Quote, want Base.
+    def build_snapshot(self, snapshot):
+        """
+        Construct the graph straight from a MarketSnapshot (market_data.py),
+        with the same edges, in the same order, as build() on its records.
+        """
+        self.version += 1
+        self.snapshot = snapshot
+        self.adj = {}
+        self.edges = {}
+        self.pairs = {}
+
+        coins = snapshot.coins
+        for symbol, base_id, quote_id, fee, bid, ask in zip(
+                snapshot.symbols, snapshot.base_ids.tolist(), snapshot.quote_ids.tolist(),
+                snapshot.fee_taker.tolist(), snapshot.bid.tolist(), snapshot.ask.tolist()):
+            base = coins[base_id]
+            quote = coins[quote_id]
+            self.pairs[symbol] = (base, quote, fee)
+            self._add_edges(symbol, base, quote, fee, bid, ask)
+
+    def _add_edges(self, symbol: str, base: str, quote: str, fee: float, bid: float, ask: float):
+        self.version += 1
+        if base not in self.adj: self.adj[base] = []
+        if quote not in self.adj: self.adj[quote] = []
+
+        # Edge 1: Quote -> Base (BUY at ASK)
+        # You have Quote, want Base.
+        if ask > 0:
+            edge = {
+                'from': quote,
+                'to': base,
+                'symbol': symbol,
+                'action': 'BUY',
+                'price': ask,
+                'fee': fee
+            }
+            self.adj[quote].append(edge)
+            self.edges[(symbol, 'BUY')] = edge
+
+        # Edge 2: Base -> Quote (SELL at BID)
+        # You have Base, want Quote.
+        if bid > 0:
+            edge = {
+                'from': base,
+                'to': quote,
+                'symbol': symbol,
+                'action': 'SELL',
+                'price': bid,
+                'fee': fee
+            }
+            self.adj[base].append(edge)
+            self.edges[(symbol, 'SELL')] = edge
+
+    def track_pairs(self, symbols: List[Dict]):
+        """
+        Remember pairs of the symbol universe that had no valid quote at build
+        time, so update_prices can add their edges once they get one.
+        """
+        for p in symbols:
+            if p['symbol'] not in self.pairs:
+                self.pairs[p['symbol']] = (p['base'].upper(), p['quote'].upper(), p.get('fee_taker', 0.001))
+
+    def update_prices(self, snapshot) -> Dict[str, int]:
+        """
+        Overwrite bid/ask on the existing edges in place from a MarketSnapshot.
+
+        Edges are only added or removed when a pair loses its quote (it is
+        not in the snapshot) or gets one back, as MarketData would include
+        or drop it. Returns counts of 'updated', 'added' and 'removed' pairs.
+        """
+        stats = {'updated': 0, 'added': 0, 'removed': 0}
+        quotes = snapshot.quotes()
+        for symbol, (base, quote, fee) in self.pairs.items():
+            bid, ask = quotes.get(symbol, (0.0, 0.0))
+            buy = self.edges.get((symbol, 'BUY'))
+            sell = self.edges.get((symbol, 'SELL'))
+
+            if bid > 0 and ask > 0:
+                if buy is None and sell is None:
+                    self._add_edges(symbol, base, quote, fee, bid, ask)
+                    stats['added'] += 1
+                    continue
+                if (buy is not None and buy['price'] != ask) or (sell is not None and sell['price'] != bid):
+                    stats['updated'] += 1
+                if buy is not None: buy['price'] = ask
+                if sell is not None: sell['price'] = bid
+            elif buy is not None or sell is not None:
+                self.version += 1
+                for edge in (buy, sell):
+                    if edge is not None:
+                        self.adj[edge['from']].remove(edge)
+                        del self.edges[(symbol, edge['action'])]
+                stats['removed'] += 1
+        self.snapshot = snapshot
+        return stats
+
+    def _drop_edges(self, symbol: str):
+        self.version += 1
+        for action in ('BUY', 'SELL'):
+            edge = self.edges.pop((symbol, action), None)
+            if edge is not None:
+                self.adj[edge['from']].remove(edge)
+
+    def apply_diff(self, diff, snapshot) -> Dict[str, int]:
+        """
+        Patch the graph with a symbol universe diff (universe_diff.py), then
+        update prices from the snapshot. Only edges of the diff's pairs are
+        touched: delisted pairs lose theirs, fee changes are written to the
+        existing edges, and re-based or new pairs get edges once quoted.
+        Returns update_prices' counts plus 'listed', 'delisted' and 'changed'.
+        """
+        for p in diff.removed:
+            self._drop_edges(p['symbol'])
+            self.pairs.pop(p['symbol'], None)
+
+        for p in diff.changed:
+            symbol = p['symbol']
+            fee = p.get('fee_taker', 0.001)
+            if 'base' in p['changes'] or 'quote' in p['changes']:
+                self._drop_edges(symbol)
+            for action in ('BUY', 'SELL'):
+                edge = self.edges.get((symbol, action))
+                if edge is not None:
+                    edge['fee'] = fee
+            self.pairs[symbol] = (p['base'].upper(), p['quote'].upper(), fee)
+
+        for p in diff.added:
+            self.pairs[p['symbol']] = (p['base'].upper(), p['quote'].upper(), p.get('fee_taker', 0.001))
+
+        self.version += 1
+        stats = self.update_prices(snapshot)
+        stats.update({'listed': len(diff.added), 'delisted': len(diff.removed), 'changed': len(diff.changed)})
+        return stats
+
+    def get_neighbors(self, coin: str) -> List[Dict]:
+        return self.adj.get(coin, [])
+
+    def get_edge(self, symbol: str, action: str) -> Dict:
+        """
+        Look up the edge for a symbol traded in one direction ('BUY' or 'SELL').
+        """
+        return self.edges.get((symbol, action))
+
+    def topology_key(self) -> frozenset:
+        """
+        Hashable description of the graph shape (edges without prices).
+        Two graphs with the same key admit exactly the same trading paths.
+        """
+        return frozenset((e['symbol'], e['action'], e['from'], e['to']) for e in self.edges.values())
+
+
+class CompactGraph:
+    """
+    Array-backed (CSR) market graph.
+
+    Coins are integer ids. The outgoing edges of coin i occupy slots
+    offsets[i] .. offsets[i + 1] - 1 of the parallel edge arrays
+    (targets, price, fee, is_buy), in the same order as MarketGraph.adj.
+    Edge dicts are only created on demand by the compatibility views
+    (get_neighbors, get_edge, adj, edges), so search code can use plain
+    index loops while the rest of the pipeline keeps working unchanged.
+    """
+    def __init__(self):
+        self.coins: List[str] = []
+        self.coin_id: Dict[str, int] = {}
+        self.offsets = np.zeros(1, dtype=np.int32)
+        self.sources = np.zeros(0, dtype=np.int32)
+        self.targets = np.zeros(0, dtype=np.int32)
+        self.price = np.zeros(0)
+        self.fee = np.zeros(0)
+        self.is_buy = np.zeros(0, dtype=bool)
+        self.symbols: List[str] = []
+        # symbol -> (base, quote, fee), as MarketGraph.pairs
+        self.pairs = {}
+        # O(1) symbol -> edge slot map: symbol_slots[symbol_id[symbol]] = (BUY slot, SELL slot), -1 if absent
+        self.symbol_id: Dict[str, int] = {}
+        self.symbol_slots = np.full((0, 2), -1, dtype=np.int32)
+        # See MarketGraph.version and MarketGraph.snapshot
+        self.version = 0
+        self.snapshot = None
+
+    def build(self, valid_pairs: List[Dict]):
+        """
+        Construct the graph with the same rules as MarketGraph.build.
+        """
+        self.pairs = {}
+        self.snapshot = None
+        self._index(valid_pairs)
+
+    def _index(self, valid_pairs: List[Dict]):
+        self.coins = []
+        self.coin_id = {}
+        # Per-edge rows, grouped by source coin afterwards
+        rows = []
+
+        for p in valid_pairs:
+            try:
+                base = p['base']
+                quote = p['quote']
+                symbol = p['symbol']
+            except KeyError as e:
+                print(f"ERROR in Graph Build: Missing key {e} in pair: {p}")
+                continue
+
+            fee = p.get('fee_taker', 0.001)
+            bid = p['bid']
+            ask = p['ask']
+
+            self.pairs[symbol] = (base.upper(), quote.upper(), fee)
+            base_id = self._coin(base.upper())
+            quote_id = self._coin(quote.upper())
+
+            # Quote -> Base (BUY at ASK), Base -> Quote (SELL at BID)
             if ask > 0:
-                self.adj[quote].append({
-                    'to': base,
-                    'symbol': symbol,
-                    'action': 'BUY',
-                    'price': ask,
-                    'fee': fee
-                })
-
-            # Edge 2: Base -> Quote (SELL at BID)
-            # You have Base, want Quote.
+                rows.append((quote_id, base_id, symbol, True, ask, fee))
             if bid > 0:
-                self.adj[base].append({
-                    'to': quote,
-                    'symbol': symbol,
-                    'action': 'SELL',
-                    'price': bid,
-                    'fee': fee
-                })
-    
+                rows.append((base_id, quote_id, symbol, False, bid, fee))
+
+        self._load(rows)
+
+    @classmethod
+    def from_graph(cls, graph: MarketGraph) -> 'CompactGraph':
+        """
+        Convert a dict-based MarketGraph (same coin and edge order).
+        """
+        compact = cls()
+        compact.pairs = dict(graph.pairs)
+        rows = []
+        for coin in graph.adj:
+            compact._coin(coin)
+        for coin, edges in graph.adj.items():
+            for e in edges:
+                rows.append((compact.coin_id[coin], compact.coin_id[e['to']], e['symbol'],
+                             e['action'] == 'BUY', e['price'], e['fee']))
+        compact._load(rows)
+        return compact
+
+    def _coin(self, coin: str) -> int:
+        coin_id = self.coin_id.get(coin)
+        if coin_id is None:
+            coin_id = len(self.coins)
+            self.coin_id[coin] = coin_id
+            self.coins.append(coin)
+        return coin_id
+
+    def build_snapshot(self, snapshot):
+        """
+        Construct the graph from a MarketSnapshot with array operations only
+        (same coin and edge order as build() on the snapshot's records).
+        """
+        n = len(snapshot)
+        self.snapshot = snapshot
+        self.pairs = {
+            symbol: (snapshot.coins[b], snapshot.coins[q], fee)
+            for symbol, b, q, fee in zip(snapshot.symbols, snapshot.base_ids.tolist(),
+                                         snapshot.quote_ids.tolist(), snapshot.fee_taker.tolist())
+        }
+
+        # Local coin ids in order of first appearance (base, quote, base, ...)
+        seen = np.column_stack([snapshot.base_ids, snapshot.quote_ids]).ravel()
+        unique, first = np.unique(seen, return_index=True)
+        order = np.argsort(first, kind='stable')
+        local = np.empty(len(unique), dtype=np.int32)
+        local[order] = np.arange(len(unique), dtype=np.int32)
+        self.coins = [snapshot.coins[c] for c in unique[order].tolist()]
+        self.coin_id = {coin: i for i, coin in enumerate(self.coins)}
+        base = local[np.searchsorted(unique, snapshot.base_ids)] if n else np.zeros(0, dtype=np.int32)
+        quote = local[np.searchsorted(unique, snapshot.quote_ids)] if n else np.zeros(0, dtype=np.int32)
+
+        # Per pair: BUY (quote -> base at ask), then SELL (base -> quote at bid)
+        self._load_columns(
+            np.column_stack([quote, base]).ravel(),
+            np.column_stack([base, quote]).ravel(),
+            [symbol for symbol in snapshot.symbols for _ in range(2)],
+            np.tile([True, False], n),
+            np.column_stack([snapshot.ask, snapshot.bid]).ravel(),
+            np.repeat(snapshot.fee_taker, 2)
+        )
+
+    def _load(self, rows: List[tuple]):
+        n = len(rows)
+        self._load_columns(
+            np.fromiter((r[0] for r in rows), dtype=np.int32, count=n),
+            np.fromiter((r[1] for r in rows), dtype=np.int32, count=n),
+            [r[2] for r in rows],
+            np.fromiter((r[3] for r in rows), dtype=bool, count=n),
+            np.fromiter((r[4] for r in rows), dtype=np.float64, count=n),
+            np.fromiter((r[5] for r in rows), dtype=np.float64, count=n)
+        )
+
+    def _load_columns(self, sources: np.ndarray, targets: np.ndarray, symbols: List[str],
+                      is_buy: np.ndarray, price: np.ndarray, fee: np.ndarray):
+        self.version += 1
+        # Stable sort keeps each coin's edges in insertion order
+        order = np.argsort(sources, kind='stable')
+        self.sources = sources[order].astype(np.int32)
+        self.targets = targets[order].astype(np.int32)
+        self.symbols = [symbols[i] for i in order.tolist()]
+        self.is_buy = is_buy[order].astype(bool)
+        self.price = price[order].astype(np.float64)
+        self.fee = fee[order].astype(np.float64)
+
+        counts = np.bincount(self.sources, minlength=len(self.coins))
+        self.offsets = np.zeros(len(self.coins) + 1, dtype=np.int32)
+        np.cumsum(counts, out=self.offsets[1:])
+
+        self.symbol_id = {}
+        pair_slots = []
+        for slot, (symbol, is_buy) in enumerate(zip(self.symbols, self.is_buy.tolist())):
+            sid = self.symbol_id.get(symbol)
+            if sid is None:
+                sid = self.symbol_id[symbol] = len(pair_slots)
+                pair_slots.append([-1, -1])
+            pair_slots[sid][0 if is_buy else 1] = slot
+        self.symbol_slots = np.array(pair_slots, dtype=np.int32).reshape(-1, 2)
+
+    def slot_of(self, symbol: str, action: str) -> int:
+        """
+        Edge slot for a symbol traded in one direction, or -1.
+        """
+        sid = self.symbol_id.get(symbol)
+        if sid is None:
+            return -1
+        return int(self.symbol_slots[sid, 0 if action == 'BUY' else 1])
+
+    def track_pairs(self, symbols: List[Dict]):
+        """
+        See MarketGraph.track_pairs.
+        """
+        for p in symbols:
+            if p['symbol'] not in self.pairs:
+                self.pairs[p['symbol']] = (p['base'].upper(), p['quote'].upper(), p.get('fee_taker', 0.001))
+
+    def update_prices(self, snapshot, relayout: bool = False) -> Dict[str, int]:
+        """
+        Overwrite prices in the edge arrays from a MarketSnapshot, through the symbol -> slot map.
+        The CSR layout is only rebuilt when a pair loses or regains its quote (or relayout is set).
+        Returns counts of 'updated', 'added' and 'removed' pairs.
+        """
+        stats = {'updated': 0, 'added': 0, 'removed': 0}
+        quoted = []
+        quotes = snapshot.quotes()
+        for symbol, (base, quote, fee) in self.pairs.items():
+            bid, ask = quotes.get(symbol, (0.0, 0.0))
+            valid = bid > 0 and ask > 0
+            if valid:
+                quoted.append({'symbol': symbol, 'base': base, 'quote': quote,
+                               'fee_taker': fee, 'bid': bid, 'ask': ask})
+
+            sid = self.symbol_id.get(symbol)
+            active = sid is not None and bool((self.symbol_slots[sid] >= 0).any())
+            if valid and active:
+                buy, sell = self.symbol_slots[sid].tolist()
+                if (buy >= 0 and self.price[buy] != ask) or (sell >= 0 and self.price[sell] != bid):
+                    stats['updated'] += 1
+                if buy >= 0: self.price[buy] = ask
+                if sell >= 0: self.price[sell] = bid
+            elif valid:
+                stats['added'] += 1
+            elif active:
+                stats['removed'] += 1
+
+        if relayout or stats['added'] or stats['removed']:
+            # Topology changed: re-lay the arrays (pairs metadata is kept)
+            self._index(quoted)
+        self.snapshot = snapshot
+        return stats
+
+    def apply_diff(self, diff, snapshot) -> Dict[str, int]:
+        """
+        See MarketGraph.apply_diff. Fee-only changes are written into the fee
+        array in place; listings, delistings and re-based pairs re-lay the arrays once.
+        """
+        relayout = False
+        for p in diff.removed:
+            if self.pairs.pop(p['symbol'], None) is not None:
+                relayout = relayout or self.slot_of(p['symbol'], 'BUY') >= 0 or self.slot_of(p['symbol'], 'SELL') >= 0
+
+        for p in diff.changed:
+            symbol = p['symbol']
+            fee = p.get('fee_taker', 0.001)
+            self.pairs[symbol] = (p['base'].upper(), p['quote'].upper(), fee)
+            if 'base' in p['changes'] or 'quote' in p['changes']:
+                relayout = True
+            for action in ('BUY', 'SELL'):
+                slot = self.slot_of(symbol, action)
+                if slot >= 0:
+                    self.fee[slot] = fee
+
+        for p in diff.added:
+            self.pairs[p['symbol']] = (p['base'].upper(), p['quote'].upper(), p.get('fee_taker', 0.001))
+
+        self.version += 1
+        stats = self.update_prices(snapshot, relayout=relayout)
+        stats.update({'listed': len(diff.added), 'delisted': len(diff.removed), 'changed': len(diff.changed)})
+        return stats
+
+    def rates(self) -> np.ndarray:
+        """
+        Amount received per unit sent on each edge slot, after fees.
+        """
+        return np.where(self.is_buy, 1.0 / self.price, self.price) * (1.0 - self.fee)
+
+    # --- Compatibility views (dict edges, as MarketGraph) ---
+
+    def edge_view(self, slot: int) -> Dict:
+        return {
+            'from': self.coins[self.sources[slot]],
+            'to': self.coins[self.targets[slot]],
+            'symbol': self.symbols[slot],
+            'action': 'BUY' if self.is_buy[slot] else 'SELL',
+            'price': float(self.price[slot]),
+            'fee': float(self.fee[slot])
+        }
+
     def get_neighbors(self, coin: str) -> List[Dict]:
-        return self.adj.get(coin, [])
+        coin_id = self.coin_id.get(coin)
+        if coin_id is None:
+            return []
+        return [self.edge_view(slot) for slot in range(self.offsets[coin_id], self.offsets[coin_id + 1])]
+
+    def get_edge(self, symbol: str, action: str) -> Dict:
+        slot = self.slot_of(symbol, action)
+        return None if slot < 0 else self.edge_view(slot)
+
+    @property
+    def adj(self) -> Mapping:
+        return _AdjacencyView(self)
+
+    @property
+    def edges(self) -> Mapping:
+        return _EdgeView(self)
+
+    def topology_key(self) -> frozenset:
+        return frozenset(
+            (symbol, 'BUY' if is_buy else 'SELL', self.coins[src], self.coins[dst])
+            for symbol, is_buy, src, dst in zip(self.symbols, self.is_buy.tolist(),
+                                                self.sources.tolist(), self.targets.tolist())
+        )
+
+class _AdjacencyView(Mapping):
+    """
+    Read-only {coin: [edge dicts]} view of a CompactGraph.
+    """
+    def __init__(self, graph: CompactGraph):
+        self._graph = graph
+
+    def __getitem__(self, coin):
+        if coin not in self._graph.coin_id:
+            raise KeyError(coin)
+        return self._graph.get_neighbors(coin)
+
+    def __contains__(self, coin):
+        return coin in self._graph.coin_id
+
+    def __iter__(self):
+        return iter(self._graph.coins)
+
+    def __len__(self):
+        return len(self._graph.coins)
+
+class _EdgeView(Mapping):
+    """
+    Read-only {(symbol, action): edge dict} view of a CompactGraph.
+    """
+    def __init__(self, graph: CompactGraph):
+        self._graph = graph
+
+    def __getitem__(self, key):
+        slot = self._graph.slot_of(*key)
+        if slot < 0:
+            raise KeyError(key)
+        return self._graph.edge_view(slot)
+
+    def __contains__(self, key):
+        return self._graph.slot_of(*key) >= 0
+
+    def __iter__(self):
+        slots = self._graph.symbol_slots
+        for symbol, sid in self._graph.symbol_id.items():
+            if slots[sid, 0] >= 0:
+                yield (symbol, 'BUY')
+            if slots[sid, 1] >= 0:
+                yield (symbol, 'SELL')
+
+    def __len__(self):
+        return int((self._graph.symbol_slots >= 0).sum())
@@ -0,0 +1,309 @@
+"""
+Graph Pruning Module.
+Strips coins and edges that cannot be part of any stablecoin cycle before the search.
+
+Two structural stages, repeated until nothing changes:
+  - degree:    coins that cannot be entered and left through different
+               neighbours (a 2-core reduction on the directed graph)
+  - reach:     edges not on any closed walk of at most MAX_DEPTH trades
+               through a stablecoin
+They only remove edges no search could use, so results are unchanged, and
+they depend on the topology alone: a live pruned graph is re-pruned only
+when its source's topology changes, and otherwise updated in place (see
+GraphPruner.update and main.get_pruned_graph).
+
+On top of that, a liquidity floor hides edges whose top-of-book notional
+is under MIN_EDGE_NOTIONAL (a filter, off by default). Sizes change every
+scan, so it is a mask over the structural core, re-applied in place.
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import config
+from graph import MarketGraph, CompactGraph
+
+class _PruneState:
+    """
+    What GraphPruner.update needs to refresh a pruned graph in place.
+    """
+    def __init__(self, core, masked: frozenset, stats: Dict[str, int]):
+        # Structurally pruned graph before the liquidity mask (the pruned graph
+        # itself while nothing is masked and no floor is set)
+        self.core = core
+        self.masked = masked
+        self.stats = stats
+
+class GraphPruner:
+    @staticmethod
+    def settings(reachability: bool = True) -> tuple:
+        """
+        The config a structural pruning depends on (a cached one is stale once these change).
+        """
+        return (config.MAX_DEPTH, config.MIN_TRADES, tuple(config.STABLECOINS),
+                config.MIN_EDGE_NOTIONAL is not None, reachability)
+
+    @staticmethod
+    def prune(graph, snapshot=None, reachability: bool = True) -> Tuple[object, Dict[str, int]]:
+        """
+        Return (pruned graph, stats). The input graph is left untouched (it may be
+        a live graph updated in place between scans); the pruned graph is of the
+        same class and keeps its edge order, so searches visit paths in the same order.
+
+        snapshot is the MarketSnapshot the graph was built from (top-of-book
+        sizes for the liquidity floor); reachability=False skips the MAX_DEPTH
+        stage (for searches that ignore MAX_DEPTH).
+        """
+        edges = GraphPruner._edge_rows(graph)
+        alive = {(e[2], e[3]) for e in edges}
+
+        stats = {
+            'coins_before': len(graph.adj),
+            'edges_before': len(edges),
+            'liquidity': 0,
+            'degree': 0,
+            'reach': 0
+        }
+
+        while True:
+            stats['degree'] += GraphPruner._prune_degree(edges, alive)
+            removed = GraphPruner._prune_reach(edges, alive) if reachability else 0
+            stats['reach'] += removed
+            if not removed:
+                break
+
+        core = GraphPruner._select(graph, alive)
+        if config.MIN_EDGE_NOTIONAL is None:
+            pruned = core
+        else:
+            # The core is kept unmasked, so edges can come back when their sizes do
+            pruned = GraphPruner._select(core, alive)
+        pruned.prune_state = _PruneState(core, frozenset(), stats)
+        # Its prices are the source's, copied or shared
+        pruned.snapshot = graph.snapshot
+        return pruned, GraphPruner.update(pruned, snapshot, prices=False)
+
+    @staticmethod
+    def update(pruned, snapshot, prices: bool = True) -> Dict[str, int]:
+        """
+        Refresh a pruned graph in place from a new snapshot of its unchanged
+        source: re-apply the liquidity mask (edges are only hidden or shown
+        again when it changes) and, with prices, overwrite the edge prices.
+        Returns the pruning stats.
+        """
+        state = pruned.prune_state
+        masked = frozenset()
+        if config.MIN_EDGE_NOTIONAL is not None and snapshot is not None:
+            masked = GraphPruner._illiquid(snapshot, state.core)
+        if masked != state.masked:
+            core_edges = GraphPruner._edge_rows(state.core)
+            GraphPruner._select(state.core, {(e[2], e[3]) for e in core_edges} - masked, into=pruned)
+            state.masked = masked
+            # Re-shown edges carry the core's prices from when they were hidden
+            prices = snapshot is not None
+        if prices:
+            pruned.update_prices(snapshot)
+
+        stats = dict(state.stats)
+        stats['liquidity'] = len(masked)
+        stats['coins_after'] = len(pruned.adj)
+        stats['edges_after'] = len(pruned.edges)
+        return stats
+
+    @staticmethod
+    def _edge_rows(graph) -> List[tuple]:
+        """
+        (from, to, symbol, action) of every edge in adjacency order, without
+        creating CompactGraph edge dicts.
+        """
+        if isinstance(graph, CompactGraph):
+            coins = graph.coins
+            return list(zip([coins[i] for i in graph.sources.tolist()], [coins[i] for i in graph.targets.tolist()],
+                            graph.symbols, ['BUY' if b else 'SELL' for b in graph.is_buy.tolist()]))
+        return [(e['from'], e['to'], e['symbol'], e['action']) for coin_edges in graph.adj.values() for e in coin_edges]
+
+    @staticmethod
+    def _select(graph, alive: set, into=None):
+        """
+        The subgraph of the `alive` (symbol, action) edges, keeping every coin
+        that is an endpoint of one, in the source's coin and edge order.
+        Written into `into` (same class) if given, else a new graph. Its pairs
+        are only those with an edge left, so update_prices never re-adds the
+        pruned side of a pair.
+        """
+        if isinstance(graph, CompactGraph):
+            keep = np.fromiter(((symbol, 'BUY' if is_buy else 'SELL') in alive
+                                for symbol, is_buy in zip(graph.symbols, graph.is_buy.tolist())),
+                               dtype=bool, count=len(graph.symbols))
+            used = np.zeros(len(graph.coins), dtype=bool)
+            used[graph.sources[keep]] = True
+            used[graph.targets[keep]] = True
+            local = np.cumsum(used, dtype=np.int32) - 1
+
+            compact = into if into is not None else CompactGraph()
+            compact.coins = [coin for coin, u in zip(graph.coins, used.tolist()) if u]
+            compact.coin_id = {coin: i for i, coin in enumerate(compact.coins)}
+            symbols = [symbol for symbol, k in zip(graph.symbols, keep.tolist()) if k]
+            kept = set(symbols)
+            compact.pairs = {symbol: pair for symbol, pair in graph.pairs.items() if symbol in kept}
+            compact._load_columns(local[graph.sources[keep]], local[graph.targets[keep]], symbols,
+                                  graph.is_buy[keep], graph.price[keep], graph.fee[keep])
+            return compact
+
+        pruned = into if into is not None else MarketGraph()
+        endpoints = set()
+        kept = set()
+        for coin_edges in graph.adj.values():
+            for e in coin_edges:
+                if (e['symbol'], e['action']) in alive:
+                    endpoints.add(e['from'])
+                    endpoints.add(e['to'])
+                    kept.add(e['symbol'])
+        pruned.adj = {}
+        pruned.edges = {}
+        for coin, coin_edges in graph.adj.items():
+            if coin not in endpoints:
+                continue
+            # Edge dicts are shared with the source graph
+            pruned.adj[coin] = [e for e in coin_edges if (e['symbol'], e['action']) in alive]
+            for e in pruned.adj[coin]:
+                pruned.edges[(e['symbol'], e['action'])] = e
+        pruned.pairs = {symbol: pair for symbol, pair in graph.pairs.items() if symbol in kept}
+        pruned.version += 1
+        return pruned
+
+    @staticmethod
+    def _illiquid(snapshot, core) -> frozenset:
+        """
+        (symbol, action) of the core's edges whose top-of-book size is zero or
+        worth less than MIN_EDGE_NOTIONAL stablecoins. Venues that report no
+        sizes at all (e.g. KuCoin's allTickers) are left alone.
+        """
+        if not ((snapshot.bid_qty > 0).any() or (snapshot.ask_qty > 0).any()):
+            return frozenset()
+        coins = snapshot.coins
+        rows = list(zip(snapshot.symbols, [coins[i] for i in snapshot.base_ids.tolist()],
+                        [coins[i] for i in snapshot.quote_ids.tolist()], snapshot.bid.tolist(),
+                        snapshot.ask.tolist(), snapshot.bid_qty.tolist(), snapshot.ask_qty.tolist()))
+
+        # Stablecoin value of one unit of each coin, from its first pair against a stablecoin
+        value = {coin: 1.0 for coin in config.STABLECOINS}
+        for symbol, base, quote, bid, ask, _, _ in rows:
+            if quote in config.STABLECOINS and base not in value:
+                value[base] = bid
+            elif base in config.STABLECOINS and quote not in value:
+                value[quote] = 1.0 / ask
+
+        edges = core.edges
+        masked = set()
+        for symbol, base, quote, bid, ask, bid_qty, ask_qty in rows:
+            # BUY: quote -> base at the ask, SELL: base -> quote at the bid; sizes
+            # are in base units, prices in quote
+            for action, qty, price in (('BUY', ask_qty, ask), ('SELL', bid_qty, bid)):
+                if (symbol, action) not in edges:
+                    continue
+                notional = qty * price * value[quote] if quote in value else None
+                if qty <= 0 or (notional is not None and notional < config.MIN_EDGE_NOTIONAL):
+                    masked.add((symbol, action))
+        return frozenset(masked)
+
+    @staticmethod
+    def _prune_degree(edges: List[tuple], alive: set) -> int:
+        """
+        Iteratively remove non-stablecoin coins that no simple cycle can pass
+        through: no way in, no way out, or in and out only via the same coin.
+        The last case is kept when that coin is a stablecoin and MIN_TRADES <= 2
+        (the two-trade round trip stable -> coin -> stable).
+        """
+        # coin -> {neighbour: number of alive edges}, per direction
+        ins: Dict[str, Dict[str, int]] = {}
+        outs: Dict[str, Dict[str, int]] = {}
+        incident: Dict[str, List[tuple]] = {}
+        for e in edges:
+            incident.setdefault(e[0], []).append(e)
+            incident.setdefault(e[1], []).append(e)
+            if (e[2], e[3]) in alive:
+                outs.setdefault(e[0], {})
+                outs[e[0]][e[1]] = outs[e[0]].get(e[1], 0) + 1
+                ins.setdefault(e[1], {})
+                ins[e[1]][e[0]] = ins[e[1]].get(e[0], 0) + 1
+
+        def cycle_capable(coin: str) -> bool:
+            coin_ins, coin_outs = ins.get(coin), outs.get(coin)
+            if not coin_ins or not coin_outs:
+                return False
+            if len(coin_ins) == 1 and len(coin_outs) == 1 and coin_ins.keys() == coin_outs.keys():
+                only = next(iter(coin_ins))
+                return only in config.STABLECOINS and config.MIN_TRADES <= 2
+            return True
+
+        def drop(counts: Dict[str, Dict[str, int]], coin: str, neighbour: str):
+            counts[coin][neighbour] -= 1
+            if counts[coin][neighbour] == 0:
+                del counts[coin][neighbour]
+
+        removed = 0
+        queue = deque(incident)
+        while queue:
+            coin = queue.popleft()
+            if coin in config.STABLECOINS or cycle_capable(coin):
+                continue
+            for e in incident[coin]:
+                key = (e[2], e[3])
+                if key not in alive:
+                    continue
+                alive.discard(key)
+                removed += 1
+                drop(outs, e[0], e[1])
+                drop(ins, e[1], e[0])
+                queue.append(e[1] if e[0] == coin else e[0])
+        return removed
+
+    @staticmethod
+    def _prune_reach(edges: List[tuple], alive: set) -> int:
+        """
+        Remove edges u -> v unless, for some stablecoin S,
+        dist(S, u) + 1 + dist(v, S) <= MAX_DEPTH.
+        """
+        forward: Dict[str, List[str]] = {}
+        backward: Dict[str, List[str]] = {}
+        live_edges = [e for e in edges if (e[2], e[3]) in alive]
+        for e in live_edges:
+            forward.setdefault(e[0], []).append(e[1])
+            backward.setdefault(e[1], []).append(e[0])
+
+        distances = [
+            (GraphPruner._bfs(forward, stable), GraphPruner._bfs(backward, stable))
+            for stable in config.STABLECOINS
+        ]
+
+        removed = 0
+        for e in live_edges:
+            for dist_from, dist_to in distances:
+                d_out = dist_from.get(e[0])
+                d_back = dist_to.get(e[1])
+                if d_out is not None and d_back is not None and d_out + 1 + d_back <= config.MAX_DEPTH:
+                    break
+            else:
+                alive.discard((e[2], e[3]))
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _bfs(adjacency: Dict[str, List[str]], root: str, limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        Hop distances from root, up to MAX_DEPTH hops.
+        """
+        if limit is None:
+            limit = config.MAX_DEPTH
+        dist = {root: 0}
+        frontier = [root]
+        for depth in range(1, limit + 1):
+            next_frontier = []
+            for coin in frontier:
+                for neighbour in adjacency.get(coin, []):
+                    if neighbour not in dist:
+                        dist[neighbour] = depth
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        return dist
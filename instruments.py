@@ -0,0 +1,219 @@
+"""
+Instrument Registry Module.
+Process-wide interned integer ids for coins and exchange instruments.
+
+Every (exchange, native symbol) pair gets one instrument id with canonical
+base/quote coin ids, however the venue spells the symbol ('BTC-USDT' on
+KuCoin, 'btcusdt' on HTX, ...). The registry is built from the
+symbol caches (see symbol_cache.py) and persisted next to them, so joins and lookups
+become integer operations instead of repeated string normalization.
+
+Ids are interned per process. The file only seeds them: every process
+(scan workers included) merges what it registered into it under a file
+lock, so concurrent saves never drop each other's instruments.
+"""
+
+import os
+import json
+import glob
+import logging
+import threading
+from typing import List, Dict, Tuple, Optional
+import numpy as np
+from file_lock import FileLock
+from symbol_cache import SymbolCache, SymbolTable
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILE = "instrument_registry.json"
+REGISTRY_VERSION = 1
+# Seconds save() waits for another process's save before leaving it for the next one
+REGISTRY_LOCK_WAIT = 5.0
+
+def normalize_symbol(symbol: str) -> str:
+    """
+    Venue-independent spelling of a symbol: 'btc-usdt', 'BTC_USDT' -> 'BTCUSDT'.
+    """
+    return symbol.upper().replace('-', '').replace('_', '').replace('/', '')
+
+class InstrumentRegistry:
+    def __init__(self):
+        self.coins: List[str] = []
+        self.coin_ids: Dict[str, int] = {}
+        # instrument id -> (exchange, native symbol, base coin id, quote coin id)
+        self.instruments: List[Tuple[str, str, int, int]] = []
+        self.instrument_ids: Dict[Tuple[str, str], int] = {}
+        # (exchange, normalized symbol) -> instrument id, fallback for other spellings
+        self._normalized: Dict[Tuple[str, str], int] = {}
+        # Reentrant: register() assigns coin ids while holding it
+        self._lock = threading.RLock()
+        self.dirty = False
+
+    def coin_id(self, coin: str) -> int:
+        coin = coin.upper()
+        cid = self.coin_ids.get(coin)
+        if cid is not None:
+            return cid
+        with self._lock:
+            cid = self.coin_ids.get(coin)
+            if cid is None:
+                cid = len(self.coins)
+                self.coins.append(coin)
+                self.coin_ids[coin] = cid
+                self.dirty = True
+        return cid
+
+    def register(self, exchange: str, symbol: str, base: str, quote: str) -> int:
+        """
+        Instrument id for a native symbol, interning it on first sight.
+        """
+        iid = self.instrument_ids.get((exchange, symbol))
+        if iid is not None:
+            return iid
+        with self._lock:
+            iid = self.instrument_ids.get((exchange, symbol))
+            if iid is None:
+                iid = len(self.instruments)
+                self.instruments.append((exchange, symbol, self.coin_id(base), self.coin_id(quote)))
+                self.instrument_ids[(exchange, symbol)] = iid
+                self._normalized.setdefault((exchange, normalize_symbol(symbol)), iid)
+                self.dirty = True
+        return iid
+
+    def register_symbols(self, exchange: str, symbols: List[Dict]) -> List[int]:
+        """
+        Register an exchange's symbol list; returns the instrument id of each entry.
+        """
+        return [self.register(exchange, s['symbol'], s['base'], s['quote']) for s in symbols]
+
+    def register_table(self, exchange: str, table: SymbolTable) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Register a columnar symbol table. Returns (instrument ids, base coin ids,
+        quote coin ids) as int32 arrays in table row order.
+        """
+        coin_ids = np.array([self.coin_id(coin) for coin in table.coins], dtype=np.int32)
+        base_ids = coin_ids[table.base_idx] if len(table) else np.zeros(0, dtype=np.int32)
+        quote_ids = coin_ids[table.quote_idx] if len(table) else np.zeros(0, dtype=np.int32)
+        instrument_ids = np.fromiter(
+            (self.register(exchange, symbol, table.coins[b], table.coins[q])
+             for symbol, b, q in zip(table.symbols, table.base_idx.tolist(), table.quote_idx.tolist())),
+            dtype=np.int32, count=len(table)
+        )
+        return instrument_ids, base_ids, quote_ids
+
+    def lookup(self, exchange: str, symbol: str) -> Optional[int]:
+        """
+        Instrument id for a symbol as spelled in any of the venue's APIs, or None.
+        """
+        iid = self.instrument_ids.get((exchange, symbol))
+        if iid is None:
+            iid = self._normalized.get((exchange, normalize_symbol(symbol)))
+        return iid
+
+    def base_quote(self, iid: int) -> Tuple[int, int]:
+        _, _, base_id, quote_id = self.instruments[iid]
+        return base_id, quote_id
+
+    def symbol(self, iid: int) -> str:
+        return self.instruments[iid][1]
+
+    # --- Persistence ---
+
+    def save(self, path: str = REGISTRY_FILE):
+        """
+        Merge the registry into the file (temp file + rename, so readers never
+        see half a file). Entries already on file keep their position and this
+        process's new coins and instruments are appended, under a lock file so
+        concurrent saves of other processes are not lost. If the lock is busy
+        for REGISTRY_LOCK_WAIT seconds the registry stays dirty (saved next time).
+        """
+        with self._lock, FileLock(path + '.lock', timeout=REGISTRY_LOCK_WAIT) as locked:
+            if not locked:
+                logger.warning("Instrument registry is being saved elsewhere, saving later.")
+                return
+            data = self._merged(path)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+                self.dirty = False
+            except Exception as e:
+                logger.error(f"Failed to save instrument registry: {e}")
+
+    def _merged(self, path: str) -> Dict:
+        """
+        The registry file's contents with this registry's entries added (caller holds the lock).
+        """
+        coins, instruments = [], []
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == REGISTRY_VERSION:
+                coins, instruments = data['coins'], [tuple(i) for i in data['instruments']]
+        except (OSError, ValueError) as e:
+            if os.path.exists(path):
+                logger.warning(f"Instrument registry unreadable, overwriting: {e}")
+
+        coin_ids = {coin: cid for cid, coin in enumerate(coins)}
+        for coin in self.coins:
+            if coin not in coin_ids:
+                coin_ids[coin] = len(coins)
+                coins.append(coin)
+        known = {(exchange, symbol) for exchange, symbol, _, _ in instruments}
+        for exchange, symbol, base_id, quote_id in self.instruments:
+            if (exchange, symbol) not in known:
+                instruments.append((exchange, symbol, coin_ids[self.coins[base_id]], coin_ids[self.coins[quote_id]]))
+        return {'version': REGISTRY_VERSION, 'coins': coins, 'instruments': instruments}
+
+    @classmethod
+    def load(cls, path: str = REGISTRY_FILE) -> 'InstrumentRegistry':
+        registry = cls()
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != REGISTRY_VERSION:
+            raise ValueError(f"Unsupported registry version {data.get('version')}")
+        for coin in data['coins']:
+            registry.coin_id(coin)
+        for exchange, symbol, base_id, quote_id in data['instruments']:
+            registry.register(exchange, symbol, registry.coins[base_id], registry.coins[quote_id])
+        registry.dirty = False
+        return registry
+
+    def add_symbol_caches(self, directory: str = '.'):
+        """
+        Register every symbol found in the cache_symbols_<exchange>.* files.
+        """
+        exchanges = {
+            os.path.basename(path)[len('cache_symbols_'):].split('.')[0]
+            for path in glob.glob(os.path.join(directory, 'cache_symbols_*'))
+        }
+        for exchange in sorted(exchanges):
+            table = SymbolCache.load(exchange, directory)
+            if table is not None:
+                self.register_table(exchange, table)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> InstrumentRegistry:
+    """
+    The process-wide registry: loaded from REGISTRY_FILE, or built from the
+    symbol caches (and persisted) on first use.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            registry = None
+            if os.path.exists(REGISTRY_FILE):
+                try:
+                    registry = InstrumentRegistry.load(REGISTRY_FILE)
+                except Exception as e:
+                    logger.warning(f"Instrument registry unreadable, rebuilding: {e}")
+            if registry is None:
+                registry = InstrumentRegistry()
+                registry.add_symbol_caches()
+                registry.save(REGISTRY_FILE)
+                logger.info(f"Instrument registry built: {len(registry.instruments)} instruments, {len(registry.coins)} coins.")
+            _registry = registry
+    return _registry
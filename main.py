@@ -10,8 +10,16 @@ from typing import Dict, List
 import concurrent.futures
 
 from exchanges import get_exchange
+from exchanges.aio import async_client
+from exchanges.health import health
+from book_stream import book_streams
 from market_data import MarketData
-from graph import MarketGraph
+from symbol_cache import SymbolTable
+from ticker_book import TickerBook
+from symbol_store import symbol_store
+from universe_diff import UniverseDiff
+from graph import MarketGraph, CompactGraph
+from graph_pruning import GraphPruner
 from arbitrage import ArbitrageEngine
 from filters import OpportunityFilter
 import config
@@ -20,9 +28,115 @@ import config
 logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def analyze_exchange(exchange_name: str) -> Dict:
+# (graph, SymbolTable it was built from, (version key, pruned graph) or None) kept
+# between in-process scans, per exchange (see analyze_exchange reuse_graph). A
+# process pool worker of run_analysis starts empty, so it always builds afresh.
+_LIVE_GRAPHS = {}
+
+def plan_shards(graph: MarketGraph, shards: int) -> List[Dict[str, List[int]]]:
+    """
+    Split the DFS by (start coin, first-hop edge) into `shards` balanced groups.
+    Each group is a first_hops mapping for ArbitrageEngine.
+    """
+    first_hops = []
+    for start_coin in config.STABLECOINS:
+        for i, edge in enumerate(graph.get_neighbors(start_coin)):
+            # Out-degree of the first hop's target approximates the subtree size
+            first_hops.append((len(graph.get_neighbors(edge['to'])), start_coin, i))
+
+    # Largest subtrees first, each to the currently lightest shard
+    first_hops.sort(reverse=True)
+    plans = [{} for _ in range(shards)]
+    loads = [0] * shards
+    for weight, start_coin, i in first_hops:
+        target = loads.index(min(loads))
+        plans[target].setdefault(start_coin, []).append(i)
+        loads[target] += weight + 1
+    return [plan for plan in plans if plan]
+
+def search_shard(graph: MarketGraph, mode: str, first_hops: Dict[str, List[int]]) -> Dict:
+    """
+    Run one DFS shard (process pool entry point).
+    """
+    engine = ArbitrageEngine(graph, mode=mode, first_hops=first_hops)
+    opportunities = engine.find_arbitrage()
+    return {"opportunities": opportunities, "search_complete": engine.search_complete}
+
+def search_sharded(graph: MarketGraph, mode: str, shards: int) -> Dict:
+    """
+    Search one exchange across a process pool, one shard per worker, and merge
+    the shards' bounded results (each holds its own top K + passing cycles).
+    """
+    plans = plan_shards(graph, shards)
+    opportunities = []
+    search_complete = True
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(plans)) as executor:
+        futures = [executor.submit(search_shard, graph, mode, plan) for plan in plans]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            opportunities.extend(result["opportunities"])
+            search_complete = search_complete and result["search_complete"]
+    return {"opportunities": opportunities, "search_complete": search_complete}
+
+def get_graph(exchange_name: str, market_data: MarketData, reuse_graph: bool = False):
+    """
+    Graph for the latest market data. With reuse_graph the previous graph of
+    this exchange is updated in place: prices only while its symbol universe
+    is unchanged, and only the affected pairs' edges after a symbol refresh
+    (unless more than INCREMENTAL_REBUILD_LIMIT of the pairs changed).
+    Reuse only happens within one long-lived process: run_analysis passes
+    reuse_graph for in-process scans (see config.IN_PROCESS_MODES).
+    """
+    graph_cls = CompactGraph if config.COMPACT_GRAPH else MarketGraph
+    graph, table, pruned = _LIVE_GRAPHS.get(exchange_name, (None, None, None)) if reuse_graph else (None, None, None)
+
+    if isinstance(graph, graph_cls):
+        diff = UniverseDiff.compute(exchange_name, table, market_data.symbols)
+        if diff.empty:
+            _LIVE_GRAPHS[exchange_name] = (graph, market_data.symbols, pruned)
+            stats = graph.update_prices(market_data.snapshot)
+            logger.info(f"[{exchange_name}] Graph updated in place: {stats}")
+            return graph
+        if len(diff) <= config.INCREMENTAL_REBUILD_LIMIT * max(len(market_data.symbols), 1):
+            stats = graph.apply_diff(diff, market_data.snapshot)
+            # apply_diff bumps graph.version, so the pruned graph is redone (see get_pruned_graph)
+            _LIVE_GRAPHS[exchange_name] = (graph, market_data.symbols, pruned)
+            logger.info(f"[{exchange_name}] Graph patched for symbol changes: {stats}")
+            return graph
+
+    graph = graph_cls()
+    graph.build_snapshot(market_data.snapshot)
+    if reuse_graph:
+        graph.track_pairs(market_data.symbols.records())
+        _LIVE_GRAPHS[exchange_name] = (graph, market_data.symbols, None)
+    return graph
+
+def get_pruned_graph(exchange_name: str, graph, snapshot, reachability: bool = True, reuse_graph: bool = False):
+    """
+    (pruned graph, stats) for the graph get_graph returned (see GraphPruner).
+    With reuse_graph the pruned graph is kept next to its live source and only
+    re-pruned when the source's topology or fees changed (graph.version) or
+    the pruning settings did; otherwise it is updated in place, like its source.
+    """
+    source, table, live = _LIVE_GRAPHS.get(exchange_name, (None, None, None)) if reuse_graph else (None, None, None)
+    key = (graph.version, GraphPruner.settings(reachability))
+    if source is graph and live is not None and live[0] == key:
+        return live[1], GraphPruner.update(live[1], snapshot)
+
+    pruned, stats = GraphPruner.prune(graph, snapshot, reachability=reachability)
+    if source is graph:
+        _LIVE_GRAPHS[exchange_name] = (graph, table, (key, pruned))
+    return pruned, stats
+
+def analyze_exchange(exchange_name: str, mode: str = None, shards: int = None, reuse_graph: bool = False,
+                     symbols: SymbolTable = None, tickers: TickerBook = None) -> Dict:
     """
     Run full analysis for a single exchange.
+    mode overrides config.SEARCH_MODE for this run.
+    shards > 1 splits a DFS search over that many processes (default config.SEARCH_SHARDS).
+    reuse_graph keeps the graph between calls in this process (see get_graph).
+    symbols / tickers are the exchange's symbol universe and tickers if the caller already has them.
+    The result's "health" holds this process's request outcomes for the exchange (see HealthTracker.drain).
     """
     logger.info(f"Starting analysis for {exchange_name}...")
     
@@ -34,24 +148,39 @@ def analyze_exchange(exchange_name: str) -> Dict:
 
     # 2. Fetch Data
     market_data = MarketData(exchange)
-    market_data.update_data()
-    valid_pairs = market_data.get_valid_pairs()
+    market_data.update_data(symbols, tickers)
     
-    if not valid_pairs:
+    if not len(market_data.snapshot):
         logger.warning(f"[{exchange_name}] No valid pairs found.")
-        return {"profitable": [], "all_paths": []}
+        return {"profitable": [], "all_paths": [], "health": health.drain(exchange_name)}
 
     # 3. Build Graph
-    graph = MarketGraph()
-    graph.build(valid_pairs)
+    graph = get_graph(exchange_name, market_data, reuse_graph)
+    search_mode = (mode or config.SEARCH_MODE).upper()
+    pruning = None
+    if config.PRUNE_GRAPH:
+        # NEGATIVE_CYCLE ignores MAX_DEPTH, so it only gets the degree/liquidity stages
+        graph, pruning = get_pruned_graph(exchange_name, graph, market_data.snapshot,
+                                          reachability=search_mode != 'NEGATIVE_CYCLE', reuse_graph=reuse_graph)
+        logger.info(f"[{exchange_name}] Graph pruned: coins {pruning['coins_before']} -> {pruning['coins_after']}, "
+                    f"edges {pruning['edges_before']} -> {pruning['edges_after']} "
+                    f"(liquidity -{pruning['liquidity']}, degree -{pruning['degree']}, reach -{pruning['reach']})")
 
     # 4. Search Arbitrage
-    engine = ArbitrageEngine(graph)
-    opportunities = engine.find_arbitrage()
+    if shards is None:
+        shards = config.SEARCH_SHARDS
+    if shards > 1 and search_mode == 'DFS':
+        result = search_sharded(graph, mode, shards)
+        opportunities = result["opportunities"]
+        search_complete = result["search_complete"]
+    else:
+        engine = ArbitrageEngine(graph, mode=mode)
+        opportunities = engine.find_arbitrage()
+        search_complete = engine.search_complete
     
     # 5. Filter
     profitable_ops = OpportunityFilter.filter(opportunities)
-    top_ops = OpportunityFilter.get_top_opportunities(opportunities, limit=50)
+    top_ops = OpportunityFilter.get_top_opportunities(opportunities, limit=config.TOP_K)
 
     # Tag with exchange name
     for op in profitable_ops: op['exchange'] = exchange_name
@@ -61,26 +190,71 @@ def analyze_exchange(exchange_name: str) -> Dict:
     
     return {
         "profitable": profitable_ops,
-        "all_paths": top_ops
+        "all_paths": top_ops,
+        "search_complete": search_complete,
+        "pruning": pruning,
+        "health": health.drain(exchange_name)
     }
 
-def run_analysis(target_exchanges: List[str] = None) -> Dict:
+def run_analysis(target_exchanges: List[str] = None, mode: str = None, in_process: bool = None) -> Dict:
     """
     Run analysis for multiple exchanges (parallel or sequential).
+
+    in_process runs the exchanges on threads of this process instead of a
+    fresh process pool, so per-process search state (graphs, cycle indices,
+    the INCREMENTAL scorer) survives between calls. By default it is on for
+    the modes that depend on that state (config.IN_PROCESS_MODES).
     """
     if target_exchanges is None:
         target_exchanges = config.ENABLED_EXCHANGES
+    if in_process is None:
+        in_process = (mode or config.SEARCH_MODE).upper() in config.IN_PROCESS_MODES
 
     combined_profitable = []
     combined_all = []
+    # Exchanges whose search stopped at its time budget (partial results)
+    incomplete = []
+    # Per-exchange pruning stats (see GraphPruner.prune)
+    pruning = {}
+
+    # Venues whose circuit breaker is open are skipped until a background probe
+    # succeeds, instead of adding their timeouts to every scan
+    skipped = [name for name in target_exchanges if not health.allow(name)]
+    if skipped:
+        logger.warning(f"Skipping exchanges with an open circuit breaker: {skipped}")
+    requested, target_exchanges = target_exchanges, [name for name in target_exchanges if name not in skipped]
 
     # Run in parallel using Processes to bypass GIL for CPU-heavy tasks
     # Max workers limited to cpu_count or number of exchanges
     import os
-    max_workers = min(len(target_exchanges), os.cpu_count() or 4)
+    max_workers = max(1, min(len(target_exchanges), os.cpu_count() or 4))
     
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-        future_to_exch = {executor.submit(analyze_exchange, name): name for name in target_exchanges}
+    if in_process:
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+    # Symbol universes come from this process's long-lived store, so workers
+    # never wait on exchangeInfo (None = nothing cached yet, the worker fetches)
+    universes = {}
+    for name in target_exchanges:
+        exchange = get_exchange(name)
+        universes[name] = symbol_store.get(exchange, block=False) if exchange else None
+
+    if config.STREAM_TICKERS:
+        # Idempotent; until a venue's stream is ready its tickers come from REST
+        book_streams.start(target_exchanges)
+
+    # All venues' tickers download concurrently on this process's event loop (or are
+    # read from the live books), so the workers only do CPU work (a venue missing
+    # here is fetched by its worker)
+    tickers = async_client.fetch_tickers(target_exchanges) if config.ASYNC_FETCH else {}
+
+    with pool as executor:
+        future_to_exch = {
+            executor.submit(analyze_exchange, name, mode, None, in_process, universes[name], tickers.get(name)): name
+            for name in target_exchanges
+        }
         for future in concurrent.futures.as_completed(future_to_exch):
             name = future_to_exch[future]
             try:
@@ -88,6 +262,14 @@ def run_analysis(target_exchanges: List[str] = None) -> Dict:
                 if data:
                     combined_profitable.extend(data.get("profitable", []))
                     combined_all.extend(data.get("all_paths", []))
+                    if not data.get("search_complete", True):
+                        incomplete.append(name)
+                    if data.get("pruning"):
+                        pruning[name] = data["pruning"]
+                    if not in_process:
+                        # Threads already recorded into this process's tracker
+                        exchange = get_exchange(name)
+                        health.replay(name, data.get("health", []), probe=exchange.probe if exchange else None)
             except Exception as e:
                 logger.error(f"[{name}] CRITICAL FAILURE or TIMEOUT: {e}")
 
@@ -97,7 +279,11 @@ def run_analysis(target_exchanges: List[str] = None) -> Dict:
 
     return {
         "profitable": combined_profitable,
-        "all_paths": combined_all[:100] # Global top 100
+        "all_paths": combined_all[:100], # Global top 100
+        "incomplete_exchanges": incomplete,
+        "graph_pruning": pruning,
+        "skipped_exchanges": skipped,
+        "exchange_health": health.status(requested)
     }
 
 if __name__ == "__main__":
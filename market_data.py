@@ -4,77 +4,158 @@ Generic processor for any Exchange.
 """
 
 import logging
-from typing import List, Dict
+from typing import List, Dict, Tuple
+import numpy as np
 from exchanges.base import Exchange
+from instruments import get_registry
+from symbol_cache import SymbolTable, NUMERIC_FIELDS
+from symbol_store import symbol_store
+from ticker_book import TickerBook
 
 logger = logging.getLogger(__name__)
 
+class MarketSnapshot:
+    """
+    Columnar join of an exchange's symbol universe with its tickers.
+
+    One row per tradable pair (bid and ask both > 0), in symbol universe
+    order. Coins are registry coin ids; `coins` maps them back to names.
+    """
+    def __init__(self, exchange: str, coins: List[str], symbols: List[str], instrument_ids: np.ndarray,
+                 base_ids: np.ndarray, quote_ids: np.ndarray, bid: np.ndarray, ask: np.ndarray,
+                 bid_qty: np.ndarray, ask_qty: np.ndarray, numeric: Dict[str, np.ndarray]):
+        self.exchange = exchange
+        self.coins = coins
+        self.symbols = symbols
+        self.instrument_ids = instrument_ids
+        self.base_ids = base_ids
+        self.quote_ids = quote_ids
+        self.bid = bid
+        self.ask = ask
+        self.bid_qty = bid_qty
+        self.ask_qty = ask_qty
+        # fee_maker, fee_taker, min_base, min_quote (see symbol_cache.NUMERIC_FIELDS)
+        self.numeric = numeric
+
+    @property
+    def fee_taker(self) -> np.ndarray:
+        return self.numeric['fee_taker']
+
+    @classmethod
+    def empty(cls, exchange: str) -> 'MarketSnapshot':
+        ints = np.zeros(0, dtype=np.int32)
+        floats = np.zeros(0)
+        return cls(exchange, [], [], ints, ints, ints, floats, floats, floats, floats,
+                   {field: floats for field in NUMERIC_FIELDS})
+
+    @classmethod
+    def join(cls, exchange: str, table: SymbolTable, tickers: TickerBook) -> 'MarketSnapshot':
+        """
+        Indexed join: every ticker key is resolved to an instrument once
+        (exact spelling first, normalized spelling as fallback), then all
+        columns are gathered with array indexing.
+        """
+        registry = get_registry()
+        instrument_ids, base_ids, quote_ids = registry.register_table(exchange, table)
+        if registry.dirty:
+            registry.save()
+
+        row_of = {iid: row for row, iid in enumerate(instrument_ids.tolist())}
+        # Table row -> ticker book row (-1 = no ticker)
+        book_rows = np.full(len(table), -1, dtype=np.int64)
+        for book_row, key in enumerate(tickers.symbols):
+            iid = registry.lookup(exchange, key)
+            row = row_of.get(iid) if iid is not None else None
+            if row is not None:
+                book_rows[row] = book_row
+
+        matched = book_rows >= 0
+        bid = np.where(matched, tickers.bid[book_rows], 0.0)
+        ask = np.where(matched, tickers.ask[book_rows], 0.0)
+        rows = np.nonzero((bid > 0) & (ask > 0))[0]
+        picked = book_rows[rows]
+
+        return cls(
+            exchange,
+            registry.coins,
+            [table.symbols[row] for row in rows.tolist()],
+            instrument_ids[rows],
+            base_ids[rows],
+            quote_ids[rows],
+            bid[rows],
+            ask[rows],
+            tickers.bid_qty[picked],
+            tickers.ask_qty[picked],
+            {field: table.numeric[field][rows] for field in NUMERIC_FIELDS}
+        )
+
+    def quotes(self) -> Dict[str, Tuple[float, float]]:
+        """
+        symbol -> (bid, ask) of every row.
+        """
+        return dict(zip(self.symbols, zip(self.bid.tolist(), self.ask.tolist())))
+
+    def records(self) -> List[Dict]:
+        """
+        The snapshot as the merged per-pair dicts MarketData used to produce.
+        """
+        columns = [self.numeric[field].tolist() for field in NUMERIC_FIELDS]
+        records = []
+        for values in zip(self.symbols, self.instrument_ids.tolist(),
+                          self.base_ids.tolist(), self.quote_ids.tolist(),
+                          self.bid.tolist(), self.ask.tolist(),
+                          self.bid_qty.tolist(), self.ask_qty.tolist(), *columns):
+            symbol, iid, base_id, quote_id, bid, ask, bid_qty, ask_qty = values[:8]
+            record = {'symbol': symbol, 'base': self.coins[base_id], 'quote': self.coins[quote_id]}
+            record.update(zip(NUMERIC_FIELDS, values[8:]))
+            record.update({'bid': bid, 'ask': ask, 'bidQty': bid_qty, 'askQty': ask_qty, 'instrument_id': iid})
+            records.append(record)
+        return records
+
+    def __len__(self):
+        return len(self.symbols)
+
 class MarketData:
     def __init__(self, exchange: Exchange):
         self.exchange = exchange
-        self.valid_pairs = []
+        self.snapshot = MarketSnapshot.empty(exchange.name)
+        # Raw inputs of the last update (symbol universe and ticker snapshot)
+        self.symbols = SymbolTable.from_records([])
+        self.tickers = {}
 
-    def update_data(self):
+    def update_data(self, symbols: SymbolTable = None, tickers: TickerBook = None):
         """
-        Fetch info and tickers, merge them, and store valid pairs.
+        Fetch info and tickers and join them into a MarketSnapshot.
+
+        Symbols come from the in-process SymbolStore (served from memory, stale
+        entries refreshed in the background) unless the caller passes them in.
+        Tickers are fetched unless the caller already downloaded them
+        (run_analysis fetches every venue's at once, see exchanges/aio.py).
         """
-        # Implement Caching for Symbols (Static Data)
-        import os
-        import json
-        import time
-        
-        cache_file = f"cache_symbols_{self.exchange.name}.json"
-        symbols = []
-        loaded_from_cache = False
-        
-        if os.path.exists(cache_file):
-            # Check age (1 hour = 3600 seconds)
-            if time.time() - os.path.getmtime(cache_file) < 3600:
-                try:
-                    with open(cache_file, 'r') as f:
-                        symbols = json.load(f)
-                    loaded_from_cache = True
-                    logger.info(f"[{self.exchange.name}] Loaded {len(symbols)} symbols from cache.")
-                except:
-                    pass
-        
-        if not loaded_from_cache:
-            logger.info(f"[{self.exchange.name}] Fetching symbols (Live)...")
-            symbols = self.exchange.fetch_symbols()
-            if symbols:
-                try:
-                    with open(cache_file, 'w') as f:
-                        json.dump(symbols, f)
-                except Exception as e:
-                    logger.error(f"Failed to cache symbols: {e}")
-        
-        logger.info(f"[{self.exchange.name}] Fetching tickers...")
-        tickers = self.exchange.fetch_tickers()
-        
+        if symbols is None:
+            symbols = symbol_store.get(self.exchange)
+        elif isinstance(symbols, list):
+            symbols = SymbolTable.from_records(symbols)
+
+        if tickers is None:
+            logger.info(f"[{self.exchange.name}] Fetching tickers...")
+            tickers = self.exchange.fetch_tickers()
+        self.symbols = symbols if symbols is not None else SymbolTable.from_records([])
+        self.tickers = tickers or {}
+
         if not symbols or not tickers:
             logger.error(f"[{self.exchange.name}] Failed to fetch data.")
-            self.valid_pairs = []
+            self.snapshot = MarketSnapshot.empty(self.exchange.name)
             return
 
-        self.valid_pairs = []
-        for s in symbols:
-            sym = s['symbol']
-            
-            # Match symbol to ticker (handle potential casing issues)
-            # Some APIs use lowercase, generic tickers usually match symbol string
-            ticker = tickers.get(sym)
-            if not ticker:
-                 # Try variations if needed, e.g. removal of hyphens or casing
-                 # For now assume exact match or simple case match
-                 ticker = tickers.get(sym.upper()) or tickers.get(sym.lower())
-
-            if ticker:
-                if ticker['bid'] > 0 and ticker['ask'] > 0:
-                    merged = s.copy()
-                    merged.update(ticker)
-                    self.valid_pairs.append(merged)
-        
-        logger.info(f"[{self.exchange.name}] Data updated. Valid pairs: {len(self.valid_pairs)}")
+        if not isinstance(tickers, TickerBook):
+            tickers = TickerBook.from_dict(tickers)
+        self.snapshot = MarketSnapshot.join(self.exchange.name, symbols, tickers)
+
+        logger.info(f"[{self.exchange.name}] Data updated. Valid pairs: {len(self.snapshot)}")
 
     def get_valid_pairs(self) -> List[Dict]:
-        return self.valid_pairs
+        """
+        Per-pair dicts of the snapshot (built on demand, for callers that want dicts).
+        """
+        return self.snapshot.records()
@@ -0,0 +1,112 @@
+"""
+Meet-in-the-Middle Module.
+Finds longer stablecoin cycles by joining half-paths on their middle coin.
+
+A cycle of L trades is split into a forward half (start -> mid, ceil(L/2)
+trades) and a backward half (mid -> start, the rest). Both halves are
+enumerated once, bucketed by middle coin and sorted by log-return, so the
+join can stop as soon as the best remaining pair cannot reach the cutoff.
+That is roughly O(d^(L/2)) work instead of the O(d^L) of a plain DFS.
+"""
+
+import math
+from typing import Callable, Dict, Iterator, List, Tuple
+from simulator import Simulator
+from graph import MarketGraph
+
+# (log-return, edges in trading order, coins visited excluding the start coin)
+HalfPath = Tuple[float, tuple, frozenset]
+
+class MeetInMiddle:
+    def __init__(self, graph: MarketGraph):
+        self.graph = graph
+
+        # Incoming edges per coin, for walking backward from the start coin
+        self.reverse: Dict[str, List[Dict]] = {}
+        self.log_rate: Dict[Tuple[str, str], float] = {}
+        for edges in graph.adj.values():
+            for edge in edges:
+                self.reverse.setdefault(edge['to'], []).append(edge)
+                rate = Simulator.simulate_trade(1.0, edge['price'], edge['fee'], edge['action'] == 'BUY')
+                self.log_rate[(edge['symbol'], edge['action'])] = math.log(rate)
+
+        self._cache = {}
+
+    def forward(self, start_coin: str, length: int) -> Dict[str, List[HalfPath]]:
+        """
+        Simple paths of exactly `length` trades leaving start_coin, bucketed by end coin.
+        """
+        key = ('F', start_coin, length)
+        if key not in self._cache:
+            buckets = {}
+            self._walk(start_coin, start_coin, length, 0.0, [], set(), buckets, self.graph.adj, 'to')
+            self._cache[key] = self._sorted(buckets)
+        return self._cache[key]
+
+    def backward(self, start_coin: str, length: int) -> Dict[str, List[HalfPath]]:
+        """
+        Simple paths of exactly `length` trades arriving at start_coin, bucketed by first coin.
+        """
+        key = ('B', start_coin, length)
+        if key not in self._cache:
+            buckets = {}
+            self._walk(start_coin, start_coin, length, 0.0, [], set(), buckets, self.reverse, 'from')
+            # Edges were collected walking backward; flip them into trading order
+            for bucket in buckets.values():
+                for i, (log_return, edges, coins) in enumerate(bucket):
+                    bucket[i] = (log_return, tuple(reversed(edges)), coins)
+            self._cache[key] = self._sorted(buckets)
+        return self._cache[key]
+
+    def _walk(self, start_coin: str, coin: str, remaining: int, log_return: float,
+              edges: List[Dict], visited: set, buckets: Dict, adjacency: Dict, direction: str):
+        if remaining == 0:
+            buckets.setdefault(coin, []).append((log_return, tuple(edges), frozenset(visited)))
+            return
+
+        for edge in adjacency.get(coin, []):
+            next_coin = edge[direction]
+            # The start coin only appears at the ends of the joined cycle
+            if next_coin == start_coin or next_coin in visited:
+                continue
+            edges.append(edge)
+            visited.add(next_coin)
+            self._walk(start_coin, next_coin, remaining - 1,
+                       log_return + self.log_rate[(edge['symbol'], edge['action'])],
+                       edges, visited, buckets, adjacency, direction)
+            edges.pop()
+            visited.discard(next_coin)
+
+    @staticmethod
+    def _sorted(buckets: Dict[str, List[HalfPath]]) -> Dict[str, List[HalfPath]]:
+        for bucket in buckets.values():
+            bucket.sort(key=lambda half: half[0], reverse=True)
+        return buckets
+
+    def cycles(self, start_coin: str, length: int, cutoff: Callable[[], float]) -> Iterator[tuple]:
+        """
+        Yield the edges of every cycle of exactly `length` trades through start_coin
+        whose log-return is at least cutoff() (re-read as results come in).
+        """
+        if length < 2:
+            return
+        forward = self.forward(start_coin, (length + 1) // 2)
+        backward = self.backward(start_coin, length // 2)
+
+        for mid, fwd in forward.items():
+            bwd = backward.get(mid)
+            if not bwd:
+                continue
+            best_back = bwd[0][0]
+
+            for f_log, f_edges, f_coins in fwd:
+                limit = cutoff()
+                if f_log + best_back < limit:
+                    break
+                for b_log, b_edges, b_coins in bwd:
+                    if f_log + b_log < limit:
+                        break
+                    # Halves may only share the middle coin
+                    if len(f_coins & b_coins) != 1:
+                        continue
+                    yield f_edges + b_edges
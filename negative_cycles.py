@@ -0,0 +1,147 @@
+"""
+Negative Cycle Module.
+Finds profitable loops of any length with log-weighted shortest paths.
+
+Each edge gets weight -log(rate * (1 - fee)), so a cycle whose product of
+rates is above 1 (a profit) has a negative total weight. SPFA (queue based
+Bellman-Ford) rooted at a stablecoin finds such cycles in polynomial time,
+no matter how many legs they have.
+"""
+
+import math
+import logging
+from collections import deque
+from typing import List, Dict, Optional, Set, Tuple
+import config
+from graph import MarketGraph
+
+logger = logging.getLogger(__name__)
+
+# Relaxations smaller than this are float noise, not a better path
+EPSILON = 1e-12
+
+def edge_weight(edge: Dict) -> float:
+    """
+    -log of the amount received per unit sent along the edge, after fees.
+    """
+    if edge['action'] == 'BUY':
+        rate = (1.0 / edge['price']) * (1 - edge['fee'])
+    else:
+        rate = edge['price'] * (1 - edge['fee'])
+    return -math.log(rate)
+
+class NegativeCycleFinder:
+    def __init__(self, graph: MarketGraph):
+        self.graph = graph
+        self.weights = {key: edge_weight(edge) for key, edge in graph.edges.items()}
+
+    def find_cycles(self, max_rounds: int = None, max_rejects: int = None) -> List[Tuple[str, List[Dict]]]:
+        """
+        Return (start_coin, edges) for every distinct negative cycle found
+        from the stablecoins. Each cycle is rotated to start at a stablecoin.
+
+        After a cycle is found its least favourable edge is banned and the
+        search reruns, so one root can yield several cycles (at most max_rounds).
+        Cycles that are not reported (already found, or through no stablecoin)
+        are banned the same way without using up a round; a root is given up
+        after max_rejects of them (default NEGATIVE_CYCLE_MAX_REJECTS).
+        """
+        if max_rounds is None:
+            max_rounds = config.NEGATIVE_CYCLE_ROUNDS
+        if max_rejects is None:
+            max_rejects = config.NEGATIVE_CYCLE_MAX_REJECTS
+
+        found = []
+        seen = set()
+        for root in config.STABLECOINS:
+            if root not in self.graph.adj:
+                continue
+
+            banned = set()
+            rounds = rejects = 0
+            while rounds < max_rounds and rejects < max_rejects:
+                cycle = self._spfa(root, banned)
+                if not cycle:
+                    break
+
+                # Break this loop for the next round
+                worst = max(cycle, key=lambda e: self.weights[(e['symbol'], e['action'])])
+                banned.add((worst['symbol'], worst['action']))
+
+                key = frozenset((e['symbol'], e['action']) for e in cycle)
+                rotated = self._rotate_to_stablecoin(cycle, root) if key not in seen else None
+                seen.add(key)
+                if rotated is None:
+                    rejects += 1
+                    continue
+                rounds += 1
+                found.append(rotated)
+
+        return found
+
+    def _spfa(self, root: str, banned: Set[Tuple[str, str]]) -> Optional[List[Dict]]:
+        """
+        Shortest paths from root. Returns the edges of the first negative cycle
+        detected, or None if there is none reachable from root.
+        """
+        dist = {root: 0.0}
+        pred = {}
+        queue = deque([root])
+        in_queue = {root}
+
+        while queue:
+            u = queue.popleft()
+            in_queue.discard(u)
+            du = dist[u]
+
+            for edge in self.graph.get_neighbors(u):
+                key = (edge['symbol'], edge['action'])
+                if key in banned:
+                    continue
+
+                v = edge['to']
+                candidate = du + self.weights[key]
+                if candidate < dist.get(v, math.inf) - EPSILON:
+                    dist[v] = candidate
+                    pred[v] = edge
+
+                    # The predecessor graph stays a tree until a negative cycle
+                    # closes, so walking back from u either reaches v (cycle)
+                    # or runs out at the root.
+                    cycle = self._cycle_through(pred, u, v)
+                    if cycle:
+                        return cycle
+
+                    if v not in in_queue:
+                        queue.append(v)
+                        in_queue.add(v)
+        return None
+
+    @staticmethod
+    def _cycle_through(pred: Dict[str, Dict], u: str, v: str) -> Optional[List[Dict]]:
+        """
+        If v is an ancestor of u in the predecessor tree, return the cycle v -> ... -> u -> v.
+        """
+        back = []
+        x = u
+        while x != v:
+            edge = pred.get(x)
+            if edge is None:
+                return None
+            back.append(edge)
+            x = edge['from']
+            if len(back) > len(pred):
+                return None
+        return list(reversed(back)) + [pred[v]]
+
+    @staticmethod
+    def _rotate_to_stablecoin(cycle: List[Dict], root: str) -> Optional[Tuple[str, List[Dict]]]:
+        """
+        Rotate the cycle so it starts at root, or at another stablecoin on it.
+        """
+        coins = [e['from'] for e in cycle]
+        for start in [root] + config.STABLECOINS:
+            if start in coins:
+                i = coins.index(start)
+                return start, cycle[i:] + cycle[:i]
+        return None
@@ -180,6 +180,42 @@ def get_config():
         "min_profit_percent": config.MIN_PROFIT_PERCENT
     })
 
+@app.route('/api/symbols/status')
+@login_required
+def symbols_status():
+    from symbol_store import symbol_store
+    return jsonify(symbol_store.status())
+
+@app.route('/api/symbols/diff')
+@login_required
+def symbols_diff():
+    from symbol_store import symbol_store
+    return jsonify(symbol_store.diffs(request.args.get('exchange')))
+
+@app.route('/api/streams/status')
+@login_required
+def streams_status():
+    from book_stream import book_streams
+    return jsonify(book_streams.status())
+
+@app.route('/api/transport/stats')
+@login_required
+def transport_stats():
+    from exchanges.base import transport
+    return jsonify(transport.stats())
+
+@app.route('/api/ratelimit')
+@login_required
+def rate_limit_headroom():
+    from exchanges.rate_limit import rate_limiter
+    return jsonify(rate_limiter.headroom())
+
+@app.route('/api/health')
+@login_required
+def exchange_health():
+    from exchanges.health import health
+    return jsonify(health.status())
+
 @app.route('/pricing')
 def pricing():
     return render_template('pricing.html', user=current_user)
@@ -246,7 +282,11 @@ def scan():
             "count": len(results['profitable']),
             "opportunities": results['profitable'],
             "all_opportunities": results['all_paths'],
-            "total_analyzed": len(results['all_paths']) # Explicit count
+            "total_analyzed": len(results['all_paths']), # Explicit count
+            "incomplete_exchanges": results.get('incomplete_exchanges', []),
+            "graph_pruning": results.get('graph_pruning', {}),
+            "skipped_exchanges": results.get('skipped_exchanges', []),
+            "exchange_health": results.get('exchange_health', {})
         }
         return jsonify(response)
 
@@ -0,0 +1,252 @@
+"""
+Symbol Cache Module.
+Compact, versioned on-disk cache of each exchange's symbol universe.
+
+cache_symbols_<exchange>.bin holds only the fields the pipeline uses, as
+columns, and is read with a single buffer read:
+
+    header   '<4sHHIII'  magic, version, reserved, n symbols, n coins, blob bytes
+    float64  fee_maker[n], fee_taker[n], min_base[n], min_quote[n]
+    uint32   base[n], quote[n]            (indices into the coin table)
+    utf-8    n symbols + n coins, '\\0' separated
+
+Any other per-symbol fields an adapter returns (e.g. MEXC's raw
+exchangeInfo record under 'original') go to the optional side file
+cache_symbols_<exchange>.raw.json and are only read on demand.
+Legacy cache_symbols_<exchange>.json files are migrated on first load.
+
+Files are replaced atomically (temp file + rename) and refreshes are
+serialized across processes by cache_symbols_<exchange>.bin.lock.
+"""
+
+import os
+import json
+import time
+import struct
+import logging
+import threading
+from typing import Callable, List, Dict, Optional
+import numpy as np
+import config
+from file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SYMC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIII')
+NUMERIC_FIELDS = ('fee_maker', 'fee_taker', 'min_base', 'min_quote')
+STRING_FIELDS = ('symbol', 'base', 'quote')
+
+class SymbolTable:
+    """
+    Columnar symbol universe of one exchange.
+    """
+    def __init__(self, symbols: List[str], coins: List[str], base_idx: np.ndarray,
+                 quote_idx: np.ndarray, numeric: Dict[str, np.ndarray]):
+        self.symbols = symbols
+        self.coins = coins
+        self.base_idx = base_idx
+        self.quote_idx = quote_idx
+        self.numeric = numeric
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'SymbolTable':
+        coins = []
+        coin_idx = {}
+        def intern(coin):
+            idx = coin_idx.get(coin)
+            if idx is None:
+                idx = coin_idx[coin] = len(coins)
+                coins.append(coin)
+            return idx
+
+        n = len(records)
+        base_idx = np.fromiter((intern(r['base']) for r in records), dtype=np.uint32, count=n)
+        quote_idx = np.fromiter((intern(r['quote']) for r in records), dtype=np.uint32, count=n)
+        numeric = {
+            field: np.fromiter((float(r.get(field) or 0.0) for r in records), dtype=np.float64, count=n)
+            for field in NUMERIC_FIELDS
+        }
+        return cls([r['symbol'] for r in records], coins, base_idx, quote_idx, numeric)
+
+    def records(self) -> List[Dict]:
+        """
+        The universe as the list of dicts Exchange.fetch_symbols returns (core fields only).
+        """
+        bases = [self.coins[i] for i in self.base_idx.tolist()]
+        quotes = [self.coins[i] for i in self.quote_idx.tolist()]
+        columns = [self.numeric[field].tolist() for field in NUMERIC_FIELDS]
+        return [
+            dict(zip(STRING_FIELDS + NUMERIC_FIELDS, row))
+            for row in zip(self.symbols, bases, quotes, *columns)
+        ]
+
+    def __len__(self):
+        return len(self.symbols)
+
+class SymbolCache:
+    @staticmethod
+    def path(exchange: str, directory: str = '.') -> str:
+        return os.path.join(directory, f"cache_symbols_{exchange}.bin")
+
+    @staticmethod
+    def raw_path(exchange: str, directory: str = '.') -> str:
+        return os.path.join(directory, f"cache_symbols_{exchange}.raw.json")
+
+    @staticmethod
+    def legacy_path(exchange: str, directory: str = '.') -> str:
+        return os.path.join(directory, f"cache_symbols_{exchange}.json")
+
+    @staticmethod
+    def age(exchange: str, directory: str = '.') -> Optional[float]:
+        """
+        Seconds since the exchange's cache was written (legacy file included), or None.
+        """
+        for path in (SymbolCache.path(exchange, directory), SymbolCache.legacy_path(exchange, directory)):
+            if os.path.exists(path):
+                return time.time() - os.path.getmtime(path)
+        return None
+
+    @staticmethod
+    def encode(table: SymbolTable) -> bytes:
+        blob = '\0'.join(table.symbols + table.coins).encode('utf-8')
+        parts = [HEADER.pack(MAGIC, VERSION, 0, len(table.symbols), len(table.coins), len(blob))]
+        parts += [table.numeric[field].astype('<f8').tobytes() for field in NUMERIC_FIELDS]
+        parts += [table.base_idx.astype('<u4').tobytes(), table.quote_idx.astype('<u4').tobytes()]
+        parts.append(blob)
+        return b''.join(parts)
+
+    @staticmethod
+    def decode(buffer: bytes) -> SymbolTable:
+        magic, version, _, n, n_coins, blob_len = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported symbol cache (magic {magic!r}, version {version})")
+        expected = HEADER.size + n * (8 * len(NUMERIC_FIELDS) + 4 * 2) + blob_len
+        if len(buffer) != expected:
+            raise ValueError(f"Truncated symbol cache ({len(buffer)} of {expected} bytes)")
+
+        offset = HEADER.size
+        numeric = {}
+        for field in NUMERIC_FIELDS:
+            numeric[field] = np.frombuffer(buffer, dtype='<f8', count=n, offset=offset)
+            offset += 8 * n
+        base_idx = np.frombuffer(buffer, dtype='<u4', count=n, offset=offset)
+        quote_idx = np.frombuffer(buffer, dtype='<u4', count=n, offset=offset + 4 * n)
+        offset += 8 * n
+
+        strings = buffer[offset:offset + blob_len].decode('utf-8').split('\0') if n else []
+        return SymbolTable(strings[:n], strings[n:], base_idx, quote_idx, numeric)
+
+    @staticmethod
+    def save(exchange: str, records: List[Dict], directory: str = '.') -> SymbolTable:
+        """
+        Write the compact cache, plus the raw side file when records carry extra fields.
+        """
+        table = SymbolTable.from_records(records)
+        core = set(STRING_FIELDS + NUMERIC_FIELDS)
+        extras = {}
+        for r in records:
+            extra = {k: v for k, v in r.items() if k not in core}
+            if extra:
+                extras[r['symbol']] = extra
+
+        try:
+            # Side file first: the .bin's mtime marks the refresh as complete
+            if extras:
+                SymbolCache._write_atomic(SymbolCache.raw_path(exchange, directory), json.dumps(extras).encode('utf-8'))
+            SymbolCache._write_atomic(SymbolCache.path(exchange, directory), SymbolCache.encode(table))
+        except Exception as e:
+            logger.error(f"Failed to cache symbols: {e}")
+        return table
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        """
+        Write to a temp file and rename it over path, so readers see the old
+        file or the new one, never a partial write.
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def refresh(exchange: str, fetch: Callable[[], List[Dict]], newer_than: float = 0.0,
+                wait: float = None, directory: str = '.') -> Optional[SymbolTable]:
+        """
+        Stampede-safe refresh: one process fetches while the others wait.
+
+        Holders of the lock file first re-check the cache, so whoever waited
+        for another process's refresh (cache written after `newer_than`) just
+        loads its result. If the lock is not free within `wait` seconds
+        (default SYMBOL_REFRESH_LOCK_WAIT), or the fetch fails, the previous
+        version is returned (None if there is none).
+        """
+        if wait is None:
+            wait = config.SYMBOL_REFRESH_LOCK_WAIT
+        lock = FileLock(SymbolCache.path(exchange, directory) + '.lock', timeout=wait)
+        with lock as acquired:
+            if not acquired:
+                logger.info(f"[{exchange}] Symbol refresh in progress elsewhere, using previous version.")
+                return SymbolCache.load(exchange, directory)
+
+            age = SymbolCache.age(exchange, directory)
+            if age is not None and time.time() - age > newer_than:
+                table = SymbolCache.load(exchange, directory)
+                if table is not None:
+                    return table
+
+            logger.info(f"[{exchange}] Fetching symbols (Live)...")
+            symbols = fetch()
+            if not symbols:
+                logger.warning(f"[{exchange}] Symbol refresh failed.")
+                return SymbolCache.load(exchange, directory)
+            return SymbolCache.save(exchange, symbols, directory)
+
+    @staticmethod
+    def load(exchange: str, directory: str = '.') -> Optional[SymbolTable]:
+        """
+        Read the compact cache (one buffer read), migrating a legacy JSON cache
+        if that is all there is. Returns None when there is no usable cache.
+        """
+        path = SymbolCache.path(exchange, directory)
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    return SymbolCache.decode(f.read())
+            except Exception as e:
+                logger.warning(f"[{exchange}] Unreadable symbol cache: {e}")
+                return None
+
+        legacy = SymbolCache.legacy_path(exchange, directory)
+        if os.path.exists(legacy):
+            try:
+                with open(legacy, 'r') as f:
+                    records = json.load(f)
+            except Exception as e:
+                logger.warning(f"[{exchange}] Unreadable legacy symbol cache: {e}")
+                return None
+            table = SymbolCache.save(exchange, records, directory)
+            # Keep the legacy file's age so the refresh schedule is unchanged
+            mtime = os.path.getmtime(legacy)
+            if os.path.exists(path):
+                os.utime(path, (mtime, mtime))
+            logger.info(f"[{exchange}] Migrated {len(table)} symbols to {path}.")
+            return table
+        return None
+
+    @staticmethod
+    def load_raw(exchange: str) -> Dict[str, Dict]:
+        """
+        Raw per-symbol exchange metadata from the side file ({} if there is none).
+        """
+        try:
+            with open(SymbolCache.raw_path(exchange), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
@@ -0,0 +1,170 @@
+"""
+Symbol Store Module.
+Long-lived in-process symbol universes with stale-while-revalidate refresh.
+
+A scan never waits for exchangeInfo once anything is cached: stale entries
+are served immediately while a background thread fetches the new universe
+and writes it through to the on-disk SymbolCache. Only a cold start with
+no cache at all blocks on a live fetch.
+
+Every time an exchange's universe is replaced, the UniverseDiff against the
+previous version is kept (see diffs()) so operators can see what changed.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+import config
+from exchanges import get_exchange
+from exchanges.base import Exchange
+from symbol_cache import SymbolCache, SymbolTable
+from universe_diff import UniverseDiff
+
+logger = logging.getLogger(__name__)
+
+class SymbolStore:
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl
+        # exchange name -> (SymbolTable, refresh time as a unix timestamp)
+        self._entries: Dict[str, tuple] = {}
+        self._refreshing = set()
+        # exchange name -> recent UniverseDiffs, oldest first
+        self._diffs: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _ttl(self) -> float:
+        return self.ttl if self.ttl is not None else config.SYMBOL_CACHE_TTL
+
+    def get(self, exchange: Exchange, block: bool = True) -> Optional[SymbolTable]:
+        """
+        Symbol universe of an exchange, stale or not. Stale entries schedule a
+        background refresh. With nothing cached at all, fetches live (block=True)
+        or returns None (block=False). None is also returned if the fetch fails.
+        """
+        name = exchange.name
+        entry = self._entries.get(name) or self._load_disk(name)
+        if entry is None:
+            if not block:
+                return None
+            return self.refresh(exchange)
+
+        table, refreshed_at = entry
+        if time.time() - refreshed_at >= self._ttl():
+            # Another process may have refreshed the disk cache already
+            disk = self._load_disk(name, newer_than=refreshed_at)
+            if disk is not None:
+                table, refreshed_at = disk
+            if time.time() - refreshed_at >= self._ttl():
+                self.refresh_async(exchange)
+        return table
+
+    def _load_disk(self, name: str, newer_than: float = None) -> Optional[tuple]:
+        age = SymbolCache.age(name)
+        if age is None:
+            return None
+        refreshed_at = time.time() - age
+        if newer_than is not None and refreshed_at <= newer_than:
+            return None
+        table = SymbolCache.load(name)
+        if table is None:
+            return None
+        entry = (table, refreshed_at)
+        self._replace(name, entry)
+        logger.info(f"[{name}] Loaded {len(table)} symbols from cache.")
+        return entry
+
+    def refresh(self, exchange: Exchange) -> Optional[SymbolTable]:
+        """
+        Fetch the universe (or take another process's concurrent refresh, see
+        SymbolCache.refresh) and keep it. Returns None if nothing is available.
+        """
+        entry = self._entries.get(exchange.name)
+        fetched = []
+
+        def fetch() -> List[Dict]:
+            symbols = exchange.fetch_symbols()
+            if symbols:
+                fetched.append(time.time())
+            return symbols
+
+        table = SymbolCache.refresh(exchange.name, fetch, newer_than=entry[1] if entry else 0.0)
+        if table is None:
+            return None
+        if fetched:
+            # Live, even if saving the cache failed (e.g. a read-only directory) and an older file is left
+            refreshed_at = fetched[0]
+        else:
+            refreshed_at = time.time() - (SymbolCache.age(exchange.name) or 0.0)
+        self._replace(exchange.name, (table, refreshed_at))
+        return table
+
+    def _replace(self, name: str, entry: tuple):
+        """
+        Store a new (table, refreshed_at) entry, recording its diff against the previous table.
+        """
+        with self._lock:
+            previous = self._entries.get(name)
+            self._entries[name] = entry
+        if previous is None or previous[0] is entry[0]:
+            return
+
+        diff = UniverseDiff.compute(name, previous[0], entry[0])
+        if diff.empty:
+            return
+        logger.info(f"[{name}] Symbol universe changed: +{len(diff.added)} -{len(diff.removed)} ~{len(diff.changed)} pairs.")
+        with self._lock:
+            history = self._diffs.setdefault(name, deque(maxlen=config.UNIVERSE_DIFF_HISTORY))
+            history.append(diff)
+
+    def diffs(self, exchange: str = None) -> List[Dict]:
+        """
+        Recorded universe changes (newest first), of one exchange or all of them.
+        """
+        with self._lock:
+            diffs = [diff for name, history in self._diffs.items()
+                     if exchange is None or name == exchange for diff in history]
+        diffs.sort(key=lambda diff: diff.at, reverse=True)
+        return [diff.to_dict() for diff in diffs]
+
+    def refresh_async(self, exchange: Exchange):
+        """
+        Refresh in a background thread, unless one is already running for this exchange.
+        """
+        with self._lock:
+            if exchange.name in self._refreshing:
+                return
+            self._refreshing.add(exchange.name)
+
+        def run():
+            try:
+                # Own adapter instance, so the scan's HTTP session is not shared across threads
+                self.refresh(get_exchange(exchange.name) or exchange)
+            except Exception as e:
+                logger.error(f"[{exchange.name}] Background symbol refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(exchange.name)
+
+        threading.Thread(target=run, name=f"symbols-{exchange.name}", daemon=True).start()
+
+    def status(self) -> Dict[str, Dict]:
+        """
+        Per-exchange refresh time, age and state.
+        """
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    'refreshed_at': refreshed_at,
+                    'age': now - refreshed_at,
+                    'stale': now - refreshed_at >= self._ttl(),
+                    'refreshing': name in self._refreshing,
+                    'symbols': len(table)
+                }
+                for name, (table, refreshed_at) in self._entries.items()
+            }
+
+# Shared by every scan in this process
+symbol_store = SymbolStore()
@@ -0,0 +1,53 @@
+"""
+In-place graph price updates against fresh builds (no network).
+
+Run with `python -m pytest test_graph.py`.
+"""
+
+import pytest
+
+from graph import MarketGraph, CompactGraph
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+def test_price_update_matches_fresh_build(market, graph_cls):
+    pairs = market.pairs()
+    graph = market.graph(graph_cls, market.snapshot(pairs))
+    version = graph.version
+
+    for p in pairs[::5]:
+        p['bid'] *= 1.01
+        p['ask'] *= 1.01
+    snap = market.snapshot(pairs)
+    stats = graph.update_prices(snap)
+
+    assert stats == {'updated': len(pairs[::5]), 'added': 0, 'removed': 0}
+    assert market.edge_set(graph) == market.edge_set(market.graph(graph_cls, snap))
+    # Prices only: the topology (and anything keyed on graph.version) is unchanged
+    assert graph.version == version
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+def test_pair_losing_and_regaining_quote(market, graph_cls):
+    pairs = market.pairs()
+    graph = market.graph(graph_cls, market.snapshot(pairs))
+    graph.track_pairs(pairs)
+
+    lost = pairs[10]
+    quote = (lost['bid'], lost['ask'])
+    lost['bid'] = lost['ask'] = 0.0
+    snap = market.snapshot(pairs)
+    version = graph.version
+    assert graph.update_prices(snap)['removed'] == 1
+    assert graph.get_edge(lost['symbol'], 'BUY') is None
+    assert market.edge_set(graph) == market.edge_set(market.graph(graph_cls, snap))
+    assert graph.version > version
+
+    lost['bid'], lost['ask'] = quote
+    snap = market.snapshot(pairs)
+    assert graph.update_prices(snap)['added'] == 1
+    assert market.edge_set(graph) == market.edge_set(market.graph(graph_cls, snap))
+
+def test_compact_graph_matches_market_graph(market):
+    snap = market.snapshot(market.pairs())
+    compact, graph = market.graph(CompactGraph, snap), market.graph(MarketGraph, snap)
+    assert market.edge_set(compact) == market.edge_set(graph)
+    assert compact.topology_key() == graph.topology_key()
@@ -0,0 +1,150 @@
+"""
+Circuit breaker state transitions, and the latency adapters report to it
+(against a local server, no network).
+
+Run with `python -m pytest test_health.py`.
+"""
+
+import time
+import asyncio
+import aiohttp
+import pytest
+
+import config
+from exchanges import base, aio, BinanceExchange
+from exchanges.aio import AsyncExchange
+from exchanges.health import HealthTracker, CLOSED, OPEN, HALF_OPEN
+
+@pytest.fixture
+def tracker(monkeypatch):
+    monkeypatch.setattr(config, 'CIRCUIT_BREAKER', True)
+    monkeypatch.setattr(config, 'HEALTH_FAILURE_THRESHOLD', 3)
+    monkeypatch.setattr(config, 'HEALTH_SLOW_SECONDS', 1.0)
+    monkeypatch.setattr(config, 'HEALTH_PROBE_INTERVAL', 10.0)
+    monkeypatch.setattr(config, 'HEALTH_PROBE_INTERVAL_MAX', 30.0)
+    tracker = HealthTracker()
+    # Probes are driven by the tests (see test_background_probe_closes_the_breaker)
+    monkeypatch.setattr(tracker, '_start_prober', lambda: None)
+    return tracker
+
+def fail(tracker: HealthTracker, times: int, probe=None):
+    for _ in range(times):
+        tracker.record('X', False, 0.1, 'timeout', probe=probe)
+
+def test_opens_after_consecutive_failures(tracker):
+    fail(tracker, 2)
+    tracker.record('X', True, 0.1)
+    fail(tracker, 2)
+    assert tracker.allow('X')
+    fail(tracker, 1)
+    assert not tracker.allow('X')
+    status = tracker.status(['X'])['X']
+    assert status['state'] == OPEN
+    assert status['last_error'] == 'timeout'
+    assert status['next_probe_in'] == pytest.approx(10.0, abs=1.0)
+
+def test_slow_successes_count_as_failures(tracker):
+    for _ in range(3):
+        tracker.record('X', True, 2.0)
+    assert tracker.status(['X'])['X']['state'] == OPEN
+    assert 'slow response' in tracker.status(['X'])['X']['last_error']
+
+def test_disabled_breaker_always_allows(tracker, monkeypatch):
+    fail(tracker, 5)
+    monkeypatch.setattr(config, 'CIRCUIT_BREAKER', False)
+    assert tracker.allow('X')
+
+def test_failed_probe_reopens_with_a_longer_interval(tracker):
+    def probe():
+        raise ConnectionError('refused')
+    fail(tracker, 3, probe)
+    breaker = tracker._breakers['X']
+
+    for interval in (20.0, 30.0):
+        breaker.state = HALF_OPEN
+        assert not tracker.allow('X')
+        tracker._probe('X', breaker)
+        assert breaker.state == OPEN
+        assert breaker.probe_interval == interval
+        assert 'refused' in breaker.last_error
+
+def test_successful_probe_closes_the_breaker(tracker):
+    fail(tracker, 3, probe=lambda: True)
+    breaker = tracker._breakers['X']
+    breaker.state = HALF_OPEN
+    tracker._probe('X', breaker)
+    assert tracker.allow('X')
+    status = tracker.status(['X'])['X']
+    assert (status['state'], status['failures'], status['open_for']) == (CLOSED, 0, None)
+
+def test_background_probe_closes_the_breaker(monkeypatch):
+    monkeypatch.setattr(config, 'CIRCUIT_BREAKER', True)
+    monkeypatch.setattr(config, 'HEALTH_PROBE_INTERVAL', 0.0)
+    tracker = HealthTracker()
+    probes = []
+    def probe():
+        probes.append(1)
+        return True
+    for _ in range(config.HEALTH_FAILURE_THRESHOLD):
+        tracker.record('X', False, 0.1, 'timeout', probe=probe)
+    assert not tracker.allow('X')
+
+    deadline = time.time() + 5
+    while not tracker.allow('X') and time.time() < deadline:
+        time.sleep(0.05)
+    assert tracker.allow('X') and probes
+
+def test_drain_and_replay(tracker):
+    tracker.record('X', True, 0.2)
+    fail(tracker, 3)
+    outcomes = tracker.drain('X')
+    assert outcomes == [(True, 0.2, None)] + [(False, 0.1, 'timeout')] * 3
+    assert tracker.drain('X') == []
+
+    parent = HealthTracker()
+    parent._start_prober = lambda: None
+    parent.replay('X', outcomes)
+    status = parent.status(['X'])['X']
+    assert (status['state'], status['requests'], status['errors']) == (OPEN, 4, 3)
+    # Replayed outcomes are not handed on again
+    assert parent.drain('X') == []
+
+@pytest.fixture
+def throttled(tracker, local_server, monkeypatch):
+    """
+    A venue answering at once, behind a one-request-per-second bucket, with a
+    breaker that opens on a single response slower than 0.3s.
+    """
+    monkeypatch.setattr(config, 'HEALTH_FAILURE_THRESHOLD', 1)
+    monkeypatch.setattr(config, 'HEALTH_SLOW_SECONDS', 0.3)
+    monkeypatch.setattr(config, 'RATE_LIMIT', True)
+    monkeypatch.setattr(config, 'RATE_LIMIT_SAFETY', 1.0)
+    monkeypatch.setattr(config, 'RATE_LIMIT_MAX_WAIT', 5.0)
+    monkeypatch.setattr(config, 'RATE_LIMIT_COALESCE_WINDOW', 0.0)
+    monkeypatch.setattr(base, 'health', tracker)
+    monkeypatch.setattr(aio, 'health', tracker)
+    local_server.route('/ping', (200, {}, {}))
+    exchange = BinanceExchange()
+    exchange.name = 'Throttled'
+    exchange.base_url = local_server.url
+    exchange.rate_limit = (1, 1.0)
+    return exchange
+
+def test_rate_limit_waits_are_not_latency(tracker, throttled):
+    started = time.perf_counter()
+    for _ in range(3):
+        assert throttled._get('/ping') == {}
+    # Two of the requests waited out the bucket, far longer than HEALTH_SLOW_SECONDS
+    assert time.perf_counter() - started >= 1.5
+    status = tracker.status(['Throttled'])['Throttled']
+    assert (status['state'], status['requests'], status['errors']) == (CLOSED, 3, 0)
+
+def test_async_rate_limit_waits_are_not_latency(tracker, throttled):
+    async def fetch():
+        async with aiohttp.ClientSession() as session:
+            client = AsyncExchange(throttled, session)
+            return [await client._get('/ping') for _ in range(3)]
+
+    assert asyncio.run(fetch()) == [{}] * 3
+    status = tracker.status(['Throttled'])['Throttled']
+    assert (status['state'], status['requests'], status['errors']) == (CLOSED, 3, 0)
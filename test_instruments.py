@@ -0,0 +1,54 @@
+"""
+Instrument registry lookups and persistence (no network).
+
+Run with `python -m pytest test_instruments.py`.
+"""
+
+import pytest
+
+from instruments import InstrumentRegistry, REGISTRY_FILE
+from market_data import MarketSnapshot
+from symbol_cache import SymbolTable
+from ticker_book import TickerBook
+
+@pytest.mark.parametrize('native', ['BTCUSDT', 'BTC-USDT', 'btcusdt', 'BTC_USDT'])
+def test_every_spelling_resolves_to_one_instrument(native):
+    registry = InstrumentRegistry()
+    iid = registry.register('X', native, 'btc', 'USDT')
+    for spelling in ('BTC-USDT', 'btcusdt', 'BTC/USDT', 'BTCUSDT', 'btc_usdt'):
+        assert registry.lookup('X', spelling) == iid
+    assert registry.lookup('Y', 'BTCUSDT') is None
+    assert registry.lookup('X', 'ETHUSDT') is None
+    assert [registry.coins[c] for c in registry.base_quote(iid)] == ['BTC', 'USDT']
+    assert registry.symbol(iid) == native
+
+def test_join_matches_tickers_spelled_differently():
+    table = SymbolTable.from_records([
+        {'symbol': 'BTC-USDT', 'base': 'BTC', 'quote': 'USDT', 'fee_taker': 0.001},
+        {'symbol': 'ETH-USDT', 'base': 'ETH', 'quote': 'USDT', 'fee_taker': 0.001},
+    ])
+    tickers = TickerBook.from_dict({
+        'btcusdt': {'bid': 60000.0, 'ask': 60001.0, 'bidQty': 1.0, 'askQty': 2.0},
+        'ETH/USDT': {'bid': 3000.0, 'ask': 3000.5, 'bidQty': 5.0, 'askQty': 6.0},
+    })
+    snap = MarketSnapshot.join('Spelled', table, tickers)
+    assert snap.quotes() == {'BTC-USDT': (60000.0, 60001.0), 'ETH-USDT': (3000.0, 3000.5)}
+
+def test_concurrent_saves_merge():
+    # Two workers starting from the same file, each registering its own instruments
+    seed = InstrumentRegistry()
+    seed.register('X', 'BTCUSDT', 'BTC', 'USDT')
+    seed.save()
+    first, second = InstrumentRegistry.load(REGISTRY_FILE), InstrumentRegistry.load(REGISTRY_FILE)
+    first.register('X', 'ETHUSDT', 'ETH', 'USDT')
+    second.register('Y', 'SOL-USDC', 'SOL', 'USDC')
+    first.save()
+    second.save()
+    assert not first.dirty and not second.dirty
+
+    merged = InstrumentRegistry.load(REGISTRY_FILE)
+    assert [(exchange, symbol) for exchange, symbol, _, _ in merged.instruments] == [
+        ('X', 'BTCUSDT'), ('X', 'ETHUSDT'), ('Y', 'SOL-USDC')]
+    # Coins are remapped to the file's ids
+    for exchange, symbol, base, quote in (('X', 'ETHUSDT', 'ETH', 'USDT'), ('Y', 'SOL-USDC', 'SOL', 'USDC')):
+        assert [merged.coins[c] for c in merged.base_quote(merged.lookup(exchange, symbol))] == [base, quote]
@@ -0,0 +1,110 @@
+"""
+Live graph reuse across in-process scans (main.get_graph / get_pruned_graph)
+against fresh builds, and sharded DFS against the plain one (no network).
+
+Run with `python -m pytest test_main.py`.
+"""
+
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+import main
+from exchanges import BinanceExchange
+from graph import MarketGraph, CompactGraph
+from graph_pruning import GraphPruner
+from filters import OpportunityFilter
+from market_data import MarketData
+from symbol_cache import SymbolTable
+from ticker_book import TickerBook
+
+pytestmark = pytest.mark.usefixtures('search_settings')
+
+@pytest.fixture(autouse=True)
+def live_graphs(monkeypatch):
+    monkeypatch.setattr(main, '_LIVE_GRAPHS', {})
+    monkeypatch.setattr(config, 'PRUNE_GRAPH', True)
+
+def market_data(market, pairs: list) -> MarketData:
+    """
+    MarketData of one scan, with the universe and tickers handed in (as run_analysis does).
+    """
+    data = MarketData(BinanceExchange())
+    data.update_data(SymbolTable.from_records(pairs), TickerBook.from_dict(market.tickers(pairs)))
+    return data
+
+def scan(market, pairs: list):
+    data = market_data(market, pairs)
+    graph = main.get_graph(market.exchange, data, reuse_graph=True)
+    pruned, _ = main.get_pruned_graph(market.exchange, graph, data.snapshot, reuse_graph=True)
+    return graph, pruned, data.snapshot
+
+def fresh(market, graph_cls, snapshot):
+    pruned, _ = GraphPruner.prune(market.graph(graph_cls, snapshot), snapshot)
+    return pruned
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+def test_reused_pruned_graph_follows_prices_and_symbol_diffs(market, graph_cls, monkeypatch):
+    monkeypatch.setattr(config, 'COMPACT_GRAPH', graph_cls is CompactGraph)
+    pairs = market.pairs()
+    graph, pruned, _ = scan(market, pairs)
+
+    # Same universe, new prices: both graphs are updated in place
+    for p in pairs[::7]:
+        p['bid'] *= 1.003
+        p['ask'] *= 1.003
+    again, repriced, snap = scan(market, pairs)
+    assert again is graph and repriced is pruned
+    assert market.edge_set(repriced) == market.edge_set(fresh(market, graph_cls, snap))
+
+    # Symbol refresh: the graph is patched (apply_diff) and the pruned graph redone
+    refreshed = market.refreshed(pairs)
+    patched, repruned, snap = scan(market, refreshed)
+    expected = fresh(market, graph_cls, snap)
+    assert patched is graph and repruned is not pruned
+    assert market.edge_set(repruned) == market.edge_set(expected)
+    assert market.passing(market.search(repruned, 'INDEX')) == market.passing(market.search(expected, 'DFS'))
+
+    # And prices move again on the patched universe
+    for p in refreshed[::5]:
+        p['bid'] *= 0.998
+        p['ask'] *= 0.998
+    patched, repriced, snap = scan(market, refreshed)
+    expected = fresh(market, graph_cls, snap)
+    assert patched is graph and repriced is repruned
+    assert market.edge_set(repriced) == market.edge_set(expected)
+    assert market.passing(market.search(repriced, 'INDEX')) == market.passing(market.search(expected, 'DFS'))
+
+def sharded_in_worker(graph, shards: int) -> dict:
+    """
+    search_sharded from inside a process pool worker (as analyze_exchange runs under run_analysis).
+    """
+    return main.search_sharded(graph, 'DFS', shards)
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+@pytest.mark.parametrize('nested', [False, True])
+def test_sharded_dfs_matches_dfs(market, reference, graph_cls, nested):
+    graph = graph_cls()
+    graph.build(market.pairs())
+    plans = main.plan_shards(graph, 3)
+    assert len(plans) == 3
+    # Every first hop of every stablecoin lands in exactly one shard
+    hops = sorted((coin, i) for plan in plans for coin, first in plan.items() for i in first)
+    assert hops == sorted((coin, i) for coin in config.STABLECOINS for i in range(len(graph.get_neighbors(coin))))
+
+    if nested:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(sharded_in_worker, graph, 3).result(timeout=120)
+    else:
+        result = main.search_sharded(graph, 'DFS', 3)
+    assert result['search_complete']
+    opportunities = result['opportunities']
+    assert market.passing(opportunities) == market.passing(reference)
+    assert market.top_amounts(opportunities) == market.top_amounts(reference)
+    # What analyze_exchange reports from them (filter drops raw_path)
+    def reported(ops):
+        return {(op['start_coin'], tuple((leg['symbol'], leg['action']) for leg in op['fee_breakdown']),
+                 op['end_amount']) for op in OpportunityFilter.filter(ops)}
+    assert reported(opportunities) == reported(reference)
+    top = OpportunityFilter.get_top_opportunities(opportunities, limit=config.TOP_K)
+    assert [op['end_amount'] for op in top] == market.top_amounts(reference)
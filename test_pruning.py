@@ -0,0 +1,106 @@
+"""
+Graph pruning against unpruned searches (no network).
+
+The structural stages must not change any search result; the liquidity
+floor hides thin books and shows them again when their sizes come back.
+
+Run with `python -m pytest test_pruning.py`.
+"""
+
+import pytest
+
+import config
+from graph import MarketGraph, CompactGraph
+from graph_pruning import GraphPruner
+
+pytestmark = pytest.mark.usefixtures('search_settings')
+
+def pair(base: str, quote: str, mid: float, qty: float = 10.0) -> dict:
+    return {'symbol': f"{base}{quote}", 'base': base, 'quote': quote, 'fee_taker': 0.001,
+            'bid': mid * 0.9995, 'ask': mid * 1.0005, 'bidQty': qty, 'askQty': qty}
+
+@pytest.fixture
+def pairs(market) -> list:
+    """
+    The synthetic market plus coins no depth-3 stablecoin cycle can use:
+    Z1 only trades against BTC (degree stage), Z2/Z3 form a five-trade
+    detour BTC -> Z2 -> Z3 -> ETH (reach stage), and Z4 only trades against
+    USDT (a two-trade round trip, kept while MIN_TRADES <= 2).
+    """
+    return market.pairs() + [pair('Z1', 'BTC', 1e-5), pair('Z2', 'BTC', 2e-5), pair('Z3', 'Z2', 1.5),
+                             pair('Z3', 'ETH', 6e-4), pair('Z4', 'USDT', 3.0)]
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+@pytest.mark.parametrize('mode', ['DFS', 'INDEX', 'BEST_FIRST', 'MEET_IN_MIDDLE'])
+def test_pruned_search_matches_unpruned(market, pairs, graph_cls, mode):
+    snap = market.snapshot(pairs)
+    graph = market.graph(graph_cls, snap)
+    pruned, stats = GraphPruner.prune(graph, snap)
+
+    assert stats['degree'] > 0 and stats['reach'] > 0 and stats['liquidity'] == 0
+    assert stats['edges_after'] == len(pruned.edges) < len(graph.edges)
+    assert not {'Z1', 'Z2', 'Z3'} & set(pruned.adj)
+    # The input graph is left untouched
+    assert market.edge_set(graph) == market.edge_set(market.graph(graph_cls, snap))
+
+    expected = market.search(graph, mode)
+    opportunities = market.search(pruned, mode)
+    assert market.passing(opportunities) == market.passing(expected)
+    if mode != 'MEET_IN_MIDDLE':
+        assert market.top_amounts(opportunities) == market.top_amounts(expected)
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+def test_stablecoin_round_trip_is_kept_for_two_trades(market, pairs, graph_cls, monkeypatch):
+    snap = market.snapshot(pairs)
+    pruned, _ = GraphPruner.prune(market.graph(graph_cls, snap), snap)
+    assert pruned.get_edge('Z4USDT', 'BUY') is not None and pruned.get_edge('Z4USDT', 'SELL') is not None
+
+    monkeypatch.setattr(config, 'MIN_TRADES', 3)
+    pruned, _ = GraphPruner.prune(market.graph(graph_cls, snap), snap)
+    assert 'Z4' not in pruned.adj
+    assert pruned.get_edge('Z4USDT', 'BUY') is None
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+def test_liquidity_floor_hides_and_restores_thin_books(market, pairs, graph_cls, monkeypatch):
+    monkeypatch.setattr(config, 'MIN_EDGE_NOTIONAL', 50.0)
+    thin = next(p for p in pairs if p['symbol'] == 'A07USDT')
+    thin['askQty'] = 0.0
+    thin['bidQty'] = 40.0 / thin['bid']
+    snap = market.snapshot(pairs)
+    graph = market.graph(graph_cls, snap)
+    pruned, stats = GraphPruner.prune(graph, snap)
+
+    # Alts trade ~10 units at 0.01-100 USDT, so some books are under the floor as well
+    assert stats['liquidity'] >= 2
+    assert pruned.get_edge('A07USDT', 'BUY') is None and pruned.get_edge('A07USDT', 'SELL') is None
+    assert len(pruned.edges) == stats['edges_after']
+    with monkeypatch.context() as patch:
+        patch.setattr(config, 'MIN_EDGE_NOTIONAL', None)
+        structural, _ = GraphPruner.prune(graph, snap)
+    assert len(pruned.edges) == len(structural.edges) - stats['liquidity']
+
+    # Sizes come back: the edges are shown again, at the new prices
+    thin['askQty'] = thin['bidQty'] = 1000.0
+    thin['bid'] *= 1.001
+    thin['ask'] *= 1.001
+    snap = market.snapshot(pairs)
+    graph.update_prices(snap)
+    stats = GraphPruner.update(pruned, snap)
+    assert pruned.get_edge('A07USDT', 'BUY')['price'] == thin['ask']
+    assert pruned.get_edge('A07USDT', 'SELL')['price'] == thin['bid']
+    assert len(pruned.edges) == stats['edges_after']
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+def test_venue_without_sizes_is_not_masked(market, pairs, graph_cls, monkeypatch):
+    monkeypatch.setattr(config, 'MIN_EDGE_NOTIONAL', 50.0)
+    # e.g. KuCoin's allTickers: no sizes at all
+    for p in pairs:
+        p['bidQty'] = p['askQty'] = 0.0
+    snap = market.snapshot(pairs)
+    graph = market.graph(graph_cls, snap)
+    pruned, stats = GraphPruner.prune(graph, snap)
+    assert stats['liquidity'] == 0
+
+    monkeypatch.setattr(config, 'MIN_EDGE_NOTIONAL', None)
+    unfloored, _ = GraphPruner.prune(graph, snap)
+    assert market.edge_set(pruned) == market.edge_set(unfloored)
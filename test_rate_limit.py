@@ -0,0 +1,99 @@
+"""
+Token bucket and request coalescing state transitions (no network).
+
+Run with `python -m pytest test_rate_limit.py`.
+"""
+
+import time
+import threading
+import pytest
+
+import config
+from exchanges.rate_limit import RateLimiter
+
+# (capacity, window): 10 weight per second, 8 after the safety margin
+LIMIT = (10, 1.0)
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'RATE_LIMIT_SAFETY', 0.8)
+    monkeypatch.setattr(config, 'RATE_LIMIT_COALESCE_WINDOW', 0.2)
+    return RateLimiter(str(tmp_path))
+
+def test_bucket_drains_and_refills(limiter):
+    assert limiter.acquire('X', 8, LIMIT, max_wait=0)
+    assert limiter.headroom('X')['X']['tokens'] < 1
+    # Empty bucket: not within 0s, but within the refill time
+    assert not limiter.acquire('X', 4, LIMIT, max_wait=0)
+    started = time.time()
+    assert limiter.acquire('X', 4, LIMIT, max_wait=2)
+    assert 0.3 < time.time() - started < 1.5
+
+def test_weight_is_capped_at_capacity(limiter):
+    # A request heavier than the whole budget waits for a full bucket instead of forever
+    assert limiter.acquire('X', 100, LIMIT, max_wait=0)
+    assert not limiter.acquire('X', 1, LIMIT, max_wait=0)
+
+def test_bucket_is_shared_through_its_state_file(limiter, tmp_path):
+    other = RateLimiter(str(tmp_path))
+    assert limiter.acquire('X', 8, LIMIT, max_wait=0)
+    assert not other.acquire('X', 4, LIMIT, max_wait=0)
+
+def test_venue_count_corrects_the_bucket(limiter):
+    assert limiter.acquire('X', 1, LIMIT, max_wait=0)
+    limiter.observe('X', LIMIT, remaining=4)
+    # 4 left at the venue, minus the 2 reserved by the safety margin
+    assert limiter.headroom('X')['X']['tokens'] == pytest.approx(2, abs=0.1)
+
+def test_429_blocks_until_retry_after(limiter):
+    assert limiter.acquire('X', 1, LIMIT, max_wait=0)
+    limiter.observe('X', LIMIT, retry_after=0.5)
+    assert limiter.headroom('X')['X']['blocked_for'] > 0
+    assert not limiter.acquire('X', 1, LIMIT, max_wait=0.1)
+    started = time.time()
+    assert limiter.acquire('X', 1, LIMIT, max_wait=2)
+    assert time.time() - started > 0.2
+    assert limiter.headroom('X')['X']['blocked_for'] == 0.0
+
+def test_coalesce_runs_one_fetch_for_concurrent_callers(limiter):
+    calls = []
+    release = threading.Event()
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {'ok': True}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(limiter.coalesce(('X', 'tickers'), fetch)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == [{'ok': True}] * 5
+
+def test_coalesce_reuses_within_the_window_only(limiter):
+    calls = []
+    def fetch():
+        calls.append(1)
+        return len(calls)
+
+    assert limiter.coalesce(('X', 'a'), fetch) == 1
+    assert limiter.coalesce(('X', 'a'), fetch) == 1
+    time.sleep(0.3)
+    assert limiter.coalesce(('X', 'a'), fetch) == 2
+
+def test_failed_fetches_are_not_reused(limiter):
+    results = iter([None, 'ok'])
+    assert limiter.coalesce(('X', 'a'), lambda: next(results)) is None
+    assert limiter.coalesce(('X', 'a'), lambda: next(results)) == 'ok'
+
+def test_finished_flights_are_evicted(limiter):
+    for i in range(50):
+        limiter.coalesce(('X', i), lambda: 'ok')
+    time.sleep(0.3)
+    limiter.coalesce(('X', 'last'), lambda: 'ok')
+    assert list(limiter._flights) == [('X', 'last')]
@@ -0,0 +1,115 @@
+"""
+Search mode equivalence on a synthetic market (no network).
+
+Every exhaustive mode must report the same cycles as the plain DFS: the
+passing set (MIN_PROFIT_PERCENT) and the TOP_K best. NEGATIVE_CYCLE only
+reports net-gain loops of any length, so it is checked for those.
+
+Run with `python -m pytest test_search.py`.
+"""
+
+import pytest
+
+from graph import MarketGraph, CompactGraph
+from cycle_evaluator import CycleEvaluator
+from negative_cycles import NegativeCycleFinder
+
+pytestmark = pytest.mark.usefixtures('search_settings')
+
+def test_reference_has_passing_and_profitable_cycles(market, reference):
+    assert 120 <= len(market.pairs()) <= 150
+    assert len(market.passing(reference)) > 0
+    assert any(op['profit'] > 0 for op in reference)
+
+@pytest.mark.parametrize('mode', ['DFS', 'INDEX', 'INCREMENTAL', 'BEST_FIRST'])
+def test_mode_matches_dfs(market, reference, mode):
+    graph = MarketGraph()
+    graph.build(market.pairs())
+    opportunities = market.search(graph, mode)
+    assert market.passing(opportunities) == market.passing(reference)
+    assert market.top_amounts(opportunities) == market.top_amounts(reference)
+
+def test_meet_in_middle_matches_dfs(market, reference):
+    graph = MarketGraph()
+    graph.build(market.pairs())
+    opportunities = market.search(graph, 'MEET_IN_MIDDLE')
+    # Joins only report cycles that can reach the cutoff, so compare what passes
+    assert market.passing(opportunities) == market.passing(reference)
+
+def test_compact_graph_dfs_matches_dfs(market, reference):
+    graph = CompactGraph()
+    graph.build(market.pairs())
+    opportunities = market.search(graph, 'DFS')
+    assert market.passing(opportunities) == market.passing(reference)
+    assert market.top_amounts(opportunities) == market.top_amounts(reference)
+
+def test_negative_cycles_are_profitable(market, reference):
+    graph = MarketGraph()
+    graph.build(market.pairs())
+    opportunities = market.search(graph, 'NEGATIVE_CYCLE')
+    # The DFS finds net-gain cycles, so there are negative cycles to detect
+    assert any(op['profit'] > 0 for op in reference) and opportunities
+    for op in opportunities:
+        assert op['profit'] > 0
+        legs = op['raw_path']
+        assert legs[0]['from'] == legs[-1]['to'] == op['start_coin']
+        assert all(a['to'] == b['from'] for a, b in zip(legs, legs[1:]))
+
+def test_loops_without_a_stablecoin_do_not_use_up_rounds():
+    def pair(base, quote, mid):
+        return {'symbol': base + quote, 'base': base, 'quote': quote, 'fee_taker': 0.001,
+                'bid': mid * 0.9999, 'ask': mid * 1.0001}
+    # Two loops among alts (A-B-C, A-E-F) far more profitable than the one through USDT (USDT-D-A)
+    graph = MarketGraph()
+    graph.build([pair('A', 'USDT', 1.0), pair('D', 'USDT', 2.0), pair('D', 'A', 2.02),
+                 pair('B', 'A', 1.0), pair('C', 'B', 1.0), pair('C', 'A', 1.05),
+                 pair('E', 'A', 1.0), pair('F', 'E', 1.0), pair('F', 'A', 1.06)])
+    finder = NegativeCycleFinder(graph)
+
+    cycles = finder.find_cycles(max_rounds=1)
+    assert [(start, [e['symbol'] for e in legs]) for start, legs in cycles] == [('USDT', ['DUSDT', 'DA', 'AUSDT'])]
+    # Giving up after the first rejected loop never reaches it
+    assert finder.find_cycles(max_rounds=1, max_rejects=1) == []
+
+def test_incremental_follows_price_changes(market):
+    graph = MarketGraph()
+    graph.build(market.pairs())
+    market.search(graph, 'INCREMENTAL')
+
+    # Move some books in place, then compare against a fresh graph at the new prices
+    moved = market.pairs()
+    for p in moved[::9]:
+        p['bid'] *= 1.003
+        p['ask'] *= 1.003
+    for p in moved:
+        graph.get_edge(p['symbol'], 'BUY')['price'] = p['ask']
+        graph.get_edge(p['symbol'], 'SELL')['price'] = p['bid']
+    fresh = MarketGraph()
+    fresh.build(moved)
+
+    opportunities = market.search(graph, 'INCREMENTAL')
+    expected = market.search(fresh, 'INDEX')
+    assert market.passing(opportunities) == market.passing(expected)
+    assert market.top_amounts(opportunities) == market.top_amounts(expected)
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+def test_incremental_rescores_from_snapshot_diffs(market, graph_cls, monkeypatch):
+    pairs = market.pairs()
+    graph = market.graph(graph_cls, market.snapshot(pairs))
+    market.search(graph, 'INCREMENTAL')
+
+    for p in pairs[::9]:
+        p['bid'] *= 1.003
+        p['ask'] *= 1.003
+    snap = market.snapshot(pairs)
+    graph.update_prices(snap)
+
+    # Same graph and rows: the moved rows come from the snapshot diff, not a read of every leg
+    def read_prices(self, graph):
+        raise AssertionError("full price read")
+    with monkeypatch.context() as patch:
+        patch.setattr(CycleEvaluator, 'read_prices', read_prices)
+        opportunities = market.search(graph, 'INCREMENTAL')
+    expected = market.search(market.graph(graph_cls, snap), 'INDEX')
+    assert market.passing(opportunities) == market.passing(expected)
+    assert market.top_amounts(opportunities) == market.top_amounts(expected)
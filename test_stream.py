@@ -0,0 +1,183 @@
+"""
+Book stream test against a local stand-in venue (REST tickers + book-ticker
+WebSocket), speaking the Binance and HTX protocols.
+
+Run with `python -m pytest test_stream.py`.
+"""
+
+import gzip
+import json
+import time
+import asyncio
+import threading
+import pytest
+from aiohttp import web, WSMsgType
+
+import config
+from exchanges import BinanceExchange, HTXExchange
+import book_stream
+from book_stream import book_streams
+from symbol_store import SymbolStore
+
+class LocalVenue:
+    """
+    REST all-tickers endpoint + book-ticker WebSocket on 127.0.0.1, in a background thread.
+    """
+    def __init__(self, protocol: str):
+        self.protocol = protocol
+        self.book = {'BTCUSDT': [60000.0, 1.0, 60001.0, 2.0], 'ETHUSDT': [3000.0, 5.0, 3000.5, 6.0]}
+        self.subscribed = []
+        self.pongs = []
+        self.sockets = []
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        threading.Thread(target=self._serve, args=(ready,), daemon=True).start()
+        ready.wait(5)
+
+    def _serve(self, ready):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get('/tickers', self._tickers)
+        app.router.add_get('/ws', self._ws)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def _tickers(self, request):
+        if self.protocol == 'binance':
+            data = [{"symbol": s, "bidPrice": str(b), "bidQty": str(bq), "askPrice": str(a), "askQty": str(aq)}
+                    for s, (b, bq, a, aq) in self.book.items()]
+        else:
+            data = {"status": "ok", "data": [{"symbol": s.lower(), "bid": b, "bidSize": bq, "ask": a, "askSize": aq}
+                                             for s, (b, bq, a, aq) in self.book.items()]}
+        return web.json_response(data)
+
+    async def _ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self.sockets.append(ws)
+        if self.protocol == 'htx':
+            await ws.send_bytes(gzip.compress(json.dumps({"ping": 123}).encode()))
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+            message = json.loads(msg.data)
+            if 'params' in message:
+                self.subscribed += message['params']
+                await ws.send_json({"result": None, "id": message['id']})
+            elif 'sub' in message:
+                self.subscribed.append(message['sub'])
+            elif 'pong' in message:
+                self.pongs.append(message['pong'])
+        self.sockets.remove(ws)
+        return ws
+
+    def push(self, symbol: str, bid: float, bid_qty: float, ask: float, ask_qty: float):
+        """
+        Send a book-ticker update to every connected client.
+        """
+        if self.protocol == 'binance':
+            frame = json.dumps({"u": 1, "s": symbol, "b": str(bid), "B": str(bid_qty), "a": str(ask), "A": str(ask_qty)})
+            send = lambda ws: ws.send_str(frame)
+        else:
+            frame = gzip.compress(json.dumps({"ch": f"market.{symbol.lower()}.bbo", "ts": 1, "tick": {
+                "symbol": symbol.lower(), "bid": bid, "bidSize": bid_qty, "ask": ask, "askSize": ask_qty}}).encode())
+            send = lambda ws: ws.send_bytes(frame)
+
+        async def broadcast():
+            for ws in list(self.sockets):
+                await send(ws)
+        asyncio.run_coroutine_threadsafe(broadcast(), self.loop).result(5)
+
+    def drop_connections(self):
+        async def close():
+            for ws in list(self.sockets):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(5)
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+@pytest.fixture(autouse=True)
+def stream_env(monkeypatch):
+    """
+    Streams seeded from a local venue, whatever other tests did to the
+    process-wide breaker, rate limiter and symbol store (with an empty store
+    and no symbol caches in the conftest tmp_path, streams subscribe to the
+    REST snapshot's symbols). Every stream is stopped afterwards.
+    """
+    monkeypatch.setattr(config, 'CIRCUIT_BREAKER', False)
+    monkeypatch.setattr(config, 'RATE_LIMIT', False)
+    monkeypatch.setattr(book_stream, 'symbol_store', SymbolStore())
+    venues = []
+    yield venues
+    book_streams.stop()
+    assert book_streams.status() == {}
+    for venue in venues:
+        venue.close()
+
+def start_stream(exchange, venue: LocalVenue):
+    exchange.base_url = f"http://127.0.0.1:{venue.port}"
+    exchange.tickers_endpoint = ("/tickers", None)
+    exchange.stream_url = f"ws://127.0.0.1:{venue.port}/ws"
+    book_streams.start([exchange.name], exchanges={exchange.name: exchange})
+    assert wait_for(lambda: book_streams.snapshot(exchange.name) is not None), book_streams.status()
+
+def test_binance_stream(stream_env):
+    venue = LocalVenue('binance')
+    stream_env.append(venue)
+    exchange = BinanceExchange()
+    start_stream(exchange, venue)
+    assert sorted(venue.subscribed) == ['btcusdt@bookTicker', 'ethusdt@bookTicker']
+
+    # Seeded from REST
+    book = exchange.fetch_tickers()
+    assert book.decoder == 'stream'
+    assert book['BTCUSDT'] == {'bid': 60000.0, 'ask': 60001.0, 'bidQty': 1.0, 'askQty': 2.0}
+
+    # Stream updates land in the store; untouched symbols keep their values
+    venue.push('BTCUSDT', 60010.0, 0.5, 60011.0, 0.7)
+    assert wait_for(lambda: exchange.fetch_tickers()['BTCUSDT']['bid'] == 60010.0)
+    book = exchange.fetch_tickers()
+    assert book['BTCUSDT'] == {'bid': 60010.0, 'ask': 60011.0, 'bidQty': 0.5, 'askQty': 0.7}
+    assert book['ETHUSDT']['ask'] == 3000.5
+
+    # A new listing seen only on the stream is added
+    venue.push('SOLUSDT', 150.0, 10.0, 150.1, 11.0)
+    assert wait_for(lambda: 'SOLUSDT' in exchange.fetch_tickers())
+
+    # Dropped connections: the stream is unusable (REST fallback), then reconnects and re-seeds
+    connections = venue.connections
+    venue.book['ETHUSDT'] = [3100.0, 1.0, 3100.5, 1.0]
+    venue.drop_connections()
+    assert wait_for(lambda: venue.connections > connections and book_streams.snapshot('Binance') is not None, timeout=15)
+    assert exchange.fetch_tickers()['ETHUSDT']['bid'] == 3100.0
+    assert book_streams.status()['Binance']['reconnects'] >= 1
+
+def test_htx_gzip_stream(stream_env):
+    venue = LocalVenue('htx')
+    stream_env.append(venue)
+    exchange = HTXExchange()
+    start_stream(exchange, venue)
+    assert sorted(venue.subscribed) == ['market.btcusdt.bbo', 'market.ethusdt.bbo']
+    # Application-level heartbeat answered
+    assert wait_for(lambda: venue.pongs == [123])
+
+    venue.push('ETHUSDT', 2990.0, 3.0, 2990.5, 4.0)
+    assert wait_for(lambda: exchange.fetch_tickers()['ethusdt']['ask'] == 2990.5)
+    assert exchange.fetch_tickers()['btcusdt']['bid'] == 60000.0
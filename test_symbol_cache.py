@@ -0,0 +1,92 @@
+"""
+Compact symbol cache round trips and the in-process symbol store (no network).
+
+Run with `python -m pytest test_symbol_cache.py`.
+"""
+
+import os
+import json
+import time
+import pytest
+
+from symbol_cache import SymbolCache, SymbolTable
+from symbol_store import SymbolStore
+
+@pytest.fixture
+def records(market) -> list:
+    """
+    Symbol records (no quotes) of the synthetic market.
+    """
+    return [{key: p[key] for key in ('symbol', 'base', 'quote', 'fee_taker')}
+            for p in market.pairs()]
+
+def test_encode_decode_round_trip(records):
+    table = SymbolTable.from_records(records)
+    decoded = SymbolCache.decode(SymbolCache.encode(table))
+    assert decoded.symbols == table.symbols
+    assert decoded.coins == table.coins
+    assert decoded.records() == table.records()
+
+def test_empty_table_round_trip():
+    decoded = SymbolCache.decode(SymbolCache.encode(SymbolTable.from_records([])))
+    assert len(decoded) == 0
+    assert decoded.records() == []
+
+def test_corrupt_buffers_are_rejected(records):
+    buffer = SymbolCache.encode(SymbolTable.from_records(records))
+    with pytest.raises(ValueError):
+        SymbolCache.decode(buffer[:-1])
+    with pytest.raises(ValueError):
+        SymbolCache.decode(b'XXXX' + buffer[4:])
+
+def test_save_load_round_trip(records, tmp_path):
+    saved = SymbolCache.save('Synthetic', records, str(tmp_path))
+    loaded = SymbolCache.load('Synthetic', str(tmp_path))
+    assert loaded.records() == saved.records() == SymbolTable.from_records(records).records()
+    assert SymbolCache.age('Synthetic', str(tmp_path)) is not None
+
+def test_legacy_cache_is_migrated(records, tmp_path):
+    with open(SymbolCache.legacy_path('Synthetic', str(tmp_path)), 'w') as f:
+        json.dump(records, f)
+    loaded = SymbolCache.load('Synthetic', str(tmp_path))
+    assert loaded.records() == SymbolTable.from_records(records).records()
+    assert (tmp_path / 'cache_symbols_Synthetic.bin').exists()
+
+def test_refresh_uses_a_fresh_cache_and_fetches_a_stale_one(records, tmp_path):
+    calls = []
+    def fetch():
+        calls.append(1)
+        return records
+
+    SymbolCache.save('Synthetic', records[:10], str(tmp_path))
+    # Written after newer_than: another process already refreshed it
+    table = SymbolCache.refresh('Synthetic', fetch, newer_than=0.0, directory=str(tmp_path))
+    assert len(table) == 10 and not calls
+
+    table = SymbolCache.refresh('Synthetic', fetch, newer_than=float('inf'), directory=str(tmp_path))
+    assert len(table) == len(records) and calls == [1]
+
+def test_live_refresh_is_fresh_even_if_the_cache_save_fails(records, monkeypatch):
+    class Venue:
+        name = 'Synthetic'
+        def fetch_symbols(self):
+            return records
+
+    # A day-old cache, served stale until the refresh
+    SymbolCache.save('Synthetic', records[:10])
+    day_ago = time.time() - 86400
+    os.utime(SymbolCache.path('Synthetic'), (day_ago, day_ago))
+    store = SymbolStore(ttl=3600)
+    monkeypatch.setattr(store, 'refresh_async', lambda exchange: None)
+    assert len(store.get(Venue())) == 10
+    assert store.status()['Synthetic']['stale']
+
+    def read_only(path, data):
+        raise OSError("read-only file system")
+    monkeypatch.setattr(SymbolCache, '_write_atomic', staticmethod(read_only))
+    assert len(store.refresh(Venue())) == len(records)
+    status = store.status()['Synthetic']
+    assert not status['stale'] and status['age'] < 60
+    # The old file is still there, but the store keeps the live table
+    assert SymbolCache.age('Synthetic') > 3600
+    assert len(store.get(Venue())) == len(records)
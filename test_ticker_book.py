@@ -0,0 +1,161 @@
+"""
+Projected all-tickers decoding per venue against the adapters' JSON parsers,
+and the async client's fetches against the blocking ones (against a local
+server, no network).
+
+Run with `python -m pytest test_ticker_book.py`.
+"""
+
+import json
+import socket
+import pytest
+
+import config
+from exchanges import get_exchange
+from exchanges.aio import AsyncClient
+from exchanges.base import transport
+from ticker_book import TickerBook
+
+TICKERS = [('BTCUSDT', 60000.5, 1.25, 60001.0, 0.5), ('ETHUSDT', 3000.25, 12.0, 3000.5, 7.5),
+           ('SOLUSDT', 150.1, 300.0, 150.2, 0.0)]
+
+def binance_like(rows: list) -> list:
+    return [{'symbol': s, 'bidPrice': str(b), 'bidQty': str(bq), 'askPrice': str(a), 'askQty': str(aq)}
+            for s, b, bq, a, aq in rows]
+
+def bybit(rows: list) -> dict:
+    tickers = [{'symbol': s, 'bid1Price': str(b), 'bid1Size': str(bq), 'ask1Price': str(a), 'ask1Size': str(aq),
+                'lastPrice': str(b), 'volume24h': '1000'} for s, b, bq, a, aq in rows]
+    return {'retCode': 0, 'retMsg': 'OK', 'result': {'category': 'spot', 'list': tickers}}
+
+def htx(rows: list) -> dict:
+    tickers = [{'symbol': s.lower(), 'open': b, 'close': a, 'bid': b, 'bidSize': bq, 'ask': a, 'askSize': aq}
+               for s, b, bq, a, aq in rows]
+    return {'status': 'ok', 'ts': 1, 'data': tickers}
+
+def kucoin(rows: list) -> dict:
+    tickers = [{'symbol': f"{s[:-4]}-USDT", 'symbolName': f"{s[:-4]}-USDT", 'buy': str(b), 'bestBidSize': str(bq),
+                'sell': str(a), 'bestAskSize': str(aq), 'last': str(b)} for s, b, bq, a, aq in rows]
+    return {'code': '200000', 'data': {'time': 1, 'ticker': tickers}}
+
+# Venue -> (response builder, path to its ticker list)
+VENUES = {
+    'Binance': (binance_like, lambda data: data),
+    'MEXC': (binance_like, lambda data: data),
+    'Bybit': (bybit, lambda data: data['result']['list']),
+    'HTX': (htx, lambda data: data['data']),
+    'KuCoin': (kucoin, lambda data: data['data']['ticker']),
+}
+
+def wire(data) -> str:
+    """
+    Compact JSON, as the venues send it.
+    """
+    return json.dumps(data, separators=(',', ':'))
+
+def decode(name: str, text: str):
+    """
+    (decoded book, the adapter's JSON parse of the same text as a dict).
+    """
+    exchange = get_exchange(name)
+    book = exchange._decode_tickers(text)
+    return book, dict(TickerBook.from_dict(exchange._parse_tickers(json.loads(text))))
+
+@pytest.mark.parametrize('name', VENUES)
+def test_projection_matches_json(name):
+    build, _ = VENUES[name]
+    book, parsed = decode(name, wire(build(TICKERS)))
+    assert book.decoder == 'projected'
+    assert dict(book) == parsed and len(book) == 3
+
+@pytest.mark.parametrize('name', VENUES)
+def test_reordered_keys_are_projected_field_by_field(name):
+    build, tickers = VENUES[name]
+    data = build(TICKERS)
+    for i, ticker in enumerate(tickers(data)):
+        tickers(data)[i] = dict(reversed(list(ticker.items())))
+    book, parsed = decode(name, wire(data))
+    assert book.decoder == 'projected'
+    assert dict(book) == parsed
+
+@pytest.mark.parametrize('name', VENUES)
+def test_missing_field_falls_back_to_json(name):
+    build, tickers = VENUES[name]
+    data = build(TICKERS)
+    # The last projected field of the venue, gone from one ticker
+    _, key = get_exchange(name).ticker_fields[-1]
+    del tickers(data)[1][key]
+    book, parsed = decode(name, wire(data))
+    assert book.decoder == 'json'
+    assert dict(book) == parsed and len(book) == 3
+
+@pytest.mark.parametrize('name', VENUES)
+@pytest.mark.parametrize('odd', ['escaped', 'quoted'])
+def test_escaped_symbols_fall_back_to_json(name, odd):
+    build, tickers = VENUES[name]
+    data = build(TICKERS)
+    symbol = tickers(data)[1]['symbol']
+    if odd == 'escaped':
+        # Same symbol with its last letter as a \u escape
+        text = wire(data).replace(f'"{symbol}"', f'"{symbol[:-1]}\\u{ord(symbol[-1]):04x}"')
+    else:
+        tickers(data)[1]['symbol'] = symbol = 'ODD"SYMBOL'
+        text = wire(data)
+    book, parsed = decode(name, text)
+    assert book.decoder == 'json'
+    assert dict(book) == parsed and symbol in book
+
+def test_decode_time_is_in_the_transport_stats():
+    before = transport.stats().get('Binance', {}).get('decodes', 0)
+    book, _ = decode('Binance', wire(binance_like(TICKERS)))
+    stats = transport.stats()['Binance']
+    assert stats['decodes'] == before + 1
+    assert stats['last_decode_seconds'] == book.decode_seconds
+    assert stats['last_decoder'] == 'projected'
+
+@pytest.fixture
+def venues(local_server, monkeypatch) -> dict:
+    """
+    Every venue's adapter, served TICKERS by the local server.
+    """
+    monkeypatch.setattr(config, 'CIRCUIT_BREAKER', False)
+    monkeypatch.setattr(config, 'RATE_LIMIT', False)
+    monkeypatch.setattr(config, 'RATE_LIMIT_COALESCE_WINDOW', 0.0)
+    monkeypatch.setattr(config, 'HTTP_BACKOFF', 0.01)
+    adapters = {}
+    for name, (build, _) in VENUES.items():
+        exchange = get_exchange(name)
+        exchange.base_url = f"{local_server.url}/{name}"
+        local_server.route(f"/{name}{exchange.tickers_endpoint[0]}", (200, {}, wire(build(TICKERS))))
+        adapters[name] = exchange
+    return adapters
+
+def refused_url() -> str:
+    """
+    A local port nothing listens on.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+def test_async_fetch_matches_blocking(venues):
+    down = get_exchange('Binance')
+    down.name = 'Down'
+    down.base_url = refused_url()
+
+    client = AsyncClient()
+    client._exchanges.update(venues, Down=down)
+    try:
+        books = client.fetch_tickers(list(venues) + ['Down'])
+    finally:
+        client.close()
+
+    # The refused venue is left out
+    assert set(books) == set(VENUES)
+    assert down.fetch_rest_tickers() == {}
+    for name, exchange in venues.items():
+        blocking = exchange.fetch_rest_tickers()
+        assert books[name].decoder == blocking.decoder == 'projected'
+        assert list(books[name]) == list(blocking) and len(blocking) == 3
+        assert dict(books[name]) == dict(blocking)
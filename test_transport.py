@@ -0,0 +1,85 @@
+"""
+Transport retries, Retry-After handling and byte accounting against a local
+server (no network).
+
+Run with `python -m pytest test_transport.py`.
+"""
+
+import json
+import time
+import pytest
+import requests
+
+import config
+from exchanges.base import Transport
+
+@pytest.fixture
+def transport(monkeypatch) -> Transport:
+    monkeypatch.setattr(config, 'HTTP_RETRIES', 2)
+    monkeypatch.setattr(config, 'HTTP_BACKOFF', 0.01)
+    monkeypatch.setattr(config, 'HTTP_BACKOFF_MAX', 4.0)
+    monkeypatch.setattr(config, 'RATE_LIMIT_MAX_WAIT', 10.0)
+    return Transport()
+
+def test_server_errors_are_retried(transport, local_server):
+    local_server.route('/t', (503, {}, 'busy'), (502, {}, ''), (200, {}, {'ok': 1}))
+    resp = transport.get('Local', f"{local_server.url}/t")
+    assert resp.json() == {'ok': 1}
+    assert local_server.hits == ['/t'] * 3
+    stats = transport.stats()['Local']
+    assert (stats['requests'], stats['errors'], stats['retries'], stats['last_status']) == (3, 2, 2, 200)
+
+def test_gives_up_after_http_retries(transport, local_server):
+    local_server.route('/t', (500, {}, 'down'))
+    with pytest.raises(requests.HTTPError):
+        transport.get('Local', f"{local_server.url}/t")
+    assert len(local_server.hits) == config.HTTP_RETRIES + 1
+    stats = transport.stats()['Local']
+    assert (stats['requests'], stats['errors'], stats['retries']) == (3, 3, 2)
+
+def test_client_errors_are_not_retried(transport, local_server):
+    local_server.route('/t', (404, {}, 'no such endpoint'))
+    with pytest.raises(requests.HTTPError):
+        transport.get('Local', f"{local_server.url}/t")
+    assert local_server.hits == ['/t']
+
+def test_connection_errors_are_retried(transport, local_server):
+    url = f"{local_server.url}/t"
+    local_server.close()
+    with pytest.raises(requests.ConnectionError):
+        transport.get('Local', url)
+    stats = transport.stats()['Local']
+    assert (stats['requests'], stats['errors'], stats['retries'], stats['wire_bytes']) == (3, 3, 2, 0)
+
+@pytest.mark.parametrize('limit', [None, (1000, 60.0)])
+def test_429_waits_for_retry_after(transport, local_server, limit):
+    local_server.route('/t', (429, {'Retry-After': '0.5'}, ''), (200, {}, {}))
+    started = time.perf_counter()
+    assert transport.get('Local', f"{local_server.url}/t", limit=limit).json() == {}
+    # Slept out by the backoff, or with a limit by the blocked bucket in acquire()
+    assert time.perf_counter() - started >= 0.5
+    assert local_server.hits == ['/t'] * 2
+
+def test_retry_after_is_capped(transport, local_server, monkeypatch):
+    monkeypatch.setattr(config, 'HTTP_BACKOFF_MAX', 0.2)
+    local_server.route('/t', (429, {'Retry-After': '30'}, ''), (200, {}, {}))
+    started = time.perf_counter()
+    transport.get('Local', f"{local_server.url}/t")
+    assert time.perf_counter() - started < 5
+
+@pytest.mark.parametrize('encoding', [None, 'gzip'])
+def test_byte_accounting(transport, local_server, encoding):
+    payload = [{'symbol': f"A{i:03d}USDT", 'bidPrice': '1.0', 'askPrice': '1.1'} for i in range(200)]
+    body = json.dumps(payload)
+    local_server.route('/t', (200, {'Content-Encoding': encoding} if encoding else {}, body))
+    assert transport.get('Local', f"{local_server.url}/t").json() == payload
+    assert transport.get('Local', f"{local_server.url}/t").json() == payload
+
+    stats = transport.stats()['Local']
+    assert stats['body_bytes'] == 2 * len(body)
+    if encoding:
+        # Wire bytes are the compressed ones
+        assert 0 < stats['wire_bytes'] < stats['body_bytes'] / 4
+    else:
+        assert stats['wire_bytes'] == stats['body_bytes']
+    assert stats['avg_seconds'] == pytest.approx(stats['seconds'] / 2)
@@ -0,0 +1,67 @@
+"""
+Symbol universe diffs, graph patches and cycle index patches against
+fresh builds (no network).
+
+Run with `python -m pytest test_universe_diff.py`.
+"""
+
+import pytest
+
+from graph import MarketGraph, CompactGraph
+from cycle_index import CycleIndex
+from symbol_cache import SymbolTable
+from universe_diff import UniverseDiff
+
+pytestmark = pytest.mark.usefixtures('search_settings')
+
+def test_diff_reports_listings_delistings_and_changes(market):
+    old, new = market.pairs(), market.refreshed(market.pairs())
+    diff = UniverseDiff.compute('Synthetic', SymbolTable.from_records(old), SymbolTable.from_records(new))
+
+    assert [p['symbol'] for p in diff.added] == ['A20USDC']
+    assert sorted(p['symbol'] for p in diff.removed) == ['A03ETH', 'A05BTC']
+    changes = {p['symbol']: p['changes'] for p in diff.changed}
+    assert changes == {'A01BTC': {'fee_taker': [0.001, 0.002]}, 'A02ETH': {'quote': ['ETH', 'BTC']}}
+    assert len(diff) == 5
+    assert {'A01', 'A02', 'A03', 'A05', 'A20'} <= diff.coins()
+
+def test_diff_of_identical_tables_is_empty(market):
+    table = SymbolTable.from_records(market.pairs())
+    assert UniverseDiff.compute('Synthetic', table, SymbolTable.from_records(market.pairs())).empty
+    assert UniverseDiff.compute('Synthetic', table, table).empty
+    assert len(UniverseDiff.compute('Synthetic', None, table).added) == len(table)
+
+@pytest.mark.parametrize('graph_cls', [MarketGraph, CompactGraph])
+def test_apply_diff_matches_fresh_build(market, graph_cls):
+    old, new = market.pairs(), market.refreshed(market.pairs())
+    graph = market.graph(graph_cls, market.snapshot(old))
+    graph.track_pairs(old)
+    version = graph.version
+
+    diff = UniverseDiff.compute('Synthetic', SymbolTable.from_records(old), SymbolTable.from_records(new))
+    snap = market.snapshot(new)
+    stats = graph.apply_diff(diff, snap)
+
+    assert (stats['listed'], stats['delisted'], stats['changed']) == (1, 2, 2)
+    assert market.edge_set(graph) == market.edge_set(market.graph(graph_cls, snap))
+    assert set(graph.pairs) == {p['symbol'] for p in new}
+    assert graph.version > version
+
+def test_patched_index_matches_build(market):
+    old, new = market.pairs(), market.refreshed(market.pairs())
+    old_graph = market.graph(MarketGraph, market.snapshot(old))
+    new_graph = market.graph(MarketGraph, market.snapshot(new))
+    old_key, new_key = old_graph.topology_key(), new_graph.topology_key()
+    assert old_key != new_key
+
+    index = CycleIndex()
+    index.build(old_graph)
+    patched = index.patch(new_graph, new_key - old_key, old_key - new_key)
+    built = CycleIndex()
+    built.build(new_graph)
+
+    assert len(patched) == len(built)
+    assert set(patched.cycles) == set(built.cycles)
+    # The patch dropped cycles over delisted pairs and enumerated the new pair's
+    assert len(set(index.cycles) - set(built.cycles)) > 0
+    assert any(('A20USDC', 'BUY') in legs for _, legs in patched.cycles)
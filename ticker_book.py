@@ -0,0 +1,168 @@
+"""
+Ticker Book Module.
+Compact all-tickers snapshot decoded straight from the raw response text.
+
+Instead of json-decoding the whole response and building a dict per
+ticker, the wanted fields are pulled out with compiled regex passes over
+the text (one pass when the venue sends them next to each other) and the
+numeric columns are converted to float64 arrays in bulk. Other fields are never materialized. When the projection does not
+line up (missing or extra fields, escaped symbols), the adapter's JSON parser is used.
+
+A TickerBook is a read-only Mapping of symbol -> {'bid', 'ask', 'bidQty',
+'askQty'}, so code written against the old ticker dicts keeps working.
+"""
+
+import re
+import json
+import time
+import logging
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ticker columns, in TickerBook order
+COLUMNS = ('bid', 'ask', 'bidQty', 'askQty')
+
+_PATTERNS = {}
+
+def _field_pattern(key: str, text_value: bool = False):
+    """
+    Compiled regex capturing the value of "key" (compact JSON, as the venues send it).
+    Numbers may be quoted or bare; null captures '' (read as 0).
+    """
+    cache_key = (key, text_value)
+    if cache_key not in _PATTERNS:
+        value = r'"([^"]*)"' if text_value else r'"?([-+.0-9eE]*)'
+        _PATTERNS[cache_key] = re.compile(r'"' + re.escape(key) + r'":' + value)
+    return _PATTERNS[cache_key]
+
+def _run_pattern(keys: Tuple[str, ...]):
+    """
+    Compiled regex capturing a run of adjacent keys in one pass.
+    """
+    cache_key = ('run',) + keys
+    if cache_key not in _PATTERNS:
+        value = r'"?([-+.0-9eE]*)"?'
+        _PATTERNS[cache_key] = re.compile(','.join('"' + re.escape(key) + '":' + value for key in keys))
+    return _PATTERNS[cache_key]
+
+def _floats(values: List[str]) -> Optional[np.ndarray]:
+    try:
+        return np.fromiter(map(float, values), dtype=np.float64, count=len(values))
+    except ValueError:
+        pass
+    # Empty / null values count as 0, as safe_float does
+    try:
+        return np.fromiter((float(v) if v else 0.0 for v in values), dtype=np.float64, count=len(values))
+    except ValueError:
+        return None
+
+class TickerBook(Mapping):
+    def __init__(self, symbols: List[str], bid: np.ndarray, ask: np.ndarray,
+                 bid_qty: np.ndarray, ask_qty: np.ndarray):
+        self.symbols = symbols
+        self.index = {symbol: row for row, symbol in enumerate(symbols)}
+        self.bid = bid
+        self.ask = ask
+        self.bid_qty = bid_qty
+        self.ask_qty = ask_qty
+        # Seconds spent turning the response into this book, and how
+        self.decode_seconds = 0.0
+        self.decoder = None
+
+    @classmethod
+    def project(cls, text: str, symbol_key: str, fields: Tuple[Tuple[str, str], ...]) -> Optional['TickerBook']:
+        """
+        Build the book from the raw response text. `fields` maps TickerBook
+        columns to the venue's keys as (column, key) pairs in wire order;
+        columns not listed (e.g. sizes KuCoin does not report) are zeros.
+        Returns None if the fields do not line up one per ticker, or a symbol
+        is escaped (only the JSON parser spells those right).
+        """
+        symbols = _field_pattern(symbol_key, text_value=True).findall(text)
+        expected = text.count('"' + symbol_key + '":')
+        if not symbols or len(symbols) != expected or any('\\' in symbol for symbol in symbols):
+            return None
+        keys = tuple(key for _, key in fields)
+
+        # Keys listed in wire order and adjacent on the wire: a single pass
+        runs = _run_pattern(keys).findall(text) if len(keys) > 1 else []
+        if len(runs) == expected:
+            found = list(zip(*runs))
+        else:
+            found = [_field_pattern(key).findall(text) for key in keys]
+            if any(len(values) != expected for values in found):
+                return None
+
+        n = len(symbols)
+        columns = {column: np.zeros(n) for column in COLUMNS}
+        for (column, _), values in zip(fields, found):
+            floats = _floats(values)
+            if floats is None:
+                return None
+            columns[column] = floats
+        return cls(symbols, *(columns[column] for column in COLUMNS))
+
+    @classmethod
+    def from_dict(cls, tickers: Dict[str, Dict]) -> 'TickerBook':
+        """
+        Build the book from classic {symbol: {'bid', 'ask', 'bidQty', 'askQty'}} tickers.
+        """
+        symbols = list(tickers)
+        n = len(symbols)
+        columns = [
+            np.fromiter((float(t.get(column, 0) or 0) for t in tickers.values()), dtype=np.float64, count=n)
+            for column in COLUMNS
+        ]
+        return cls(symbols, *columns)
+
+    @classmethod
+    def decode(cls, exchange: str, text: str, symbol_key: str, fields: Tuple[Tuple[str, str], ...],
+               parse: Callable[[Dict], Dict[str, Dict]]) -> 'TickerBook':
+        """
+        Projected decode of an all-tickers response, falling back to
+        json.loads + the adapter's parse() when projection fails.
+        Logs and records the decode time.
+        """
+        started = time.perf_counter()
+        book = cls.project(text, symbol_key, fields)
+        decoder = 'projected'
+        if book is None:
+            try:
+                tickers = parse(json.loads(text))
+            except ValueError as e:
+                logger.error(f"[{exchange}] Undecodable ticker response: {e}")
+                tickers = {}
+            book = cls.from_dict(tickers)
+            decoder = 'json'
+
+        book.decode_seconds = time.perf_counter() - started
+        book.decoder = decoder
+        logger.info(f"[{exchange}] Decoded {len(book)} tickers in {book.decode_seconds * 1000:.1f} ms ({decoder}).")
+        return book
+
+    def row(self, symbol: str) -> int:
+        """
+        Row of a symbol in the column arrays, or -1.
+        """
+        return self.index.get(symbol, -1)
+
+    def __getitem__(self, symbol: str) -> Dict:
+        row = self.index[symbol]
+        return {
+            'bid': float(self.bid[row]),
+            'ask': float(self.ask[row]),
+            'bidQty': float(self.bid_qty[row]),
+            'askQty': float(self.ask_qty[row])
+        }
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.index
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self):
+        return len(self.symbols)
@@ -0,0 +1,103 @@
+"""
+Universe Diff Module.
+What changed between two versions of an exchange's symbol universe.
+
+A symbol refresh usually lists or delists a handful of pairs, so instead of
+rebuilding everything downstream, live graphs are patched with the diff
+(see MarketGraph.apply_diff) and cycle indices re-enumerate only the
+cycles through the affected coins (see CycleIndex.for_graph).
+"""
+
+import time
+from typing import List, Dict, Optional, Set
+import numpy as np
+from symbol_cache import SymbolTable, NUMERIC_FIELDS
+
+class UniverseDiff:
+    def __init__(self, exchange: str, added: List[Dict], removed: List[Dict], changed: List[Dict],
+                 at: float = None):
+        self.exchange = exchange
+        # Symbol records ('symbol', 'base', 'quote', fee/min fields) of the new
+        # universe for added and changed pairs, of the old one for removed pairs.
+        # Changed records also carry 'changes': {field: [old, new]}.
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.at = at if at is not None else time.time()
+
+    @classmethod
+    def compute(cls, exchange: str, old: Optional[SymbolTable], new: SymbolTable) -> 'UniverseDiff':
+        """
+        Diff two symbol tables by symbol: listings, delistings, and pairs whose
+        base/quote or fee/min-size fields changed.
+        """
+        if old is new:
+            return cls(exchange, [], [], [])
+        if old is None:
+            return cls(exchange, new.records(), [], [])
+
+        old_row = {symbol: row for row, symbol in enumerate(old.symbols)}
+        new_rows = np.arange(len(new), dtype=np.int64)
+        old_rows = np.fromiter((old_row.get(symbol, -1) for symbol in new.symbols), dtype=np.int64, count=len(new))
+        common = old_rows >= 0
+        added_rows = new_rows[~common]
+        old_rows, new_rows = old_rows[common], new_rows[common]
+        kept = set(old_rows.tolist())
+        removed_rows = [row for row in range(len(old)) if row not in kept]
+
+        # Compare coins by name (the tables number their coins independently)
+        new_coin = {coin: i for i, coin in enumerate(new.coins)}
+        old_to_new = np.array([new_coin.get(coin, -1) for coin in old.coins], dtype=np.int64)
+        differs = {
+            'base': old_to_new[old.base_idx[old_rows]] != new.base_idx[new_rows],
+            'quote': old_to_new[old.quote_idx[old_rows]] != new.quote_idx[new_rows]
+        }
+        for field in NUMERIC_FIELDS:
+            differs[field] = old.numeric[field][old_rows] != new.numeric[field][new_rows]
+        any_change = np.logical_or.reduce(list(differs.values())) if len(new_rows) else np.zeros(0, dtype=bool)
+
+        old_records = old.records() if removed_rows or any_change.any() else []
+        new_records = new.records() if len(added_rows) or any_change.any() else []
+        changed = []
+        for i in np.nonzero(any_change)[0].tolist():
+            before, after = old_records[old_rows[i]], new_records[new_rows[i]]
+            record = dict(after)
+            record['changes'] = {field: [before[field], after[field]] for field in differs if differs[field][i]}
+            changed.append(record)
+
+        return cls(
+            exchange,
+            [new_records[row] for row in added_rows.tolist()],
+            [old_records[row] for row in removed_rows],
+            changed
+        )
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def coins(self) -> Set[str]:
+        """
+        Coins of every added, removed or changed pair (old base/quote included).
+        """
+        coins = set()
+        for record in self.added + self.removed + self.changed:
+            coins.add(record['base'].upper())
+            coins.add(record['quote'].upper())
+            for field in ('base', 'quote'):
+                if field in record.get('changes', {}):
+                    coins.add(record['changes'][field][0].upper())
+        return coins
+
+    def to_dict(self) -> Dict:
+        return {
+            'exchange': self.exchange,
+            'at': self.at,
+            'added': self.added,
+            'removed': self.removed,
+            'changed': self.changed,
+            'coins': sorted(self.coins())
+        }
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)